@@ -3,7 +3,7 @@
 # Metadata is inherited from Nautobot. If not including Nautobot in the environment, this should be added
 from importlib import metadata
 
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from nautobot.apps import NautobotAppConfig
 
 __version__ = metadata.version(__name__)
@@ -26,7 +26,19 @@ class NautobotBGPModelsConfig(NautobotAppConfig):
             "AutonomousSystem": ["Active", "Available", "Planned"],
             "BGPRoutingInstance": ["Planned", "Active", "Decommissioned"],
             "Peering": ["Active", "Decommissioned", "Deprovisioning", "Offline", "Planned", "Provisioning"],
-        }
+        },
+        "extra_attributes_cache": {
+            "enabled": True,
+            "max_entries": 10000,
+            "cache_alias": None,
+            "timeout": 300,
+        },
+        "allocated_asn_index": {
+            "refresh_interval": 5,
+        },
+        "device_bgp_panel": {
+            "max_endpoints": 50,
+        },
     }
     caching_config = {}
 
@@ -38,11 +50,50 @@ class NautobotBGPModelsConfig(NautobotAppConfig):
         # available.
         from . import dolt_compat  # noqa pylint: disable=import-outside-toplevel, unused-import
 
+        from nautobot.ipam.models import (  # pylint: disable=import-outside-toplevel
+            IPAddress,
+            IPAddressToInterface,
+            Prefix,
+            VRFPrefixAssignment,
+        )
+
+        from .graphql.types import register_graphql_types  # pylint: disable=import-outside-toplevel
+        from .models import (  # pylint: disable=import-outside-toplevel
+            AutonomousSystem,
+            BGPExtraAttributesMixin,
+            BGPRoutingInstance,
+            PeerEndpoint,
+            PeerGroup,
+            PeerGroupTemplate,
+        )
         from .signals import (  # pylint: disable=import-outside-toplevel
+            invalidate_extra_attributes_cache,
             post_migrate_create_statuses,
+            refresh_peer_endpoint_effective,
+            refresh_peer_endpoint_effective_local_ip,
+            update_allocated_asn_index_on_delete,
+            update_allocated_asn_index_on_save,
         )
 
+        register_graphql_types()
+
         post_migrate.connect(post_migrate_create_statuses, sender=self)
 
+        for model in self.get_models():
+            if issubclass(model, BGPExtraAttributesMixin):
+                post_save.connect(invalidate_extra_attributes_cache, sender=model)
+                post_delete.connect(invalidate_extra_attributes_cache, sender=model)
+
+        for model in (PeerGroupTemplate, PeerGroup, BGPRoutingInstance, PeerEndpoint):
+            post_save.connect(refresh_peer_endpoint_effective, sender=model)
+            post_delete.connect(refresh_peer_endpoint_effective, sender=model)
+
+        for model in (IPAddressToInterface, IPAddress, VRFPrefixAssignment, Prefix):
+            post_save.connect(refresh_peer_endpoint_effective_local_ip, sender=model)
+            post_delete.connect(refresh_peer_endpoint_effective_local_ip, sender=model)
+
+        post_save.connect(update_allocated_asn_index_on_save, sender=AutonomousSystem)
+        post_delete.connect(update_allocated_asn_index_on_delete, sender=AutonomousSystem)
+
 
 config = NautobotBGPModelsConfig  # pylint:disable=invalid-name
@@ -0,0 +1,507 @@
+"""Reconciliation of the BGP configuration of a routing instance with its desired state, for the `reconcile` API action.
+
+The desired state lists the address families, peer groups and sessions of a routing instance. Each section given
+replaces the matching records of the routing instance, and each section left out is not reconciled. Records are
+matched to the desired ones on their natural keys rather than on their IDs:
+
+- address families on their AFI-SAFI and VRF,
+- peer groups on their name and VRF, and their address families on their AFI-SAFI,
+- sessions, i.e. an endpoint of the routing instance along with its peering and its peer, on `Peering.get_key()`, and
+  the address families of that endpoint on their AFI-SAFI.
+
+Only the records of the routing instance are updated and deleted: the peer of an existing session, which may belong to
+another routing instance, is left as is. Deleting a session deletes its local endpoint, along with the peering only if
+the peer has no routing instance, as nothing else would manage it.
+
+The current state is loaded with a fixed number of queries, and only the records and fields that differ are written,
+with one bulk query per model and action, so that reconciling the same desired state again doesn't write anything.
+"""
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Model, Prefetch, prefetch_related_objects
+from django.utils import timezone
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.ipam.models import IPAddress
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.api.serializers import (
+    PeeringBulkCreateListSerializer,
+    apply_custom_field_defaults,
+    as_serializer_error,
+    bulk_operation,
+    send_post_save,
+)
+from nautobot_bgp_models.validation import ValidationContext
+
+# Fields set from the desired state, by model
+FIELDS = {
+    models.BGPRoutingInstance: ["extra_attributes"],
+    models.AddressFamily: ["afi_safi", "vrf", "extra_attributes"],
+    models.PeerGroup: [
+        "name",
+        "vrf",
+        "description",
+        "enabled",
+        "role",
+        "autonomous_system",
+        "peergroup_template",
+        "source_ip",
+        "source_interface",
+        "secret",
+        "extra_attributes",
+    ],
+    models.PeerGroupAddressFamily: ["afi_safi", "import_policy", "export_policy", "multipath", "extra_attributes"],
+    models.Peering: ["status"],
+    models.PeerEndpoint: [
+        "routing_instance",
+        "description",
+        "enabled",
+        "role",
+        "autonomous_system",
+        "peer_group",
+        "source_ip",
+        "source_interface",
+        "secret",
+        "extra_attributes",
+    ],
+    models.PeerEndpointAddressFamily: ["afi_safi", "import_policy", "export_policy", "multipath", "extra_attributes"],
+}
+
+# Records loaded along with the records whose signals are sent, for their representation and `__str__()`
+LOG_SELECT_RELATED = {
+    models.BGPRoutingInstance: ["device", "autonomous_system", "status"],
+    models.AddressFamily: ["routing_instance__device", "vrf"],
+    models.PeerGroup: ["routing_instance__device", "vrf"],
+    models.PeerGroupAddressFamily: ["peer_group__routing_instance__device", "peer_group__vrf"],
+    models.PeerEndpointAddressFamily: [
+        "peer_endpoint__routing_instance__device",
+        "peer_endpoint__autonomous_system",
+        "peer_endpoint__source_ip",
+        "peer_endpoint__peer_group",
+    ],
+}
+
+ACTIONS = {
+    ObjectChangeActionChoices.ACTION_CREATE: "add",
+    ObjectChangeActionChoices.ACTION_UPDATE: "change",
+    ObjectChangeActionChoices.ACTION_DELETE: "delete",
+}
+
+
+def get_attnames(model):
+    """Return the attribute names (e.g. `vrf_id`) of the fields of `model` set from the desired state."""
+    return [model._meta.get_field(name).attname for name in FIELDS[model]]
+
+
+def get_related_object_fields(fields):
+    """Return the names of the given fields set to related objects, which the serializers already looked up."""
+    return [name for name, value in fields.items() if isinstance(value, Model)]
+
+
+class Change:
+    """A record created, updated or deleted by a reconciliation, with the values it changes as `{attname: (old, new)}`.
+
+    The display is computed upfront, as a deleted record can't be rendered anymore.
+    """
+
+    def __init__(self, action, instance, values=None, display=None):
+        """Describe the `action` on `instance`."""
+        self.action = action
+        self.instance = instance
+        self.values = values or {}
+        self.display = display if display is not None else str(instance)
+
+    def as_dict(self, applied):
+        """Return the change as rendered by the API; created records only have an ID once the change is `applied`."""
+        meta = self.instance._meta
+        return {
+            "action": self.action,
+            "object_type": f"{meta.app_label}.{meta.model_name}",
+            "id": self.instance.pk if applied or self.action != ObjectChangeActionChoices.ACTION_CREATE else None,
+            "display": self.display,
+            "changes": {
+                meta.get_field(attname).name: {"old": old, "new": new} for attname, (old, new) in self.values.items()
+            },
+        }
+
+
+class Reconciler:
+    """Compute and apply the changes bringing the BGP configuration of `routing_instance` to its `desired` state.
+
+    `desired` is the validated data of `RoutingInstanceDesiredStateSerializer`. `plan()` computes the changes without
+    writing anything, and `apply()` then writes them.
+    """
+
+    def __init__(self, routing_instance, desired):
+        """Reconcile `routing_instance` with `desired`."""
+        self.routing_instance = routing_instance
+        self.desired = desired
+        self.changes = []
+        self.errors = {}
+        self.created = {}
+        self.updated = {}
+        self.deleted = {}
+        # The new sessions, as records of `PeeringBulkCreateListSerializer.create_peerings()`
+        self.new_sessions = []
+        # The local endpoints of the existing sessions, which the desired state manages
+        self.managed_endpoint_pks = set()
+
+    def _add_error(self, path, error, field=None):
+        """Record `error`, a Django `ValidationError` or a message about `field`, at `path` in the errors."""
+        if isinstance(error, DjangoValidationError):
+            detail = as_serializer_error(error)
+        else:
+            detail = {field or api_settings.NON_FIELD_ERRORS_KEY: [error]}
+        node = self.errors
+        for key in path:
+            node = node.setdefault(key, {})
+        for key, messages in detail.items():
+            node.setdefault(key, []).extend(messages)
+
+    def _build(self, model, path, **fields):
+        """Return a new `model` record with the given fields, validated as `full_clean()` does; None if it is invalid.
+
+        Uniqueness is ensured by the matching of the records instead, and the related objects aren't validated again.
+        """
+        instance = model(**fields)
+        try:
+            instance.full_clean(exclude=get_related_object_fields(fields), validate_unique=False)
+        except DjangoValidationError as error:
+            self._add_error(path, error)
+            return None
+        return instance
+
+    def _create(self, instance, display=None):
+        """Plan the creation of `instance`."""
+        model = type(instance)
+        self.created.setdefault(model, []).append(instance)
+        values = {attname: (None, getattr(instance, attname)) for attname in get_attnames(model)}
+        self.changes.append(Change(ObjectChangeActionChoices.ACTION_CREATE, instance, values, display))
+
+    def _update(self, instance, desired):
+        """Plan the update of `instance` to the field values of `desired`, if any of them differs."""
+        model = type(instance)
+        attnames = get_attnames(model)
+        old_values = {attname: getattr(instance, attname) for attname in attnames}
+        for name in FIELDS[model]:
+            setattr(instance, name, getattr(desired, name))
+        changed_fields = instance.get_changed_fields() & set(attnames)
+        if changed_fields:
+            values = {attname: (old_values[attname], getattr(instance, attname)) for attname in sorted(changed_fields)}
+            instances, fields = self.updated.setdefault(model, ([], set()))
+            instances.append(instance)
+            fields.update(changed_fields)
+            self.changes.append(Change(ObjectChangeActionChoices.ACTION_UPDATE, instance, values))
+
+    def _delete(self, instance, display=None):
+        """Plan the deletion of `instance`."""
+        self.deleted.setdefault(type(instance), []).append(instance)
+        self.changes.append(Change(ObjectChangeActionChoices.ACTION_DELETE, instance, display=display))
+
+    def _reconcile(self, model, path, existing, items, get_key, **parent):
+        """Match the desired records of `model` at `path` to the `existing` ones, keyed by `get_key(record)`.
+
+        Existing records are updated, new ones created, and the existing records left over deleted. Returns the
+        records of the desired state, existing or new, as `(item, record)` pairs.
+        """
+        existing = {get_key(instance): instance for instance in existing}
+        keys = set()
+        records = []
+        for index, item in enumerate(items):
+            fields = {name: value for name, value in item.items() if name != "address_families"}
+            desired = self._build(model, (*path, index), **parent, **fields)
+            if desired is None:
+                continue
+            key = get_key(desired)
+            if key in keys:
+                self._add_error((*path, index), f"Duplicate {model._meta.verbose_name} in the desired state.")
+                continue
+            keys.add(key)
+            instance = existing.pop(key, None)
+            if instance is None:
+                self._create(desired)
+                records.append((item, desired))
+            else:
+                self._update(instance, desired)
+                records.append((item, instance))
+        for instance in existing.values():
+            self._delete(instance)
+        return records
+
+    def plan(self):
+        """Compute the changes, and return them; raise a DRF `ValidationError` if the desired state is invalid."""
+        with ValidationContext() as context:
+            self._prime(context)
+            if "extra_attributes" in self.desired:
+                routing_instance = models.BGPRoutingInstance(extra_attributes=self.desired["extra_attributes"])
+                self._update(self.routing_instance, routing_instance)
+            if "address_families" in self.desired:
+                self._plan_address_families()
+            peer_groups = self._plan_peer_groups()
+            if "endpoints" in self.desired:
+                self._plan_sessions(peer_groups)
+            self._check_deleted_peer_groups()
+        if self.errors:
+            raise serializers.ValidationError(self.errors)
+        return self.changes
+
+    def _prime(self, context):
+        """Load the IP address assignments and VRFs of the devices and IP addresses of the desired state."""
+        device_ids = {self.routing_instance.device_id}
+        ip_address_ids = set()
+
+        def collect(value):
+            if isinstance(value, dict):
+                for item in value.values():
+                    collect(item)
+            elif isinstance(value, list):
+                for item in value:
+                    collect(item)
+            elif isinstance(value, models.BGPRoutingInstance):
+                device_ids.add(value.device_id)
+            elif isinstance(value, IPAddress):
+                ip_address_ids.add(value.pk)
+
+        collect(self.desired)
+        context.prime(device_ids=device_ids, ip_address_ids=ip_address_ids)
+
+    def _plan_address_families(self):
+        """Plan the changes of the address families of the routing instance."""
+        self._reconcile(
+            models.AddressFamily,
+            ("address_families",),
+            self.routing_instance.address_families.select_related("vrf"),
+            self.desired["address_families"],
+            lambda address_family: (address_family.afi_safi, address_family.vrf_id),
+            routing_instance=self.routing_instance,
+        )
+
+    def _plan_peer_groups(self):
+        """Plan the changes of the peer groups of the routing instance; return the resulting peer groups by name."""
+        queryset = self.routing_instance.peer_groups.select_related("vrf")
+        if "peer_groups" not in self.desired:
+            peer_groups = {}
+            for peer_group in queryset:
+                peer_groups.setdefault(peer_group.name, []).append(peer_group)
+            return peer_groups
+
+        records = self._reconcile(
+            models.PeerGroup,
+            ("peer_groups",),
+            queryset.prefetch_related("address_families"),
+            self.desired["peer_groups"],
+            lambda peer_group: (peer_group.name, peer_group.vrf_id),
+            routing_instance=self.routing_instance,
+        )
+        peer_groups = {}
+        for index, (item, peer_group) in enumerate(records):
+            peer_groups.setdefault(peer_group.name, []).append(peer_group)
+            if "address_families" in item:
+                self._reconcile(
+                    models.PeerGroupAddressFamily,
+                    ("peer_groups", index, "address_families"),
+                    peer_group.address_families.all() if peer_group.present_in_database else [],
+                    item["address_families"],
+                    lambda address_family: address_family.afi_safi,
+                    peer_group=peer_group,
+                )
+        return peer_groups
+
+    def _load_sessions(self):
+        """Return the current sessions of the routing instance, as `{key: [(peering, local endpoint, peer)]}`."""
+        peerings = (
+            models.Peering.objects.filter(endpoints__routing_instance=self.routing_instance)
+            .distinct()
+            .select_related("status")
+            .prefetch_related(
+                Prefetch(
+                    "endpoints",
+                    queryset=models.PeerEndpoint.objects.with_endpoint_key()
+                    .select_related("routing_instance__device", "peer_group", "source_ip", "autonomous_system")
+                    .prefetch_related("address_families"),
+                )
+            )
+        )
+        sessions = {}
+        for peering in peerings:
+            endpoints = list(peering.endpoints.all())
+            local = next(endpoint for endpoint in endpoints if endpoint.routing_instance_id == self.routing_instance.pk)
+            peer = next((endpoint for endpoint in endpoints if endpoint is not local), None)
+            self.managed_endpoint_pks.add(local.pk)
+            key = models.Peering.get_key(endpoints)
+            sessions.setdefault(key, []).append((peering, local, peer))
+        return sessions
+
+    def _get_peer_group(self, peer_groups, name, path):
+        """Return the peer group of the routing instance named `name`, or record an error."""
+        if not name:
+            return None
+        matches = peer_groups.get(name, [])
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            self._add_error(path, f"Peer group name {name} is used in {len(matches)} VRFs.", field="peer_group")
+        else:
+            self._add_error(path, f"Unknown peer group {name}.", field="peer_group")
+        return None
+
+    def _plan_sessions(self, peer_groups):  # pylint: disable=too-many-locals
+        """Plan the changes of the sessions of the routing instance, given the resulting peer groups by name."""
+        desired_sessions = []
+        for index, item in enumerate(self.desired["endpoints"]):
+            path = ("endpoints", index)
+            fields = {
+                name: value for name, value in item.items() if name not in ("address_families", "peer", "peering")
+            }
+            fields["peer_group"] = self._get_peer_group(peer_groups, fields.get("peer_group"), path)
+            peering = self._build(models.Peering, (*path, "peering"), **item["peering"])
+            if peering is None:
+                continue
+            local = self._build(
+                models.PeerEndpoint, path, peering=peering, routing_instance=self.routing_instance, **fields
+            )
+            peer = self._build(models.PeerEndpoint, (*path, "peer"), peering=peering, **item["peer"])
+            if local is None or peer is None:
+                continue
+            try:
+                peering.validate_peers([local, peer])
+            except DjangoValidationError as error:
+                self._add_error(path, error)
+                continue
+            desired_sessions.append((index, item, peering, local, peer))
+
+        # The VRFs of the local IP addresses, needed by the keys of endpoints without a peer group VRF
+        local_ips = {endpoint.local_ip for session in desired_sessions for endpoint in session[3:]} - {None}
+        prefetch_related_objects(list(local_ips), "parent__vrfs")
+
+        sessions = self._load_sessions()
+        keys = set()
+        for index, item, peering, local, peer in desired_sessions:
+            key = models.Peering.get_key([local, peer])
+            if key in keys:
+                self._add_error(("endpoints", index), "Duplicate session in the desired state.")
+                continue
+            keys.add(key)
+            matches = sessions.get(key)
+            if matches:
+                existing_peering, existing_local, _ = matches.pop(0)
+                self._update(existing_peering, peering)
+                self._update(existing_local, local)
+                local = existing_local
+            else:
+                self.new_sessions.append({"peering": peering, "endpoints": [local, peer]})
+                self._create(peering, display=f"{local} ↔︎ {peer}")
+                self._create(local)
+                self._create(peer)
+            if "address_families" in item:
+                self._reconcile(
+                    models.PeerEndpointAddressFamily,
+                    ("endpoints", index, "address_families"),
+                    local.address_families.all() if local.present_in_database else [],
+                    item["address_families"],
+                    lambda address_family: address_family.afi_safi,
+                    peer_endpoint=local,
+                )
+
+        for matches in sessions.values():
+            for peering, local, peer in matches:
+                if peer is not None and peer.routing_instance_id is not None:
+                    # The peering stays with the endpoint of the other routing instance
+                    self._delete(local)
+                    continue
+                self._delete(peering, display=f"{local} ↔︎ {peer}")
+                if peer is not None:
+                    self.managed_endpoint_pks.add(peer.pk)
+
+    def _check_deleted_peer_groups(self):
+        """Record an error for each deleted peer group still used by endpoints not managed by the desired state."""
+        peer_groups = self.deleted.get(models.PeerGroup, [])
+        if not peer_groups:
+            return
+        used = set(
+            models.PeerEndpoint.objects.filter(peer_group__in=peer_groups)
+            .exclude(pk__in=self.managed_endpoint_pks)
+            .values_list("peer_group", flat=True)
+        )
+        for peer_group in peer_groups:
+            if peer_group.pk in used:
+                self._add_error(("peer_groups",), f"Peer group {peer_group} is used by endpoints left out.")
+
+    def apply(self):
+        """Write the planned changes in one transaction, and send the signals of the records saved in bulk.
+
+        Records are deleted last: their deletion is recorded in the change log as it happens, whereas `bulk_operation()`
+        records all the changes of the change context when it ends.
+        """
+        now = timezone.now()
+        create_order = [models.AddressFamily, models.PeerGroup, models.PeerGroupAddressFamily]
+        with transaction.atomic():
+            with bulk_operation():
+                for model in create_order + [models.PeerEndpointAddressFamily]:
+                    apply_custom_field_defaults(self.created.get(model, []))
+                for model in create_order:
+                    model.objects.bulk_create(self.created.get(model, []))
+                for model, (instances, fields) in self.updated.items():
+                    for instance in instances:
+                        instance.last_updated = now
+                    model.objects.bulk_update(instances, sorted(fields | {"last_updated"}))
+                if self.new_sessions:
+                    PeeringBulkCreateListSerializer.create_peerings(self.new_sessions)
+                models.PeerEndpointAddressFamily.objects.bulk_create(
+                    self.created.get(models.PeerEndpointAddressFamily, [])
+                )
+                self._send_post_save_signals(create_order + [models.PeerEndpointAddressFamily])
+            # Sessions first, so that the peer groups they use can be deleted; their address families cascade
+            for model in (
+                models.Peering,
+                models.PeerEndpoint,
+                models.PeerEndpointAddressFamily,
+                models.PeerGroupAddressFamily,
+                models.PeerGroup,
+                models.AddressFamily,
+            ):
+                self._bulk_delete(model)
+        return self.changes
+
+    def _bulk_delete(self, model):
+        """Delete the records of `model` planned for deletion; the change log records them on deletion."""
+        instances = self.deleted.get(model, [])
+        if instances:
+            model.objects.filter(pk__in=[instance.pk for instance in instances]).delete()
+
+    def _send_post_save_signals(self, create_order):
+        """Send the `post_save` signals of the records created and updated in bulk; new sessions already sent theirs.
+
+        The receivers, e.g. the change log and the invalidation of the cached extra attributes, thus handle every record
+        written, and the fields saved for each updated record are given to them.
+        """
+        update_fields = {
+            change.instance.pk: [*change.values, "last_updated"]
+            for change in self.changes
+            if change.action == ObjectChangeActionChoices.ACTION_UPDATE
+        }
+        for model in create_order:
+            self._send_post_save(model, self.created.get(model, []), True)
+        for model, (instances, _) in self.updated.items():
+            if model not in (models.Peering, models.PeerEndpoint):
+                self._send_post_save(model, instances, False, update_fields)
+        peerings = self.updated.get(models.Peering, ([], None))[0]
+        endpoints = self.updated.get(models.PeerEndpoint, ([], None))[0]
+        if peerings or endpoints:
+            PeeringBulkCreateListSerializer.send_post_save_signals(
+                False,
+                {peering.pk: update_fields[peering.pk] for peering in peerings},
+                {endpoint.pk: update_fields[endpoint.pk] for endpoint in endpoints},
+            )
+
+    @staticmethod
+    def _send_post_save(model, instances, created, update_fields=None):
+        """Send the `post_save` signals of `instances` of `model`, reloaded with what their representation needs."""
+        if instances:
+            queryset = model.objects.filter(pk__in=[instance.pk for instance in instances])
+            send_post_save(
+                list(queryset.select_related(*LOG_SELECT_RELATED[model]).order_by("pk")), created, update_fields
+            )
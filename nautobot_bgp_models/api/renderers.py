@@ -0,0 +1,24 @@
+"""Renderers in use by BGP models app."""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render data as newline-delimited JSON, one JSON document per line.
+
+    Used by views streaming their results (see DeviceEffectiveConfigExportView); the error responses of such views
+    (permission denied, invalid filters...) are rendered by this class as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` as a single line."""
+        if data is None:
+            return b""
+        return (json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n").encode(self.charset)
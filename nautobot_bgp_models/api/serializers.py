@@ -1,14 +1,32 @@
 """REST API serializers for nautobot_bgp_models models."""
 
+from contextlib import contextmanager, nullcontext
+import copy
+import uuid
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Model, Prefetch, Q, prefetch_related_objects
+from django.db.models.signals import post_save
+from django.utils import timezone
 from rest_framework import serializers, validators
+from rest_framework.fields import CreateOnlyDefault, empty
+from rest_framework.settings import api_settings
 
 from nautobot.apps.api import (
+    NautobotHyperlinkedRelatedField,
     NautobotModelSerializer,
     TaggedModelSerializerMixin,
 )
 from nautobot.core.settings_funcs import is_truthy
+from nautobot.extras.context_managers import deferred_change_logging_for_bulk_operation
+from nautobot.extras.models import CustomField
+from nautobot.extras.signals import change_context_state
+from nautobot.ipam.models import IPAddress
 
 from nautobot_bgp_models import models
+from nautobot_bgp_models.signals import deferred_peer_endpoint_effective_rebuild
+from nautobot_bgp_models.validation import ValidationContext
 
 
 class AutonomousSystemSerializer(
@@ -24,6 +42,39 @@ class AutonomousSystemSerializer(
         fields = "__all__"
 
 
+class AutonomousSystemRangeListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """List serializer checking that AutonomousSystemRange records created in bulk don't overlap each other."""
+
+    def validate(self, attrs):
+        """Each range is checked against the database by `clean()`, but not against the other new ranges."""
+        if self.instance is None:
+            try:
+                models.AutonomousSystemRange.check_overlaps(
+                    [
+                        models.AutonomousSystemRange(
+                            name=item["name"], asn_min=item["asn_min"], asn_max=item["asn_max"]
+                        )
+                        for item in attrs
+                    ]
+                )
+            except DjangoValidationError as error:
+                raise serializers.ValidationError(error.messages)
+        return attrs
+
+
+class ValidationContextListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """List serializer validating all its records within a single `ValidationContext`.
+
+    The IP addresses of each device, and the VRFs of each IP address, are then loaded once for the whole request
+    rather than once per record.
+    """
+
+    def to_internal_value(self, data):
+        """Validate the records."""
+        with ValidationContext():
+            return super().to_internal_value(data)
+
+
 class AutonomousSystemRangeSerializer(
     NautobotModelSerializer,
     TaggedModelSerializerMixin,
@@ -37,6 +88,41 @@ class AutonomousSystemRangeSerializer(
     class Meta:
         model = models.AutonomousSystemRange
         fields = "__all__"
+        list_serializer_class = AutonomousSystemRangeListSerializer
+
+
+class AvailableASNSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """Representation of an ASN which isn't allocated to an AutonomousSystem yet."""
+
+    asn = serializers.IntegerField(read_only=True)
+
+    def to_representation(self, instance):
+        """Render the ASN number `instance` to a Python dict."""
+        return {"asn": instance}
+
+
+class ASNAllocationSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """Representation of a row of `AutonomousSystemRange.get_asns_with_gaps()`.
+
+    Allocated ASNs have `available` set to 0 and link to their AutonomousSystem; blocks of available ASNs start at
+    `asn` and have no `autonomous_system`.
+    """
+
+    asn = serializers.IntegerField(read_only=True)
+    available = serializers.IntegerField(read_only=True)
+    autonomous_system = NautobotHyperlinkedRelatedField(
+        read_only=True,
+        allow_null=True,
+        view_name="plugins-api:nautobot_bgp_models-api:autonomoussystem-detail",
+    )
+
+    def to_representation(self, instance):
+        """Render an AutonomousSystem, or a `{"asn": first, "available": count}` block, to a Python dict."""
+        if isinstance(instance, dict):
+            instance = {**instance, "autonomous_system": None}
+        else:
+            instance = {"asn": instance.asn, "available": 0, "autonomous_system": instance}
+        return super().to_representation(instance)
 
 
 class InheritableFieldsSerializerMixin:
@@ -91,6 +177,7 @@ class PeerGroupSerializer(
         model = models.PeerGroup
         fields = "__all__"
         validators = []
+        list_serializer_class = ValidationContextListSerializer
 
     def validate(self, data):
         """Custom validation logic to handle unique-together with a nullable field."""
@@ -115,6 +202,7 @@ class PeerEndpointSerializer(
     class Meta:
         model = models.PeerEndpoint
         fields = "__all__"
+        list_serializer_class = ValidationContextListSerializer
 
     def create(self, validated_data):
         """Create a new PeerEndpoint and update the peer on both sides."""
@@ -123,11 +211,12 @@ class PeerEndpointSerializer(
         return record
 
     def update(self, instance, validated_data):
-        """When updating an existing PeerEndpoint, ensure peer is properly setup on both side."""
-        peering_has_been_updated = False
-        if instance.peering.pk != validated_data.get("peering"):
-            peering_has_been_updated = True
+        """When updating an existing PeerEndpoint, ensure peer is properly setup on both side.
 
+        `validate()` already applied the new values to `instance`, so its field snapshot tells whether the peering
+        changed since it was loaded.
+        """
+        peering_has_been_updated = instance.has_changed("peering")
         result = super().update(instance, validated_data)
 
         if peering_has_been_updated:
@@ -148,14 +237,462 @@ class BGPRoutingInstanceSerializer(
         fields = "__all__"
 
 
-class PeeringSerializer(NautobotModelSerializer):
+class CachedFieldsMixin:
+    """Build the fields of a serializer once, for all the records it handles.
+
+    Nautobot's serializers build them again on each access in requests other than GET, i.e. for each record of a list.
+    """
+
+    _cached_fields = None
+
+    @property
+    def fields(self):
+        """Return the fields, built on first access."""
+        if self._cached_fields is None:
+            self._cached_fields = super().fields
+        return self._cached_fields
+
+
+class PeeringSerializer(CachedFieldsMixin, NautobotModelSerializer):
     """REST API serializer for Peering records."""
 
+    # Populated from the annotations of `PeeringQuerySet.with_endpoint_details()`
+    endpoint_a_device = serializers.CharField(read_only=True, allow_null=True)
+    endpoint_a_local_ip = serializers.CharField(read_only=True, allow_null=True)
+    endpoint_a_asn = serializers.IntegerField(read_only=True, allow_null=True)
+    endpoint_a_provider = serializers.CharField(read_only=True, allow_null=True)
+    endpoint_z_device = serializers.CharField(read_only=True, allow_null=True)
+    endpoint_z_local_ip = serializers.CharField(read_only=True, allow_null=True)
+    endpoint_z_asn = serializers.IntegerField(read_only=True, allow_null=True)
+    endpoint_z_provider = serializers.CharField(read_only=True, allow_null=True)
+
     class Meta:
         model = models.Peering
         fields = "__all__"
 
 
+class PreloadedRelatedField(NautobotHyperlinkedRelatedField):
+    """Related field returning the objects preloaded by its root serializer by PK, rather than querying each of them."""
+
+    def to_internal_value(self, data):
+        """Return the preloaded object referenced by `data`, if any."""
+        preloaded_objects = getattr(self.root, "preloaded_objects", None)
+        if preloaded_objects and not isinstance(data, dict):
+            try:
+                instance = preloaded_objects.get((self.queryset.model, uuid.UUID(str(data))))
+            except ValueError:
+                instance = None
+            if instance is not None:
+                return instance
+        return super().to_internal_value(data)
+
+
+def preload_related_objects(serializer, items):
+    """Load the objects referenced by PK through the `PreloadedRelatedField`s of `serializer` in `items`.
+
+    Nested serializers are included. Objects are loaded with one query per model, and returned keyed by
+    `(model, pk)`.
+    """
+    querysets = {}
+    pks = {}
+
+    def collect(serializer, item):
+        if not isinstance(item, dict):
+            return
+        for name, field in serializer.fields.items():
+            if field.read_only or name not in item:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                for child_item in item[name] if isinstance(item[name], list) else []:
+                    collect(field.child, child_item)
+            elif isinstance(field, serializers.Serializer):
+                collect(field, item[name])
+            elif isinstance(field, PreloadedRelatedField):
+                try:
+                    pk = uuid.UUID(str(item[name]))
+                except ValueError:
+                    continue
+                querysets.setdefault(field.queryset.model, field.queryset)
+                pks.setdefault(field.queryset.model, set()).add(pk)
+
+    for item in items:
+        collect(serializer, item)
+    return {
+        (model, instance.pk): instance
+        for model, queryset in querysets.items()
+        for instance in queryset.filter(pk__in=pks[model])
+    }
+
+
+def as_serializer_error(error):
+    """Return the messages of a Django `ValidationError` as serializer errors, including those of `full_clean()`."""
+    detail = serializers.as_serializer_error(error)
+    if NON_FIELD_ERRORS in detail:
+        detail[api_settings.NON_FIELD_ERRORS_KEY] = detail.pop(NON_FIELD_ERRORS)
+    return detail
+
+
+@contextmanager
+def bulk_operation():
+    """Handle the signals sent for records saved in bulk within the block, in one transaction.
+
+    Within a change context, the changes are logged when the block ends, as Nautobot's bulk edit views do with
+    `deferred_change_logging_for_bulk_operation()`, and the PeerEndpointEffective records they affect are rebuilt
+    together just before.
+    """
+    change_logging = deferred_change_logging_for_bulk_operation() if change_context_state.get() else nullcontext()
+    with transaction.atomic(), change_logging, deferred_peer_endpoint_effective_rebuild():
+        yield
+
+
+def send_post_save(instances, created, update_fields=None):
+    """Send the `post_save` signal of `instances`, records of a model saved in bulk, as their `save()` would have.
+
+    `bulk_create()` and `bulk_update()` don't send it, so this is what records the changes in the change log, for
+    which Nautobot then enqueues the webhooks and job hooks, and what lets the other receivers, such as the
+    invalidation of the cached extra attributes, know about the records. `update_fields` gives the names of the fields
+    saved for each record, by PK. The change log serializes the records one by one, so they should be loaded with
+    whatever their representation and `__str__()` need.
+    """
+    for instance in instances:
+        fields = (update_fields or {}).get(instance.pk)
+        post_save.send(
+            sender=type(instance),
+            instance=instance,
+            created=created,
+            update_fields=frozenset(fields) if fields is not None else None,
+            raw=False,
+            using=instance._state.db,
+        )
+
+
+def apply_custom_field_defaults(instances):
+    """Set the custom fields of `instances`, new records of a model, to their defaults, as the REST API does."""
+    if not instances:
+        return
+    defaults = {field.key: field.default for field in CustomField.objects.get_for_model(type(instances[0]))}
+    if defaults:
+        for instance in instances:
+            instance._custom_field_data = {**defaults, **instance._custom_field_data}
+
+
+class CachedDefault:
+    """Default value of a serializer field, computed for the first record and reused for the next ones.
+
+    The fields of a list serializer are shared by all its records, so that `CustomFieldDefaultValues`, for instance,
+    looks the custom fields up once per bulk request rather than once per record.
+    """
+
+    requires_context = True
+
+    def __init__(self, default):
+        """Wrap `default`, a default value or callable as accepted by serializer fields."""
+        self.default = default
+        self.value = empty
+
+    def __call__(self, serializer_field):
+        """Return a copy of the default value."""
+        if self.value is empty:
+            if getattr(self.default, "requires_context", False):
+                self.value = self.default(serializer_field)
+            else:
+                self.value = self.default() if callable(self.default) else self.default
+        return copy.deepcopy(self.value)
+
+
+class BulkCreateFieldsMixin(CachedFieldsMixin):
+    """Leave out the fields requiring records to be saved one by one from the serializers of bulk creations."""
+
+    def get_fields(self):
+        """Tags and relationships are not supported, and the default custom field values are only looked up once."""
+        fields = super().get_fields()
+        fields.pop("tags", None)
+        fields.pop("relationships", None)
+        custom_fields = fields.get("custom_fields")
+        if custom_fields is not None and isinstance(custom_fields.default, CreateOnlyDefault):
+            custom_fields.default = CreateOnlyDefault(CachedDefault(custom_fields.default.default))
+        return fields
+
+
+class NestedRecordSerializerMixin(BulkCreateFieldsMixin):
+    """Serializer of records nested in a bulk request, validated along with their parent record.
+
+    The objects they reference by PK are preloaded by the root serializer.
+    """
+
+    serializer_related_field = PreloadedRelatedField
+
+    def validate(self, data):
+        """Skip the validation of the record on its own, as its parent isn't known yet."""
+        return data
+
+
+class PeeringEndpointSerializer(NestedRecordSerializerMixin, PeerEndpointSerializer):
+    """An endpoint of a peering created through `PeeringBulkCreateSerializer`.
+
+    The endpoint is validated along with its peering by `PeeringBulkCreateSerializer.validate()`.
+    """
+
+    class Meta:
+        model = models.PeerEndpoint
+        fields = [
+            "description",
+            "enabled",
+            "role",
+            "routing_instance",
+            "autonomous_system",
+            "peer_group",
+            "source_ip",
+            "source_interface",
+            "secret",
+            "extra_attributes",
+        ]
+
+
+class PeeringBulkCreateListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """List serializer creating peerings and their endpoints in bulk.
+
+    The objects referenced by the records are loaded upfront with one query per model, and the records are validated
+    within a single primed `ValidationContext`. Errors are reported for each record, and nothing is created unless all
+    the records are valid.
+    """
+
+    preloaded_objects = None
+
+    def to_internal_value(self, data):
+        """Validate the records."""
+        with ValidationContext() as context:
+            if isinstance(data, list):
+                self.preloaded_objects = preload_related_objects(self.child, data)
+                context.prime(
+                    device_ids={
+                        instance.device_id
+                        for instance in self.preloaded_objects.values()
+                        if isinstance(instance, models.BGPRoutingInstance)
+                    },
+                    ip_address_ids={
+                        instance.pk if isinstance(instance, IPAddress) else instance.source_ip_id
+                        for instance in self.preloaded_objects.values()
+                        if isinstance(instance, (IPAddress, models.PeerGroup))
+                    },
+                )
+            return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        """Create the peerings and their endpoints, linking the endpoints of each peering to each other."""
+        with bulk_operation():
+            return self.create_peerings(validated_data)
+
+    @classmethod
+    def create_peerings(cls, items):
+        """Create the peerings and endpoints of the given validated records, and return the peerings."""
+        peerings = [item["peering"] for item in items]
+        endpoint_pairs = [item["endpoints"] for item in items]
+        endpoints = [endpoint for pair in endpoint_pairs for endpoint in pair]
+        apply_custom_field_defaults(peerings)
+        apply_custom_field_defaults(endpoints)
+        models.Peering.objects.bulk_create(peerings)
+        models.PeerEndpoint.objects.bulk_create(endpoints)
+        for endpoint_a, endpoint_z in endpoint_pairs:
+            endpoint_a.peer, endpoint_z.peer = endpoint_z, endpoint_a
+        models.PeerEndpoint.objects.bulk_update(endpoints, ["peer"])
+        cls.send_post_save_signals(
+            True,
+            dict.fromkeys(peering.pk for peering in peerings),
+            dict.fromkeys(endpoint.pk for endpoint in endpoints),
+        )
+        return peerings
+
+    @staticmethod
+    def send_post_save_signals(created, peering_fields, endpoint_fields):
+        """Send the `post_save` signals of peerings and endpoints saved in bulk, given as {PK: saved fields} dicts.
+
+        The saved fields are None for new records. This should be done within `bulk_operation()`.
+        """
+        # Everything the representations and `__str__()` of the endpoints, of their peers and of their peerings need
+        endpoints_queryset = (
+            models.PeerEndpoint.objects.prefetch_display()
+            .with_local_ip()
+            .select_related(
+                "autonomous_system",
+                "peer_group__source_ip",
+                "routing_instance__autonomous_system",
+                "routing_instance__device__location",
+                "source_ip__parent__namespace",
+            )
+            .prefetch_related(
+                "tags", "source_ip__nat_outside_list", "source_ip__interfaces", "source_ip__vm_interfaces"
+            )
+            .order_by("pk")
+        )
+        peerings = list(
+            models.Peering.objects.filter(
+                Q(pk__in=list(peering_fields))
+                | Q(pk__in=models.PeerEndpoint.objects.filter(pk__in=list(endpoint_fields)).values("peering"))
+            )
+            .select_related("status")
+            .with_endpoint_details()
+            .prefetch_related(Prefetch("endpoints", queryset=endpoints_queryset))
+        )
+        # The prefetched endpoints refer to these peerings, with their endpoints loaded
+        endpoints = [endpoint for peering in peerings for endpoint in peering.endpoints.all()]
+        endpoints_by_pk = {endpoint.pk: endpoint for endpoint in endpoints}
+        for endpoint in endpoints:
+            if endpoint.peer_id in endpoints_by_pk:
+                endpoint.peer = endpoints_by_pk[endpoint.peer_id]
+        send_post_save([peering for peering in peerings if peering.pk in peering_fields], created, peering_fields)
+        send_post_save([endpoint for endpoint in endpoints if endpoint.pk in endpoint_fields], created, endpoint_fields)
+
+
+class PeeringBulkCreateSerializer(BulkCreateFieldsMixin, PeeringSerializer):
+    """A peering and its two endpoints, created in bulk by the `bulk-create` action of the peerings API."""
+
+    serializer_related_field = PreloadedRelatedField
+
+    endpoint_a = PeeringEndpointSerializer(write_only=True)
+    endpoint_z = PeeringEndpointSerializer(write_only=True)
+
+    class Meta:
+        model = models.Peering
+        fields = ["status", "endpoint_a", "endpoint_z"]
+        list_serializer_class = PeeringBulkCreateListSerializer
+
+    @staticmethod
+    def get_related_object_fields(data):
+        """Return the fields of `data` set to related objects, which the serializer fields already looked up."""
+        return [name for name, value in data.items() if isinstance(value, Model)]
+
+    def validate(self, data):
+        """Validate the peering and its endpoints together, as `PeeringAddView` does.
+
+        The related objects aren't validated again by `full_clean()`, which would look up each of them, and neither is
+        the uniqueness of the new records, which only have a unique (random) primary key.
+        """
+        peering_data = {key: value for key, value in data.items() if not key.startswith("endpoint_")}
+        peering = models.Peering(**peering_data)
+        try:
+            peering.full_clean(exclude=self.get_related_object_fields(peering_data), validate_unique=False)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(as_serializer_error(error))
+
+        endpoints = []
+        for name in ("endpoint_a", "endpoint_z"):
+            endpoint = models.PeerEndpoint(peering=peering, **data[name])
+            try:
+                # The peering isn't saved yet
+                endpoint.full_clean(
+                    exclude=["peering", *self.get_related_object_fields(data[name])], validate_unique=False
+                )
+            except DjangoValidationError as error:
+                raise serializers.ValidationError({name: as_serializer_error(error)})
+            endpoints.append(endpoint)
+
+        try:
+            peering.validate_peers(endpoints)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(as_serializer_error(error))
+        return {"peering": peering, "endpoints": endpoints}
+
+
+def get_writable_sources(serializer):
+    """Return the model attributes set by the writable fields of `serializer`, nested serializers excluded."""
+    return [
+        field.source
+        for field in serializer.fields.values()
+        if not field.read_only and not isinstance(field, serializers.Serializer)
+    ]
+
+
+class PeeringUpsertListSerializer(PeeringBulkCreateListSerializer):  # pylint: disable=abstract-method
+    """List serializer creating or updating peerings and their endpoints in bulk, matched on their composite keys.
+
+    Each record is the complete desired state of a peering and its endpoints, validated as for a creation. It is
+    matched to an existing peering by `Peering.get_key()`, and its endpoints to the endpoints of that peering by
+    `PeerEndpoint.endpoint_key`; records matching no peering are created. All the records are matched with a single
+    query, and the peerings and endpoints they change are written with one bulk update per model, so that sending
+    the same records again doesn't write anything.
+    """
+
+    def to_internal_value(self, data):
+        """Validate the records, then match them to the existing peerings."""
+        validated_data = super().to_internal_value(data)
+
+        endpoints = [endpoint for item in validated_data for endpoint in item["endpoints"]]
+        local_ips = {endpoint.local_ip for endpoint in endpoints} - {None}
+        # The VRFs of the local IP addresses, needed by the keys of endpoints without a peer group VRF
+        prefetch_related_objects(list(local_ips), "parent__vrfs")
+        for item in validated_data:
+            item["key"] = models.Peering.get_key(item["endpoints"])
+        matches = models.Peering.objects.match_keys(item["key"] for item in validated_data)
+
+        errors = []
+        keys = set()
+        for item in validated_data:
+            peering_pks = matches.get(item["key"], [])
+            if item["key"] in keys:
+                errors.append({api_settings.NON_FIELD_ERRORS_KEY: ["Duplicate peering in the request."]})
+            elif len(peering_pks) > 1:
+                errors.append({api_settings.NON_FIELD_ERRORS_KEY: [f"{len(peering_pks)} peerings match this record."]})
+            else:
+                errors.append({})
+            keys.add(item["key"])
+            item["peering_pk"] = peering_pks[0] if peering_pks else None
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated_data
+
+    def create(self, validated_data):
+        """Create the new peerings and update the existing ones; return all of them, in the order of the records."""
+        with bulk_operation():
+            self.create_peerings([item for item in validated_data if item["peering_pk"] is None])
+            updated = self.update_peerings({item["peering_pk"]: item for item in validated_data if item["peering_pk"]})
+        return [updated.get(item["peering_pk"], item["peering"]) for item in validated_data]
+
+    def update_peerings(self, items):
+        """Apply the validated records to the peerings they match, given as a {peering PK: record} dict.
+
+        Only the fields whose value changes are written, and only the changed peerings and endpoints are logged.
+        """
+        peering_sources = [source for source in get_writable_sources(self.child) if not source.startswith("endpoint_")]
+        endpoint_sources = get_writable_sources(self.child.fields["endpoint_a"])
+        peerings = models.Peering.objects.filter(pk__in=items).prefetch_related(
+            Prefetch("endpoints", queryset=models.PeerEndpoint.objects.with_endpoint_key())
+        )
+        now = timezone.now()
+        changes = {models.Peering: ([], set()), models.PeerEndpoint: ([], set())}
+        saved_fields = {models.Peering: {}, models.PeerEndpoint: {}}
+
+        def apply(instance, desired, sources):
+            for source in sources:
+                setattr(instance, source, getattr(desired, source))
+            changed_fields = instance.get_changed_fields()
+            if changed_fields:
+                instance.last_updated = now
+                changes[type(instance)][0].append(instance)
+                changes[type(instance)][1].update(changed_fields, ["last_updated"])
+                saved_fields[type(instance)][instance.pk] = [*changed_fields, "last_updated"]
+
+        for peering in peerings:
+            item = items[peering.pk]
+            apply(peering, item["peering"], peering_sources)
+            endpoints = {endpoint.endpoint_key: endpoint for endpoint in peering.endpoints.all()}
+            for desired in item["endpoints"]:
+                apply(endpoints[desired.endpoint_key], desired, endpoint_sources)
+
+        for model, (instances, fields) in changes.items():
+            if instances:
+                model.objects.bulk_update(instances, sorted(fields))
+        self.send_post_save_signals(False, saved_fields[models.Peering], saved_fields[models.PeerEndpoint])
+        return {peering.pk: peering for peering in peerings}
+
+
+class PeeringUpsertSerializer(PeeringBulkCreateSerializer):
+    """A peering and its two endpoints, created or updated in bulk by the `upsert` action of the peerings API."""
+
+    class Meta(PeeringBulkCreateSerializer.Meta):
+        list_serializer_class = PeeringUpsertListSerializer
+
+
 class AddressFamilySerializer(NautobotModelSerializer, ExtraAttributesSerializerMixin):
     """REST API serializer for AddressFamily records."""
 
@@ -186,3 +723,107 @@ class PeerEndpointAddressFamilySerializer(NautobotModelSerializer, ExtraAttribut
     class Meta:
         model = models.PeerEndpointAddressFamily
         fields = "__all__"
+
+
+class DesiredAddressFamilySerializer(NestedRecordSerializerMixin, AddressFamilySerializer):
+    """An address family of the desired state of a routing instance."""
+
+    class Meta:
+        model = models.AddressFamily
+        fields = ["afi_safi", "vrf", "extra_attributes"]
+
+
+class DesiredPeerGroupAddressFamilySerializer(NestedRecordSerializerMixin, PeerGroupAddressFamilySerializer):
+    """An address family of a peer group of the desired state of a routing instance."""
+
+    class Meta:
+        model = models.PeerGroupAddressFamily
+        fields = ["afi_safi", "import_policy", "export_policy", "multipath", "extra_attributes"]
+
+
+class DesiredPeerEndpointAddressFamilySerializer(NestedRecordSerializerMixin, PeerEndpointAddressFamilySerializer):
+    """An address family of a peer endpoint of the desired state of a routing instance."""
+
+    class Meta:
+        model = models.PeerEndpointAddressFamily
+        fields = ["afi_safi", "import_policy", "export_policy", "multipath", "extra_attributes"]
+
+
+class DesiredPeerGroupSerializer(NestedRecordSerializerMixin, PeerGroupSerializer):
+    """A peer group of the desired state of a routing instance, with its address families."""
+
+    address_families = DesiredPeerGroupAddressFamilySerializer(many=True, required=False)
+
+    class Meta:
+        model = models.PeerGroup
+        fields = [
+            "name",
+            "vrf",
+            "description",
+            "enabled",
+            "role",
+            "autonomous_system",
+            "peergroup_template",
+            "source_ip",
+            "source_interface",
+            "secret",
+            "extra_attributes",
+            "address_families",
+        ]
+
+
+class DesiredPeeringSerializer(NestedRecordSerializerMixin, PeeringSerializer):
+    """The peering of a peer endpoint of the desired state of a routing instance."""
+
+    class Meta:
+        model = models.Peering
+        fields = ["status"]
+
+
+class DesiredPeerEndpointSerializer(PeeringEndpointSerializer):
+    """A peer endpoint of the desired state of a routing instance, with its address families, peer and peering.
+
+    The peer group is given by name, as it may be created along with the endpoint.
+    """
+
+    peer_group = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    address_families = DesiredPeerEndpointAddressFamilySerializer(many=True, required=False)
+    peer = PeeringEndpointSerializer()
+    peering = DesiredPeeringSerializer()
+
+    class Meta:
+        model = models.PeerEndpoint
+        fields = [
+            "description",
+            "enabled",
+            "role",
+            "autonomous_system",
+            "peer_group",
+            "source_ip",
+            "source_interface",
+            "secret",
+            "extra_attributes",
+            "address_families",
+            "peer",
+            "peering",
+        ]
+
+
+class RoutingInstanceDesiredStateSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    """The desired BGP configuration of a routing instance, reconciled by the `reconcile` action of its API.
+
+    Sections left out are not reconciled. The objects referenced by PK are loaded upfront, with one query per model.
+    """
+
+    extra_attributes = serializers.JSONField(required=False, allow_null=True)
+    address_families = DesiredAddressFamilySerializer(many=True, required=False)
+    peer_groups = DesiredPeerGroupSerializer(many=True, required=False)
+    endpoints = DesiredPeerEndpointSerializer(many=True, required=False)
+
+    preloaded_objects = None
+
+    def to_internal_value(self, data):
+        """Validate the desired state."""
+        if isinstance(data, dict):
+            self.preloaded_objects = preload_related_objects(self, [data])
+        return super().to_internal_value(data)
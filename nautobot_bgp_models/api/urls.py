@@ -1,5 +1,6 @@
 """REST API URL registration for nautobot_bgp_models."""
 
+from django.urls import path
 from nautobot.apps.api import OrderedDefaultRouter
 
 from . import views
@@ -18,4 +19,16 @@ router.register("peer-group-address-families", views.PeerGroupAddressFamilyViewS
 router.register("peer-endpoint-address-families", views.PeerEndpointAddressFamilyViewSet)
 router.register("routing-instances", views.BGPRoutingInstanceViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "devices/effective-config/",
+        views.DeviceEffectiveConfigExportView.as_view(),
+        name="device-effective-config-export",
+    ),
+    path(
+        "devices/<uuid:pk>/effective-config/",
+        views.DeviceEffectiveConfigView.as_view(),
+        name="device-effective-config",
+    ),
+]
+urlpatterns += router.urls
@@ -1,13 +1,31 @@
 """REST API viewsets for nautobot_bgp_models."""
 
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from nautobot.apps.api import NautobotModelViewSet
+from nautobot.core.settings_funcs import is_truthy
+from nautobot.core.utils.config import get_settings_or_config
+from nautobot.dcim.filters import DeviceFilterSet
+from nautobot.dcim.models import Device
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 from nautobot_bgp_models import filters
 from nautobot_bgp_models import models
 from nautobot_bgp_models.api.filter_backends import IncludeInheritedFilterBackend
+from nautobot_bgp_models.api.reconcile import ACTIONS, Reconciler
+from nautobot_bgp_models.api.renderers import NDJSONRenderer
+from nautobot_bgp_models.effective_config import get_effective_config, get_etag, iter_effective_configs, to_ndjson
 from . import serializers
 
 
@@ -18,6 +36,66 @@ class BGPRoutingInstanceViewSet(NautobotModelViewSet):
     serializer_class = serializers.BGPRoutingInstanceSerializer
     filterset_class = filters.BGPRoutingInstanceFilterSet
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="dry_run",
+                required=False,
+                location=OpenApiParameter.QUERY,
+                description="Only return the changes, without applying them",
+                type=OpenApiTypes.BOOL,
+            ),
+        ],
+        request=serializers.RoutingInstanceDesiredStateSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(detail=True, name="Reconcile", url_path="reconcile", methods=["put"], filterset_class=None)
+    def reconcile(self, request, pk=None):
+        """
+        Reconcile the BGP configuration of a routing instance with its desired state, in one transaction.
+
+        The desired state lists the address families, peer groups (with their address families) and sessions of the
+        routing instance; a session is an endpoint of the routing instance, with its address families, its peer and
+        its peering. Records are matched on their natural keys: each section given replaces the matching records,
+        creating, updating and deleting only what differs, and sections left out are left untouched. The changes are
+        returned; with `dry_run`, they are only computed.
+        """
+        routing_instance = get_object_or_404(
+            models.BGPRoutingInstance.objects.restrict(request.user, "change").select_related(
+                "device", "autonomous_system", "status"
+            ),
+            pk=pk,
+        )
+        serializer = serializers.RoutingInstanceDesiredStateSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        reconciler = Reconciler(routing_instance, serializer.validated_data)
+        changes = reconciler.plan()
+        dry_run = is_truthy(request.query_params.get("dry_run", False))
+
+        if not dry_run:
+            pks = {}
+            for change in changes:
+                model = type(change.instance)
+                action_name = ACTIONS[change.action]
+                if not request.user.has_perm(f"{model._meta.app_label}.{action_name}_{model._meta.model_name}"):
+                    raise PermissionDenied()
+                pks.setdefault((model, action_name), set()).add(change.instance.pk)
+
+            def check_constraints(action_names):
+                # Enforce the constraints of object permissions, as Nautobot does for the objects saved one by one
+                for (model, action_name), model_pks in pks.items():
+                    if action_name in action_names:
+                        queryset = model.objects.filter(pk__in=model_pks)
+                        if queryset.restrict(request.user, action_name).count() != len(model_pks):
+                            raise PermissionDenied()
+
+            check_constraints(("change", "delete"))
+            with transaction.atomic():
+                reconciler.apply()
+                check_constraints(("add", "change"))
+
+        return Response({"dry_run": dry_run, "changes": [change.as_dict(applied=not dry_run) for change in changes]})
+
 
 class AutonomousSystemViewSet(NautobotModelViewSet):
     """REST API viewset for AutonomousSystem records."""
@@ -34,6 +112,158 @@ class AutonomousSystemRangeViewSet(NautobotModelViewSet):
     serializer_class = serializers.AutonomousSystemRangeSerializer
     filterset_class = filters.AutonomousSystemRangeFilterSet
 
+    @extend_schema(methods=["get"], responses={200: serializers.AvailableASNSerializer(many=True)})
+    @extend_schema(
+        methods=["post"],
+        responses={201: serializers.AutonomousSystemSerializer(many=True)},
+        request=serializers.AutonomousSystemSerializer(many=True),
+    )
+    @action(
+        detail=True,
+        name="Available ASNs",
+        url_path="available-asns",
+        methods=["get", "post"],
+        queryset=models.AutonomousSystem.objects.all(),
+        filterset_class=None,
+    )
+    def available_asns(self, request, pk=None):
+        """
+        A convenience method for listing and allocating available ASNs within a range.
+
+        A GET returns the first available ASNs; as with Nautobot's available-ips endpoint, their number defaults to
+        PAGINATE_COUNT, and an arbitrary `limit` (up to MAX_PAGE_SIZE, if set) may be passed, without pagination.
+
+        A POST of one AutonomousSystem (or a list of them), without `asn`, allocates as many ASNs in one transaction.
+        The rows of the range and of any range overlapping it are locked for the duration of the transaction, so that
+        concurrent allocations are serialized instead of picking the same ASNs.
+        """
+        asn_range = get_object_or_404(models.AutonomousSystemRange.objects.restrict(request.user), pk=pk)
+
+        if request.method == "POST":
+            # Normalize to a list of objects, rejecting anything else as the serializer would
+            requested_asns = request.data if isinstance(request.data, list) else [request.data]
+            errors = [
+                (
+                    {}
+                    if isinstance(requested_asn, dict)
+                    else {
+                        api_settings.NON_FIELD_ERRORS_KEY: [
+                            f"Invalid data. Expected a dictionary, but got {type(requested_asn).__name__}."
+                        ]
+                    }
+                )
+                for requested_asn in requested_asns
+            ]
+            if any(errors):
+                raise ValidationError(errors if isinstance(request.data, list) else errors[0])
+
+            with transaction.atomic():
+                # Lock in a consistent order to avoid deadlocks between overlapping ranges
+                list(
+                    models.AutonomousSystemRange.objects.select_for_update()
+                    .filter(asn_min__lte=asn_range.asn_max, asn_max__gte=asn_range.asn_min)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                )
+
+                # Determine if the requested number of ASNs is available
+                available_asns = asn_range.get_available_asns(count=len(requested_asns))
+                if len(available_asns) < len(requested_asns):
+                    return Response(
+                        {
+                            "detail": (
+                                f"An insufficient number of ASNs are available within the range {asn_range} "
+                                f"({len(requested_asns)} requested, {len(available_asns)} available)"
+                            )
+                        },
+                        status=status.HTTP_204_NO_CONTENT,
+                    )
+
+                for requested_asn, asn in zip(requested_asns, available_asns):
+                    requested_asn["asn"] = asn
+
+                # Initialize the serializer with a list or a single object depending on what was requested
+                context = {"request": request, "depth": 0}
+                if isinstance(request.data, list):
+                    serializer = serializers.AutonomousSystemSerializer(data=requested_asns, many=True, context=context)
+                else:
+                    serializer = serializers.AutonomousSystemSerializer(data=requested_asns[0], context=context)
+
+                # Create the new AutonomousSystem(s)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        # Determine the maximum number of ASNs to return
+        try:
+            limit = int(request.query_params.get("limit", get_settings_or_config("PAGINATE_COUNT")))
+        except ValueError:
+            limit = get_settings_or_config("PAGINATE_COUNT")
+        if get_settings_or_config("MAX_PAGE_SIZE"):
+            limit = min(limit, get_settings_or_config("MAX_PAGE_SIZE"))
+        limit = max(limit, 0)
+
+        serializer = serializers.AvailableASNSerializer(asn_range.get_available_asns(count=limit), many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="after",
+                required=False,
+                location=OpenApiParameter.QUERY,
+                description="Only return the rows starting after this ASN (the `asn` of the last row of a page)",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="limit",
+                required=False,
+                location=OpenApiParameter.QUERY,
+                description="Number of rows to return per page",
+                type=OpenApiTypes.INT,
+            ),
+        ],
+        responses={200: serializers.ASNAllocationSerializer(many=True)},
+    )
+    @action(
+        detail=True,
+        name="ASN Allocation",
+        url_path="asn-allocation",
+        methods=["get"],
+        queryset=models.AutonomousSystem.objects.all(),
+        filterset_class=None,
+    )
+    def asn_allocation(self, request, pk=None):
+        """
+        List the allocated ASNs of a range, interleaved with the blocks of available ASNs between them.
+
+        Results are paginated on the ASN number (keyset pagination): the `next` URL asks for the rows starting after
+        the `asn` of the last row of the page, so that every page costs the same whatever the size of the range.
+        """
+        asn_range = get_object_or_404(models.AutonomousSystemRange.objects.restrict(request.user), pk=pk)
+
+        try:
+            limit = int(request.query_params.get("limit", get_settings_or_config("PAGINATE_COUNT")))
+        except ValueError:
+            limit = get_settings_or_config("PAGINATE_COUNT")
+        if get_settings_or_config("MAX_PAGE_SIZE"):
+            limit = min(limit, get_settings_or_config("MAX_PAGE_SIZE"))
+        limit = max(limit, 1)
+        try:
+            after = int(request.query_params["after"])
+        except (KeyError, ValueError):
+            after = None
+
+        rows = asn_range.get_asns_with_gaps(after=after, limit=limit + 1)
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_asn = rows[-1]["asn"] if isinstance(rows[-1], dict) else rows[-1].asn
+            next_url = replace_query_param(request.build_absolute_uri(), "after", last_asn)
+
+        serializer = serializers.ASNAllocationSerializer(rows, many=True, context={"request": request})
+        return Response({"next": next_url, "results": serializer.data})
+
 
 include_inherited = OpenApiParameter(
     name="include_inherited",
@@ -47,6 +277,15 @@ include_inherited = OpenApiParameter(
 class InheritableFieldsViewSetMixin:
     """Common mixin for ViewSets that support an additional `include_inherited` query parameter."""
 
+    def get_queryset(self):
+        """Load the inheritance ancestors of the whole page up front when `include_inherited` is requested."""
+        queryset = super().get_queryset()
+        if is_truthy(self.request.query_params.get("include_inherited", False)) and hasattr(
+            queryset, "prefetch_inherited"
+        ):
+            queryset = queryset.prefetch_inherited()
+        return queryset
+
     @extend_schema(parameters=[include_inherited])
     def list(self, request):
         """List all objects of this type."""
@@ -61,7 +300,7 @@ class InheritableFieldsViewSetMixin:
 class PeerGroupViewSet(InheritableFieldsViewSetMixin, NautobotModelViewSet):
     """REST API viewset for PeerGroup records."""
 
-    queryset = models.PeerGroup.objects.all()
+    queryset = models.PeerGroup.objects.select_related("routing_instance__device", "vrf").prefetch_related("tags")
     serializer_class = serializers.PeerGroupSerializer
     filter_backends = [IncludeInheritedFilterBackend, OrderingFilter]
     filterset_class = filters.PeerGroupFilterSet
@@ -78,7 +317,11 @@ class PeerGroupTemplateViewSet(InheritableFieldsViewSetMixin, NautobotModelViewS
 class PeerEndpointViewSet(InheritableFieldsViewSetMixin, NautobotModelViewSet):
     """REST API viewset for PeerEndpoint records."""
 
-    queryset = models.PeerEndpoint.objects.all()
+    queryset = (
+        models.PeerEndpoint.objects.with_local_ip()
+        .select_related("routing_instance__device", "source_ip", "peer_group__source_ip")
+        .prefetch_related("tags")
+    )
     serializer_class = serializers.PeerEndpointSerializer
     filter_backends = [IncludeInheritedFilterBackend, OrderingFilter]
     filterset_class = filters.PeerEndpointFilterSet
@@ -87,10 +330,90 @@ class PeerEndpointViewSet(InheritableFieldsViewSetMixin, NautobotModelViewSet):
 class PeeringViewSet(NautobotModelViewSet):
     """REST API viewset for Peering records."""
 
-    queryset = models.Peering.objects.all()
+    queryset = models.Peering.objects.prefetch_endpoints().with_endpoint_details()
     serializer_class = serializers.PeeringSerializer
     filterset_class = filters.PeeringFilterSet
 
+    @extend_schema(
+        request=serializers.PeeringBulkCreateSerializer(many=True),
+        responses={201: serializers.PeeringSerializer(many=True)},
+    )
+    @action(detail=False, name="Bulk Create", url_path="bulk-create", methods=["post"], filterset_class=None)
+    def bulk_create(self, request):
+        """
+        Create a list of peerings, each with its A and Z endpoints, in one transaction.
+
+        Each record is validated as a whole, as in the peering creation form; if any record is invalid, nothing is
+        created and a list of the errors of each record is returned. The records are then created in bulk, with their
+        `peer` set, which makes this much faster than creating the peerings and endpoints one by one.
+        """
+        if not request.user.has_perms(["nautobot_bgp_models.add_peering", "nautobot_bgp_models.add_peerendpoint"]):
+            raise PermissionDenied()
+        serializer = serializers.PeeringBulkCreateSerializer(data=request.data, many=True, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            peerings = serializer.save()
+            peering_pks = [peering.pk for peering in peerings]
+            # Enforce the constraints of object permissions, as Nautobot does for the objects created one by one
+            for created in (
+                models.Peering.objects.filter(pk__in=peering_pks),
+                models.PeerEndpoint.objects.filter(peering__in=peering_pks),
+            ):
+                if created.restrict(request.user, "add").count() != created.count():
+                    raise PermissionDenied()
+
+        queryset = self.queryset.filter(pk__in=peering_pks)
+        return Response(
+            serializers.PeeringSerializer(queryset, many=True, context={"request": request}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        request=serializers.PeeringUpsertSerializer(many=True),
+        responses={200: serializers.PeeringSerializer(many=True)},
+    )
+    @action(detail=False, name="Upsert", url_path="upsert", methods=["put"], filterset_class=None)
+    def upsert(self, request):
+        """
+        Create or update a list of peerings, each with its A and Z endpoints, in one transaction.
+
+        Records are given as for `bulk-create`, and are matched to the existing peerings by the device, local IP and
+        VRF of their endpoints, without their IDs: matching peerings are updated to the given values, the others are
+        created. Sending the same records again doesn't change anything. The peerings are returned in the order of
+        the records.
+        """
+        serializer = serializers.PeeringUpsertSerializer(data=request.data, many=True, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        actions = {"change" if item["peering_pk"] else "add" for item in serializer.validated_data}
+        for action_name in actions:
+            for model_name in ("peering", "peerendpoint"):
+                if not request.user.has_perm(f"nautobot_bgp_models.{action_name}_{model_name}"):
+                    raise PermissionDenied()
+
+        with transaction.atomic():
+            peerings = serializer.save()
+            peering_pks = [peering.pk for peering in peerings]
+            # Enforce the constraints of object permissions on the peerings and endpoints created or updated
+            for action_name in actions:
+                pks = [
+                    item["peering_pk"] or item["peering"].pk
+                    for item in serializer.validated_data
+                    if ("change" if item["peering_pk"] else "add") == action_name
+                ]
+                for queryset in (
+                    models.Peering.objects.filter(pk__in=pks),
+                    models.PeerEndpoint.objects.filter(peering__in=pks),
+                ):
+                    if queryset.restrict(request.user, action_name).count() != queryset.count():
+                        raise PermissionDenied()
+
+        peerings_by_pk = self.queryset.filter(pk__in=peering_pks).in_bulk()
+        return Response(
+            serializers.PeeringSerializer(
+                [peerings_by_pk[pk] for pk in peering_pks], many=True, context={"request": request}
+            ).data
+        )
+
 
 class AddressFamilyViewSet(InheritableFieldsViewSetMixin, NautobotModelViewSet):
     """REST API viewset for AddressFamily records."""
@@ -114,3 +437,45 @@ class PeerEndpointAddressFamilyViewSet(InheritableFieldsViewSetMixin, NautobotMo
     queryset = models.PeerEndpointAddressFamily.objects.all()
     serializer_class = serializers.PeerEndpointAddressFamilySerializer
     filterset_class = filters.PeerEndpointAddressFamilyFilterSet
+
+
+class DeviceEffectiveConfigView(GenericAPIView):
+    """REST API view of the effective BGP configuration of a device.
+
+    The response is the tree of the device's routing instances, address families, peer groups and peer endpoints, with
+    inherited values and merged extra attributes, built with a fixed number of queries. It carries an `ETag` header, and
+    a request whose `If-None-Match` header matches it gets an empty `304` response instead.
+    """
+
+    queryset = Device.objects.all()
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT, 304: None})
+    def get(self, request, pk):
+        """Return the effective BGP configuration of the device."""
+        device = get_object_or_404(self.get_queryset().restrict(request.user, "view"), pk=pk)
+        config = get_effective_config(device, user=request.user)
+        etag = get_etag(config)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        return Response(config, headers={"ETag": etag})
+
+
+class DeviceEffectiveConfigExportView(GenericAPIView):
+    """REST API view streaming the effective BGP configuration of many devices, as NDJSON.
+
+    Each line of the response is the effective configuration of one device, as returned by `DeviceEffectiveConfigView`.
+    Devices can be selected with the same filters as the device list of the DCIM API. They are resolved in chunks, so
+    that the response starts right away and memory use doesn't grow with the number of devices.
+    """
+
+    queryset = Device.objects.all()
+    filterset_class = DeviceFilterSet
+    renderer_classes = [NDJSONRenderer]
+
+    @extend_schema(responses={(200, NDJSONRenderer.media_type): OpenApiTypes.OBJECT})
+    def get(self, request):
+        """Stream the effective BGP configuration of the devices matching the filters."""
+        devices = self.filter_queryset(self.get_queryset().restrict(request.user, "view"))
+        lines = (to_ndjson(config) for config in iter_effective_configs(devices, user=request.user))
+        return StreamingHttpResponse(lines, content_type=NDJSONRenderer.media_type)
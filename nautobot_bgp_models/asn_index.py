@@ -0,0 +1,378 @@
+"""In-process index of allocated ASNs for nautobot_bgp_models."""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+# Containers holding up to this many values are stored as sorted arrays, larger ones as 65536-bit bitmaps
+ARRAY_CONTAINER_MAX = 4096
+CONTAINER_SIZE = 1 << 16
+
+
+def _popcount(value):
+    """Return the number of bits set in the non-negative integer `value`."""
+    return bin(value).count("1")
+
+
+class _ArrayContainer:
+    """Sorted array of the low 16 bits of the values sharing the same high 16 bits."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values=()):
+        self.values = array("H", values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, low):
+        index = bisect_left(self.values, low)
+        return index < len(self.values) and self.values[index] == low
+
+    def add(self, low):
+        """Add `low`, returning whether it wasn't present yet."""
+        index = bisect_left(self.values, low)
+        if index < len(self.values) and self.values[index] == low:
+            return False
+        self.values.insert(index, low)
+        return True
+
+    def discard(self, low):
+        """Remove `low`, returning whether it was present."""
+        index = bisect_left(self.values, low)
+        if index < len(self.values) and self.values[index] == low:
+            del self.values[index]
+            return True
+        return False
+
+    def count(self, low_first, low_last):
+        """Return the number of values between `low_first` and `low_last` included."""
+        return bisect_right(self.values, low_last) - bisect_left(self.values, low_first)
+
+    def runs(self, low_first, low_last):
+        """Yield the `(first, last)` bounds of each run of consecutive values between `low_first` and `low_last`."""
+        start = end = None
+        for index in range(bisect_left(self.values, low_first), bisect_right(self.values, low_last)):
+            value = self.values[index]
+            if end is not None and value == end + 1:
+                end = value
+                continue
+            if end is not None:
+                yield (start, end)
+            start = end = value
+        if end is not None:
+            yield (start, end)
+
+    def to_bitmap(self):
+        """Return a `_BitmapContainer` holding the same values."""
+        return _BitmapContainer.from_values(self.values)
+
+
+class _BitmapContainer:
+    """65536-bit bitmap of the low 16 bits of the values sharing the same high 16 bits."""
+
+    __slots__ = ("bits", "cardinality")
+
+    def __init__(self, bits=0, cardinality=0):
+        self.bits = bits
+        self.cardinality = cardinality
+
+    @classmethod
+    def from_values(cls, values):
+        """Build a bitmap from an iterable of distinct low 16 bits values."""
+        buffer = bytearray(CONTAINER_SIZE // 8)
+        cardinality = 0
+        for value in values:
+            buffer[value >> 3] |= 1 << (value & 7)
+            cardinality += 1
+        return cls(int.from_bytes(buffer, "little"), cardinality)
+
+    def __len__(self):
+        return self.cardinality
+
+    def __contains__(self, low):
+        return bool(self.bits >> low & 1)
+
+    def add(self, low):
+        """Add `low`, returning whether it wasn't present yet."""
+        if self.bits >> low & 1:
+            return False
+        self.bits |= 1 << low
+        self.cardinality += 1
+        return True
+
+    def discard(self, low):
+        """Remove `low`, returning whether it was present."""
+        if not self.bits >> low & 1:
+            return False
+        self.bits &= ~(1 << low)
+        self.cardinality -= 1
+        return True
+
+    def count(self, low_first, low_last):
+        """Return the number of values between `low_first` and `low_last` included."""
+        if low_first == 0 and low_last == CONTAINER_SIZE - 1:
+            return self.cardinality
+        return _popcount((self.bits >> low_first) & ((1 << (low_last - low_first + 1)) - 1))
+
+    def runs(self, low_first, low_last):
+        """Yield the `(first, last)` bounds of each run of consecutive values between `low_first` and `low_last`.
+
+        Runs are found with bit operations, so a dense bitmap is walked in as many steps as it has runs.
+        """
+        bits = (self.bits >> low_first) & ((1 << (low_last - low_first + 1)) - 1)
+        offset = low_first
+        while bits:
+            zeros = (bits & -bits).bit_length() - 1
+            bits >>= zeros
+            offset += zeros
+            ones = (bits ^ (bits + 1)).bit_length() - 1
+            yield (offset, offset + ones - 1)
+            bits >>= ones
+            offset += ones
+
+    def to_array(self):
+        """Return an `_ArrayContainer` holding the same values."""
+        values = []
+        for first, last in self.runs(0, CONTAINER_SIZE - 1):
+            values.extend(range(first, last + 1))
+        return _ArrayContainer(values)
+
+
+class ASNBitmap:
+    """Compressed bitmap of 32-bit ASN numbers, in the spirit of Roaring bitmaps.
+
+    Values are split on their high 16 bits into containers holding their low 16 bits, either as a sorted array (2
+    bytes per value) when sparse, or as a 65536-bit bitmap (8 KiB) when dense. Counting the values of an interval
+    only looks at the containers it overlaps, and entire containers are counted in constant time.
+    """
+
+    def __init__(self, values=()):
+        """Initialize the bitmap with an iterable of ASN numbers, preferably in ascending order."""
+        self._containers = {}
+        self._keys = []
+        self._cardinality = 0
+        self.update(values)
+
+    def __len__(self):
+        return self._cardinality
+
+    def __contains__(self, value):
+        container = self._containers.get(value >> 16)
+        return container is not None and (value & 0xFFFF) in container
+
+    def __iter__(self):
+        for first, last in self.runs(0, (1 << 32) - 1):
+            yield from range(first, last + 1)
+
+    def update(self, values):
+        """Add every value of `values`; consecutive values with the same high 16 bits are added in bulk."""
+        key, lows = None, []
+        for value in values:
+            if value >> 16 != key:
+                self._add_many(key, lows)
+                key, lows = value >> 16, []
+            lows.append(value & 0xFFFF)
+        self._add_many(key, lows)
+
+    def _add_many(self, key, lows):
+        """Add the low 16 bits values `lows` to the container `key`."""
+        if not lows:
+            return
+        container = self._containers.get(key)
+        if container is None and len(set(lows)) == len(lows):
+            lows.sort()
+            container = (
+                _ArrayContainer(lows) if len(lows) <= ARRAY_CONTAINER_MAX else _BitmapContainer.from_values(lows)
+            )
+            self._containers[key] = container
+            self._keys.insert(bisect_left(self._keys, key), key)
+            self._cardinality += len(container)
+            return
+        for low in lows:
+            self.add((key << 16) | low)
+
+    def add(self, value):
+        """Add `value`, returning whether it wasn't present yet."""
+        key = value >> 16
+        container = self._containers.get(key)
+        if container is None:
+            container = self._containers[key] = _ArrayContainer()
+            self._keys.insert(bisect_left(self._keys, key), key)
+        if not container.add(value & 0xFFFF):
+            return False
+        self._cardinality += 1
+        if isinstance(container, _ArrayContainer) and len(container) > ARRAY_CONTAINER_MAX:
+            self._containers[key] = container.to_bitmap()
+        return True
+
+    def discard(self, value):
+        """Remove `value`, returning whether it was present."""
+        key = value >> 16
+        container = self._containers.get(key)
+        if container is None or not container.discard(value & 0xFFFF):
+            return False
+        self._cardinality -= 1
+        if not container:
+            del self._containers[key]
+            del self._keys[bisect_left(self._keys, key)]
+        elif isinstance(container, _BitmapContainer) and len(container) <= ARRAY_CONTAINER_MAX // 2:
+            self._containers[key] = container.to_array()
+        return True
+
+    def _overlapping(self, first, last):
+        """Yield `(key, low_first, low_last)` for each container holding values between `first` and `last`."""
+        first_key, last_key = first >> 16, last >> 16
+        for index in range(bisect_left(self._keys, first_key), bisect_right(self._keys, last_key)):
+            key = self._keys[index]
+            low_first = first & 0xFFFF if key == first_key else 0
+            low_last = last & 0xFFFF if key == last_key else CONTAINER_SIZE - 1
+            yield key, low_first, low_last
+
+    def count(self, first, last):
+        """Return the number of values between `first` and `last` included."""
+        return sum(
+            self._containers[key].count(low_first, low_last)
+            for key, low_first, low_last in self._overlapping(first, last)
+        )
+
+    def runs(self, first, last):
+        """Yield the `(first, last)` bounds of each run of consecutive values between `first` and `last`."""
+        start = end = None
+        for key, low_first, low_last in self._overlapping(first, last):
+            base = key << 16
+            for run_first, run_last in self._containers[key].runs(low_first, low_last):
+                run_first, run_last = base + run_first, base + run_last
+                if end is not None and run_first == end + 1:
+                    end = run_last
+                    continue
+                if end is not None:
+                    yield (start, end)
+                start, end = run_first, run_last
+        if end is not None:
+            yield (start, end)
+
+    def gaps(self, first, last):
+        """Yield the `(first, last)` bounds of each block of values absent from the bitmap between `first` and `last`."""
+        previous = first - 1
+        for run_first, run_last in self.runs(first, last):
+            if run_first > previous + 1:
+                yield (previous + 1, run_first - 1)
+            previous = run_last
+        if previous < last:
+            yield (previous + 1, last)
+
+
+class AllocatedASNIndex:
+    """Index of the ASN numbers of all AutonomousSystem records, held in an `ASNBitmap`.
+
+    The bitmap is loaded from the database on first use, then kept up to date by post_save/post_delete signal handlers
+    as changes are committed in this process. Changes made by other processes are detected by comparing the number of
+    records and their latest `last_updated` timestamp with the database, at most every `refresh_interval` seconds, in
+    which case the bitmap is loaded again.
+    """
+
+    def __init__(self, refresh_interval=5):
+        """Initialize the index; it is only loaded from the database on first use."""
+        self.refresh_interval = refresh_interval
+        self._bitmap = None
+        self._fingerprint = None
+        self._checked = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _get_fingerprint():
+        """Return the `(count, latest last_updated)` of the AutonomousSystem records in the database."""
+        from nautobot_bgp_models.models import AutonomousSystem  # pylint: disable=import-outside-toplevel
+
+        result = AutonomousSystem.objects.aggregate(count=Count("pk"), last_updated=Max("last_updated"))
+        return (result["count"], result["last_updated"])
+
+    def _load(self):
+        """Load the bitmap from the database; the caller must hold the lock."""
+        from nautobot_bgp_models.models import AutonomousSystem  # pylint: disable=import-outside-toplevel
+
+        self._fingerprint = self._get_fingerprint()
+        self._bitmap = ASNBitmap(
+            AutonomousSystem.objects.order_by("asn").values_list("asn", flat=True).iterator(chunk_size=10000)
+        )
+        self._checked = time.monotonic()
+
+    def _get_bitmap(self):
+        """Return the bitmap, loading it again if it is missing or out of date; the caller must hold the lock."""
+        if self._bitmap is None or self._fingerprint is None:
+            self._load()
+        elif time.monotonic() - self._checked >= self.refresh_interval:
+            if self._get_fingerprint() != self._fingerprint:
+                self._load()
+            else:
+                self._checked = time.monotonic()
+        return self._bitmap
+
+    def count(self, first, last):
+        """Return the number of allocated ASNs between `first` and `last` included."""
+        with self._lock:
+            return self._get_bitmap().count(first, last)
+
+    def gaps(self, first, last):
+        """Return the `(first, last)` bounds of each block of available ASNs between `first` and `last`."""
+        with self._lock:
+            return list(self._get_bitmap().gaps(first, last))
+
+    def largest_gap(self, first, last):
+        """Return the bounds of the largest (and earliest) block of available ASNs between `first` and `last`."""
+        largest = None
+        with self._lock:
+            for gap in self._get_bitmap().gaps(first, last):
+                if largest is None or gap[1] - gap[0] > largest[1] - largest[0]:
+                    largest = gap
+        return largest
+
+    def first_gap(self, first, last, size=1):
+        """Return the bounds of the first block of at least `size` available ASNs between `first` and `last`."""
+        with self._lock:
+            for gap in self._get_bitmap().gaps(first, last):
+                if gap[1] - gap[0] + 1 >= size:
+                    return gap
+        return None
+
+    def record_save(self, asn, last_updated, created):
+        """Apply the committed creation or update of an AutonomousSystem."""
+        with self._lock:
+            if self._bitmap is None or self._fingerprint is None:
+                return
+            count, latest = self._fingerprint
+            latest = max(latest, last_updated) if latest is not None else last_updated
+            if created:
+                self._bitmap.add(asn)
+                self._fingerprint = (count + 1, latest)
+            elif asn in self._bitmap:
+                self._fingerprint = (count, latest)
+            else:
+                # The ASN number was changed, and the former one is unknown
+                self._fingerprint = None
+
+    def record_delete(self, asn, last_updated):
+        """Apply the committed deletion of an AutonomousSystem."""
+        with self._lock:
+            if self._bitmap is None or self._fingerprint is None:
+                return
+            self._bitmap.discard(asn)
+            count, latest = self._fingerprint
+            # The latest last_updated of the remaining records is unknown if this record was the latest one
+            self._fingerprint = (count - 1, latest) if latest is not None and last_updated < latest else None
+
+    def clear(self):
+        """Drop the bitmap, so that it is loaded again on next use."""
+        with self._lock:
+            self._bitmap = None
+            self._fingerprint = None
+
+
+allocated_asn_index = AllocatedASNIndex(
+    **settings.PLUGINS_CONFIG.get("nautobot_bgp_models", {}).get("allocated_asn_index", {})
+)
@@ -0,0 +1,143 @@
+"""Caching of resolved extra attributes for nautobot_bgp_models."""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ExtraAttributesCache:
+    """Cache of `BGPExtraAttributesMixin.get_extra_attributes()` results.
+
+    Entries are kept in a per-process LRU and, when `cache_alias` is set, in the corresponding Django cache (typically
+    Redis) so that they are shared between processes. Keys are built from the object itself and every ancestor it
+    inherits extra attributes from, including their `last_updated` timestamps: saving any object of the chain yields
+    a new key. In addition, `invalidate()` (wired to post_save/post_delete) evicts the per-process entries depending
+    on a given object right away.
+
+    Unsaved objects are never cached, and neither are objects whose `extra_attributes` were changed in memory and not
+    saved yet (as told by `FieldSnapshotMixin.has_changed()`), nor the objects inheriting from them.
+    """
+
+    key_prefix = "nautobot_bgp_models.extra_attributes"
+
+    def __init__(self, enabled=True, max_entries=10000, cache_alias=None, timeout=300):
+        """Initialize the cache; `cache_alias` is the name of an entry of the `CACHES` setting."""
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._dependents = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _layer_key(obj):
+        """Return the part of the key identifying `obj`, or None if it can't be cached."""
+        last_updated = getattr(obj, "last_updated", None)
+        if obj.pk is None or last_updated is None:
+            return None
+        has_changed = getattr(obj, "has_changed", None)
+        if has_changed is not None and has_changed("extra_attributes"):
+            return None
+        return (obj._meta.label_lower, str(obj.pk), last_updated.isoformat())
+
+    def make_key(self, instance, ancestors):
+        """Return the key of `instance` resolved over `ancestors`, or None if it can't be cached."""
+        key = []
+        for obj in [*ancestors, instance]:
+            layer_key = self._layer_key(obj)
+            if layer_key is None:
+                return None
+            key.append(layer_key)
+        return tuple(key)
+
+    def _shared_key(self, key):
+        """Return the Django cache key matching the per-process `key`."""
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return f"{self.key_prefix}.{digest}"
+
+    def get_or_compute(self, instance, ancestors, compute):
+        """Return the extra attributes of `instance`, calling `compute()` on a cache miss.
+
+        A copy of the cached value is returned, so that callers are free to modify it.
+        """
+        key = self.make_key(instance, ancestors) if self.enabled else None
+        if key is None:
+            return compute()
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+
+        if self.cache_alias:
+            value = caches[self.cache_alias].get(self._shared_key(key))
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if value is None:
+            value = compute()
+            if self.cache_alias:
+                caches[self.cache_alias].set(self._shared_key(key), value, self.timeout)
+
+        self._store(key, value)
+        return copy.deepcopy(value)
+
+    def _store(self, key, value):
+        """Add an entry to the per-process LRU, evicting the least recently used one if needed."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            for layer_key in key:
+                self._dependents.setdefault(layer_key[:2], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        """Remove an entry from the per-process LRU; the caller must hold the lock."""
+        self._entries.pop(key, None)
+        for layer_key in key:
+            dependents = self._dependents.get(layer_key[:2])
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[layer_key[:2]]
+
+    def invalidate(self, obj):
+        """Evict every entry depending on `obj`."""
+        with self._lock:
+            keys = list(self._dependents.get((obj._meta.label_lower, str(obj.pk)), ()))
+            for key in keys:
+                self._discard(key)
+        if self.cache_alias and keys:
+            caches[self.cache_alias].delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        """Empty the per-process cache and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return the hit/miss counters and the number of entries of the per-process cache."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+extra_attributes_cache = ExtraAttributesCache(
+    **settings.PLUGINS_CONFIG.get("nautobot_bgp_models", {}).get("extra_attributes_cache", {})
+)
@@ -0,0 +1,282 @@
+"""Resolution of the effective BGP configuration of devices.
+
+The effective configuration of a device is the tree of its routing instances, address families, peer groups and peer
+endpoints, with every inherited field and extra attribute resolved. It is built from a fixed number of bulk queries,
+whatever the number of devices and peer endpoints: the resolved configuration of the peer endpoints is read from their
+`PeerEndpointEffective` records, and everything else the inheritance walks through is prefetched up front, so that
+`get_fields()` and `get_extra_attributes()` are resolved in memory. Peer endpoints without a `PeerEndpointEffective`
+record yet are resolved from their inheritance chain instead, at the cost of a few queries each.
+"""
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from nautobot.ipam.models import IPAddress
+
+from nautobot_bgp_models import models
+
+# Lookups, from a PeerEndpoint, of the VRFs of the prefix of each IP address `local_ip` may return; they are needed to
+# find the address family of the routing instance a peer endpoint address family inherits from.
+LOCAL_IP_VRF_LOOKUPS = [
+    "source_ip__parent__vrfs",
+    "peer_group__source_ip__parent__vrfs",
+    "source_interface__ip_addresses__parent__vrfs",
+    "peer_group__source_interface__ip_addresses__parent__vrfs",
+]
+
+
+# Lookups, from a PeerEndpoint, of its PeerEndpointEffective record and of what is read from it, including the VRFs of
+# the prefix of its local IP
+EFFECTIVE_LOOKUPS = [
+    "effective__autonomous_system",
+    "effective__role",
+    "effective__source_ip",
+    "effective__source_interface",
+    "effective__local_ip__parent",
+    "effective__vrf",
+]
+
+# Number of devices resolved together by `iter_effective_configs()`
+EXPORT_CHUNK_SIZE = 100
+
+
+def _restrict(queryset, user):
+    """Restrict `queryset` to the objects `user` may view, unless `user` is None."""
+    return queryset if user is None else queryset.restrict(user, "view")
+
+
+def routing_instances_queryset(user=None):
+    """Return the BGPRoutingInstance queryset prefetching everything the effective configuration is built from."""
+    peer_endpoints = (
+        _restrict(models.PeerEndpoint.objects.all(), user)
+        .prefetch_display()
+        .select_related("peer_group__vrf", "secret", *EFFECTIVE_LOOKUPS)
+        .prefetch_related(
+            "effective__local_ip__parent__vrfs",
+            "peer_group__address_families",
+            Prefetch(
+                "address_families",
+                queryset=_restrict(models.PeerEndpointAddressFamily.objects.all(), user).order_by("afi_safi"),
+            ),
+            Prefetch(
+                "peer",
+                queryset=_restrict(models.PeerEndpoint.objects.all(), user)
+                .prefetch_display()
+                .select_related("effective__autonomous_system", "effective__local_ip"),
+            ),
+        )
+        .order_by("pk")
+    )
+    peer_groups = (
+        _restrict(models.PeerGroup.objects.all(), user)
+        .prefetch_inherited()
+        .select_related("vrf", "source_ip", "source_interface", "secret")
+        .prefetch_related(
+            Prefetch(
+                "address_families",
+                queryset=_restrict(models.PeerGroupAddressFamily.objects.all(), user).order_by("afi_safi"),
+            )
+        )
+    )
+    address_families = (
+        _restrict(models.AddressFamily.objects.all(), user).select_related("vrf").order_by("vrf__name", "afi_safi")
+    )
+    return (
+        _restrict(models.BGPRoutingInstance.objects.all(), user)
+        .select_related("device", "autonomous_system", "router_id", "status")
+        .prefetch_related(
+            Prefetch("address_families", queryset=address_families),
+            Prefetch("peer_groups", queryset=peer_groups),
+            Prefetch("endpoints", queryset=peer_endpoints),
+        )
+        .order_by("autonomous_system__asn", "pk")
+    )
+
+
+def plain_value(obj):
+    """Return the plain representation of a field value: ASNs as numbers, IP addresses as strings, objects by name."""
+    if obj is None or isinstance(obj, (str, int, bool)):
+        return obj
+    if isinstance(obj, models.AutonomousSystem):
+        return obj.asn
+    if isinstance(obj, IPAddress):
+        return str(obj.address)
+    return getattr(obj, "name", None) or str(obj)
+
+
+def _inherited_fields(instance):
+    """Return the effective value of each field of `instance` listed in `property_inheritance`."""
+    return {
+        field_name: plain_value(field["value"])
+        for field_name, field in instance.get_fields(include_inherited=True).items()
+    }
+
+
+def _stored_fields(peer_endpoint, effective):
+    """Return the effective value of each field of `peer_endpoint` listed in `property_inheritance`.
+
+    The values are read from its PeerEndpointEffective record `effective`, except for those not stored there.
+    """
+    return {
+        field_name: plain_value(
+            getattr(effective, field_name)
+            if hasattr(effective, field_name)
+            else peer_endpoint.get_inherited_field(field_name)[0]
+        )
+        for field_name in peer_endpoint.property_inheritance
+    }
+
+
+def _address_family_config(address_family):
+    """Return the effective configuration of a routing instance AddressFamily."""
+    return {
+        "id": str(address_family.pk),
+        "afi_safi": address_family.afi_safi,
+        "vrf": plain_value(address_family.vrf),
+        "extra_attributes": address_family.get_extra_attributes(),
+    }
+
+
+def _peer_group_config(peer_group):
+    """Return the effective configuration of a PeerGroup and its address families."""
+    return {
+        "id": str(peer_group.pk),
+        "name": peer_group.name,
+        "vrf": plain_value(peer_group.vrf),
+        "peergroup_template": plain_value(peer_group.peergroup_template),
+        "source_ip": plain_value(peer_group.source_ip),
+        "source_interface": plain_value(peer_group.source_interface),
+        "secret": plain_value(peer_group.secret),
+        **_inherited_fields(peer_group),
+        "extra_attributes": peer_group.get_extra_attributes(),
+        "address_families": [
+            {
+                "id": str(address_family.pk),
+                "afi_safi": address_family.afi_safi,
+                "import_policy": address_family.import_policy,
+                "export_policy": address_family.export_policy,
+                "multipath": address_family.multipath,
+                "extra_attributes": address_family.get_extra_attributes(),
+            }
+            for address_family in peer_group.address_families.all()
+        ],
+    }
+
+
+def _peer_endpoint_config(peer_endpoint):
+    """Return the effective configuration of a PeerEndpoint, its address families and its peer."""
+    effective = peer_endpoint.get_loaded_effective()
+    if effective is not None:
+        local_ip, vrf = effective.local_ip, effective.vrf
+        fields = _stored_fields(peer_endpoint, effective)
+        extra_attributes = effective.extra_attributes
+    else:
+        local_ip = peer_endpoint.local_ip
+        if peer_endpoint.peer_group is not None and peer_endpoint.peer_group.vrf is not None:
+            vrf = peer_endpoint.peer_group.vrf
+        elif local_ip is not None:
+            vrf = local_ip.parent.vrfs.all().first()
+        else:
+            vrf = None
+        fields = _inherited_fields(peer_endpoint)
+        extra_attributes = peer_endpoint.get_extra_attributes()
+
+    peer = peer_endpoint.peer
+    if peer is not None:
+        peer_device = peer.routing_instance.device if peer.routing_instance else None
+        peer_effective = peer.get_loaded_effective()
+        if peer_effective is not None:
+            asn = peer_effective.autonomous_system
+        else:
+            asn, _, _ = peer.get_inherited_field("autonomous_system")
+        peer = {
+            "id": str(peer.pk),
+            "device": plain_value(peer_device),
+            "local_ip": plain_value(peer.local_ip),
+            "autonomous_system": plain_value(asn),
+        }
+
+    return {
+        "id": str(peer_endpoint.pk),
+        "peering": str(peer_endpoint.peering_id),
+        "peer_group": plain_value(peer_endpoint.peer_group),
+        "secret": plain_value(peer_endpoint.secret),
+        "local_ip": plain_value(local_ip),
+        "vrf": plain_value(vrf),
+        **fields,
+        "extra_attributes": extra_attributes,
+        "address_families": [
+            {
+                "id": str(address_family.pk),
+                "afi_safi": address_family.afi_safi,
+                **_inherited_fields(address_family),
+                "extra_attributes": address_family.get_extra_attributes(),
+            }
+            for address_family in peer_endpoint.address_families.all()
+        ],
+        "peer": peer,
+    }
+
+
+def _routing_instance_config(routing_instance):
+    """Return the effective configuration of a BGPRoutingInstance and everything below it."""
+    return {
+        "id": str(routing_instance.pk),
+        "autonomous_system": plain_value(routing_instance.autonomous_system),
+        "router_id": plain_value(routing_instance.router_id),
+        "status": plain_value(routing_instance.status),
+        "description": routing_instance.description,
+        "extra_attributes": routing_instance.get_extra_attributes(),
+        "address_families": [_address_family_config(af) for af in routing_instance.address_families.all()],
+        "peer_groups": [_peer_group_config(peer_group) for peer_group in routing_instance.peer_groups.all()],
+        "endpoints": [_peer_endpoint_config(peer_endpoint) for peer_endpoint in routing_instance.endpoints.all()],
+    }
+
+
+def get_effective_configs(devices, user=None):
+    """Return the effective BGP configuration of each of `devices`, keyed by device PK.
+
+    When `user` is given, only the objects this user is allowed to view are included.
+    """
+    configs = {
+        device.pk: {"device": {"id": str(device.pk), "name": device.name}, "routing_instances": []}
+        for device in devices
+    }
+    for routing_instance in routing_instances_queryset(user).filter(device__in=list(configs)):
+        configs[routing_instance.device_id]["routing_instances"].append(_routing_instance_config(routing_instance))
+    return configs
+
+
+def iter_effective_configs(devices, user=None, chunk_size=None):
+    """Yield the effective BGP configuration of each device of the `devices` queryset, in PK order.
+
+    Devices are processed `chunk_size` (by default `EXPORT_CHUNK_SIZE`) at a time, each chunk being resolved with the
+    same fixed number of queries as a single device. Chunks are fetched by keyset on the PK, so that memory use doesn't
+    grow with the number of devices.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    devices = devices.order_by("pk").only("pk", "name")
+    chunk = list(devices[:chunk_size])
+    while chunk:
+        configs = get_effective_configs(chunk, user=user)
+        for device in chunk:
+            yield configs.pop(device.pk)
+        chunk = list(devices.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
+
+def get_effective_config(device, user=None):
+    """Return the effective BGP configuration of `device`."""
+    return get_effective_configs([device], user=user)[device.pk]
+
+
+def to_ndjson(config):
+    """Return `config` serialized as one line of NDJSON (newline-delimited JSON)."""
+    return json.dumps(config, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+
+
+def get_etag(config):
+    """Return a strong ETag (quoted) identifying the content of `config`."""
+    content = json.dumps(config, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    return f'"{hashlib.sha256(content.encode()).hexdigest()}"'
@@ -3,16 +3,20 @@
 
 import django_filters
 
-from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Q
+from netaddr import AddrFormatError
 
+from nautobot.circuits.models import Provider
 from nautobot.dcim.models import Device
 from nautobot.apps.filters import (
     StatusModelFilterSetMixin,
     CreatedUpdatedModelFilterSetMixin,
     CustomFieldModelFilterSetMixin,
+    MultiValueCharFilter,
 )
 from nautobot.extras.filters.mixins import RoleModelFilterSetMixin
-from nautobot.ipam.models import VRF
+from nautobot.ipam.models import VRF, IPAddress
 from nautobot.apps.filters import BaseFilterSet
 from nautobot.extras.models import Role
 
@@ -33,7 +37,7 @@ class AutonomousSystemFilterSet(
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
-        return queryset.filter(Q(asn__icontains=value) | Q(description__icontains=value)).distinct()
+        return queryset.filter(Q(asn__icontains=value) | Q(description__icontains=value))
 
     class Meta:
         model = models.AutonomousSystem
@@ -59,7 +63,7 @@ class AutonomousSystemRangeFilterSet(
 
         return queryset.filter(
             Q(name=value) | Q(asn_max__icontains=value) | Q(asn_min__icontains=value) | Q(description__icontains=value)
-        ).distinct()
+        )
 
     class Meta:
         model = models.AutonomousSystemRange
@@ -103,7 +107,7 @@ class BGPRoutingInstanceFilterSet(
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
-        return queryset.filter(Q(device__name__icontains=value)).distinct()
+        return queryset.filter(Exists(Device.objects.filter(pk=OuterRef("device"), name__icontains=value)))
 
 
 class PeerGroupFilterSet(RoleModelFilterSetMixin, BaseFilterSet):
@@ -150,7 +154,7 @@ class PeerGroupFilterSet(RoleModelFilterSetMixin, BaseFilterSet):
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
-        return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value)).distinct()
+        return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value))
 
 
 class PeerGroupTemplateFilterSet(RoleModelFilterSetMixin, BaseFilterSet):
@@ -176,7 +180,28 @@ class PeerGroupTemplateFilterSet(RoleModelFilterSetMixin, BaseFilterSet):
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
-        return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value)).distinct()
+        return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value))
+
+
+def filter_endpoints_effective_asn(endpoints, autonomous_systems):
+    """Filter the `endpoints` whose effective (inherited) autonomous system is one of `autonomous_systems` (PKs)."""
+    return endpoints.with_inherited("autonomous_system").filter(effective_autonomous_system__in=autonomous_systems)
+
+
+def filter_endpoints_local_ip(endpoints, addresses):
+    """Filter the `endpoints` whose effective local IP is one of `addresses` (host addresses, with or without mask)."""
+    try:
+        ip_addresses = IPAddress.objects.net_in(addresses)
+    except (AddrFormatError, ValidationError):
+        return endpoints.none()
+    return endpoints.with_local_ip().filter(effective_local_ip_id__in=ip_addresses.values("pk"))
+
+
+def filter_endpoints_provider(endpoints, providers):
+    """Filter the `endpoints` whose effective autonomous system belongs to one of `providers`."""
+    return filter_endpoints_effective_asn(
+        endpoints, models.AutonomousSystem.objects.filter(provider__in=providers).values("pk")
+    )
 
 
 class PeerEndpointFilterSet(RoleModelFilterSetMixin, BaseFilterSet):
@@ -213,17 +238,97 @@ class PeerEndpointFilterSet(RoleModelFilterSetMixin, BaseFilterSet):
         label="Peer Group (id)",
     )
 
+    # The filters below match the effective (inherited) configuration of the endpoints, resolved in the database
+
+    effective_asn = django_filters.ModelMultipleChoiceFilter(
+        queryset=models.AutonomousSystem.objects.all(),
+        to_field_name="asn",
+        method="filter_effective_asn",
+        label="Autonomous System Number (inherited)",
+    )
+
+    effective_enabled = django_filters.BooleanFilter(
+        method="filter_effective_enabled",
+        label="Enabled (inherited)",
+    )
+
+    effective_role = django_filters.ModelMultipleChoiceFilter(
+        queryset=Role.objects.all(),
+        to_field_name="name",
+        method="filter_effective_role",
+        label="Role (name, inherited)",
+    )
+
+    local_ip = MultiValueCharFilter(
+        method="filter_local_ip",
+        label="Local IP address (inherited)",
+    )
+
+    provider = django_filters.ModelMultipleChoiceFilter(
+        queryset=Provider.objects.all(),
+        to_field_name="name",
+        method="filter_provider",
+        label="Provider (name) of the inherited Autonomous System",
+    )
+
+    remote_asn = django_filters.ModelMultipleChoiceFilter(
+        queryset=models.AutonomousSystem.objects.all(),
+        to_field_name="asn",
+        method="filter_remote_asn",
+        label="Autonomous System Number of the peer (inherited)",
+    )
+
     class Meta:
         model = models.PeerEndpoint
         fields = ["id", "enabled"]
 
+    def filter_effective_asn(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the inherited autonomous system."""
+        if not value:
+            return queryset
+        return filter_endpoints_effective_asn(queryset, [autonomous_system.pk for autonomous_system in value])
+
+    def filter_effective_enabled(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the inherited `enabled` flag, NULL (not enabled at any level) meaning disabled."""
+        queryset = queryset.with_inherited("enabled")
+        if value:
+            return queryset.filter(effective_enabled=True)
+        return queryset.filter(effective_enabled__isnull=True)
+
+    def filter_effective_role(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the inherited role."""
+        if not value:
+            return queryset
+        return queryset.with_inherited("role").filter(effective_role__in=[role.pk for role in value])
+
+    def filter_local_ip(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the local IP, from the inherited source IP or source interface."""
+        return filter_endpoints_local_ip(queryset, value)
+
+    def filter_provider(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the provider of the inherited autonomous system."""
+        if not value:
+            return queryset
+        return filter_endpoints_provider(queryset, value)
+
+    def filter_remote_asn(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the inherited autonomous system of the peer endpoint."""
+        if not value:
+            return queryset
+        return queryset.filter(
+            peer__in=filter_endpoints_effective_asn(
+                models.PeerEndpoint.objects.all(), [autonomous_system.pk for autonomous_system in value]
+            )
+        )
+
     def search(self, queryset, name, value):  # pylint: disable=unused-argument
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
         return queryset.filter(
-            Q(routing_instance__device__name__iexact=value) | Q(description__icontains=value)
-        ).distinct()
+            Q(Exists(Device.objects.filter(pk=OuterRef("routing_instance__device"), name__iexact=value)))
+            | Q(description__icontains=value)
+        )
 
 
 class PeeringFilterSet(
@@ -234,9 +339,6 @@ class PeeringFilterSet(
 ):
     """Filtering of Peering records."""
 
-    # TODO(mzb): Add in-memory filtering for Provider, ASN, IP Address, ...
-    #  this requires to consider inheritance methods.
-
     device = django_filters.ModelMultipleChoiceFilter(
         field_name="endpoints__routing_instance__device__name",
         queryset=Device.objects.all(),
@@ -265,10 +367,57 @@ class PeeringFilterSet(
         label="Peer Endpoint Role (name)",
     )
 
+    # The filters below match peerings with at least one endpoint whose effective (inherited) configuration matches
+
+    asn = django_filters.ModelMultipleChoiceFilter(
+        queryset=models.AutonomousSystem.objects.all(),
+        to_field_name="asn",
+        method="filter_asn",
+        label="Autonomous System Number of an endpoint (inherited)",
+    )
+
+    address = MultiValueCharFilter(
+        method="filter_address",
+        label="Local IP address of an endpoint (inherited)",
+    )
+
+    provider = django_filters.ModelMultipleChoiceFilter(
+        queryset=Provider.objects.all(),
+        to_field_name="name",
+        method="filter_provider",
+        label="Provider (name) of the inherited Autonomous System of an endpoint",
+    )
+
     class Meta:
         model = models.Peering
         fields = ["id"]
 
+    @staticmethod
+    def _filter_endpoints(queryset, endpoints):
+        """Filter the peerings of `queryset` with at least one of `endpoints`."""
+        return queryset.filter(pk__in=endpoints.values("peering"))
+
+    def filter_asn(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the inherited autonomous system of the endpoints."""
+        if not value:
+            return queryset
+        return self._filter_endpoints(
+            queryset,
+            filter_endpoints_effective_asn(
+                models.PeerEndpoint.objects.all(), [autonomous_system.pk for autonomous_system in value]
+            ),
+        )
+
+    def filter_address(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the local IP of the endpoints."""
+        return self._filter_endpoints(queryset, filter_endpoints_local_ip(models.PeerEndpoint.objects.all(), value))
+
+    def filter_provider(self, queryset, name, value):  # pylint: disable=unused-argument
+        """Filter on the provider of the inherited autonomous system of the endpoints."""
+        if not value:
+            return queryset
+        return self._filter_endpoints(queryset, filter_endpoints_provider(models.PeerEndpoint.objects.all(), value))
+
 
 class AddressFamilyFilterSet(BaseFilterSet, CreatedUpdatedModelFilterSetMixin, CustomFieldModelFilterSetMixin):
     """Filtering of AddressFamily records."""
@@ -326,11 +475,10 @@ class PeerGroupAddressFamilyFilterSet(BaseFilterSet, CreatedUpdatedModelFilterSe
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
-        return queryset.filter(
-            Q(afi_safi__icontains=value)
-            | Q(peer_group__name__icontains=value)
-            | Q(peer_group__description__icontains=value)
-        ).distinct()
+        peer_groups = models.PeerGroup.objects.filter(pk=OuterRef("peer_group")).filter(
+            Q(name__icontains=value) | Q(description__icontains=value)
+        )
+        return queryset.filter(Q(afi_safi__icontains=value) | Q(Exists(peer_groups)))
 
 
 class PeerEndpointAddressFamilyFilterSet(
@@ -362,8 +510,8 @@ class PeerEndpointAddressFamilyFilterSet(
         """Free-text search method implementation."""
         if not value.strip():
             return queryset
-        return queryset.filter(
-            Q(afi_safi__icontains=value)
-            | Q(peer_endpoint__routing_instance__device__name__iexact=value)
-            | Q(peer_endpoint__description__icontains=value)
-        ).distinct()
+        peer_endpoints = models.PeerEndpoint.objects.filter(pk=OuterRef("peer_endpoint")).filter(
+            Q(Exists(Device.objects.filter(pk=OuterRef("routing_instance__device"), name__iexact=value)))
+            | Q(description__icontains=value)
+        )
+        return queryset.filter(Q(afi_safi__icontains=value) | Q(Exists(peer_endpoints)))
@@ -0,0 +1 @@
+"""GraphQL types for nautobot_bgp_models."""
@@ -0,0 +1,64 @@
+"""Per-request DataLoaders batching the resolution of BGP records and their inherited fields in GraphQL queries.
+
+GraphQL resolves the fields of each record of a list separately; the loaders below collect the keys requested by the
+resolvers of a whole query level and fetch their records with a fixed number of queries, so that the inherited fields
+of a query cost the same number of queries whatever the number of records.
+"""
+
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.effective_config import LOCAL_IP_VRF_LOOKUPS
+
+
+class InheritanceLoader(DataLoader):
+    """Load records by PK, with every object along their inheritance paths.
+
+    Inherited fields, local IP and extra attributes of the loaded records are then resolved in memory.
+    """
+
+    def __init__(self, queryset, **kwargs):
+        """Create a loader of the records of `queryset`."""
+        super().__init__(**kwargs)
+        self.queryset = queryset
+
+    def batch_load_fn(self, keys):  # pylint: disable=method-hidden
+        """Fetch the records of all the requested `keys` at once."""
+        records = self.queryset.in_bulk(keys)
+        return Promise.resolve([records.get(key) for key in keys])
+
+
+def _loader_queryset(model):
+    """Return the queryset of `model` prefetching everything the inherited fields of its records are resolved from."""
+    queryset = model.objects.all()
+    if not hasattr(queryset, "prefetch_inherited"):
+        return queryset
+    queryset = queryset.prefetch_inherited()
+    if model is models.PeerEndpoint:
+        return queryset.prefetch_display()
+    if model is models.PeerEndpointAddressFamily:
+        # `parent_address_family` looks up the VRF of the endpoint's local IP, which may come from an interface
+        return queryset.prefetch_related(*(f"peer_endpoint__{lookup}" for lookup in LOCAL_IP_VRF_LOOKUPS))
+    return queryset
+
+
+def _request_loaders(info):
+    """Return the loaders of the current GraphQL request, keyed by what they load."""
+    loaders = getattr(info.context, "_bgp_graphql_loaders", None)
+    if loaders is None:
+        loaders = {}
+        setattr(info.context, "_bgp_graphql_loaders", loaders)
+    return loaders
+
+
+def get_inheritance_loader(info, model):
+    """Return the InheritanceLoader of `model` for the current GraphQL request, creating it on first use.
+
+    The records are restricted to those the user of the request is allowed to view, as Nautobot does for the records
+    it resolves itself; the others are loaded as None.
+    """
+    loaders = _request_loaders(info)
+    if model not in loaders:
+        loaders[model] = InheritanceLoader(_loader_queryset(model).restrict(info.context.user, "view"))
+    return loaders[model]
@@ -0,0 +1,127 @@
+"""GraphQL types of the models with inherited fields, exposing their effective configuration.
+
+These types are used instead of the ones Nautobot would generate for these models, and are extended by Nautobot with
+the same filters, custom fields and relationships. Their effective fields are resolved through the per-request loaders
+of `nautobot_bgp_models.graphql.loaders`, so that they cost the same number of SQL statements whatever the number of
+records of a query.
+"""
+
+import graphene
+from nautobot.core.graphql.types import JSON, OptimizedNautobotObjectType
+from nautobot.extras.registry import registry
+
+from nautobot_bgp_models import filters, models
+from nautobot_bgp_models.effective_config import plain_value
+from nautobot_bgp_models.graphql.loaders import get_inheritance_loader
+
+
+def _autonomous_system_type():
+    """Return the GraphQL type Nautobot generated for AutonomousSystem."""
+    return registry["graphql_types"]["nautobot_bgp_models.autonomoussystem"]
+
+
+def _inherited_field(field):
+    """Return the JSON representation of a `get_fields()` entry."""
+    source = field["source"]
+    return {
+        "value": plain_value(field["value"]),
+        "inherited": field["inherited"],
+        "source": None if source is None else {"object_type": source._meta.label_lower, "id": str(source.pk)},
+    }
+
+
+def _resolve(record, info, resolver):
+    """Return a Promise of `resolver` called with `record` loaded with its inheritance paths.
+
+    The Promise resolves to None if the user of the request isn't allowed to view the record.
+    """
+    loader = get_inheritance_loader(info, record._meta.concrete_model)
+    return loader.load(record.pk).then(lambda loaded: None if loaded is None else resolver(loaded))
+
+
+class InheritanceTypeMixin:
+    """Fields resolving the inherited configuration of a record."""
+
+    effective_extra_attributes = JSON(description="Extra attributes merged with the inherited ones")
+    fields_inherited = JSON(description="Effective value of each inheritable field, with its inheritance source")
+
+    def resolve_effective_extra_attributes(self, info):
+        """Resolve `effective_extra_attributes`."""
+        return _resolve(self, info, lambda record: record.get_extra_attributes())
+
+    def resolve_fields_inherited(self, info):
+        """Resolve `fields_inherited`."""
+        return _resolve(
+            self,
+            info,
+            lambda record: {
+                field_name: _inherited_field(field)
+                for field_name, field in record.get_fields(include_inherited=True).items()
+            },
+        )
+
+
+class EffectiveAutonomousSystemMixin:
+    """Field resolving the inherited autonomous system of a record."""
+
+    effective_autonomous_system = graphene.Field(
+        _autonomous_system_type, description="Autonomous system, inherited if not set on this object"
+    )
+
+    def resolve_effective_autonomous_system(self, info):
+        """Resolve `effective_autonomous_system`."""
+        return _resolve(self, info, lambda record: record.get_inherited_field("autonomous_system")[0])
+
+
+class PeerGroupType(InheritanceTypeMixin, EffectiveAutonomousSystemMixin, OptimizedNautobotObjectType):
+    """GraphQL type of PeerGroup records."""
+
+    class Meta:
+        model = models.PeerGroup
+        filterset_class = filters.PeerGroupFilterSet
+
+
+class PeerEndpointType(InheritanceTypeMixin, EffectiveAutonomousSystemMixin, OptimizedNautobotObjectType):
+    """GraphQL type of PeerEndpoint records."""
+
+    effective_local_ip = graphene.Field(
+        "nautobot.ipam.graphql.types.IPAddressType",
+        description="IP address of the endpoint, from its own or inherited source IP or source interface",
+    )
+
+    class Meta:
+        model = models.PeerEndpoint
+        filterset_class = filters.PeerEndpointFilterSet
+
+    def resolve_effective_local_ip(self, info):
+        """Resolve `effective_local_ip`."""
+        return _resolve(self, info, lambda record: record.local_ip)
+
+
+class PeerGroupAddressFamilyType(InheritanceTypeMixin, OptimizedNautobotObjectType):
+    """GraphQL type of PeerGroupAddressFamily records."""
+
+    class Meta:
+        model = models.PeerGroupAddressFamily
+        filterset_class = filters.PeerGroupAddressFamilyFilterSet
+
+
+class PeerEndpointAddressFamilyType(InheritanceTypeMixin, OptimizedNautobotObjectType):
+    """GraphQL type of PeerEndpointAddressFamily records."""
+
+    class Meta:
+        model = models.PeerEndpointAddressFamily
+        filterset_class = filters.PeerEndpointAddressFamilyFilterSet
+
+
+def register_graphql_types():
+    """Register the types of this module as static GraphQL types, in place of the ones Nautobot would generate.
+
+    Nautobot skips the types apps register for models with the "graphql" feature, which it generates itself; like
+    Nautobot's own custom types, these are added to its registry of types before the schema is generated instead.
+    """
+    # The registry of types is initialized when the schema module is first imported
+    import nautobot.core.graphql.schema  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
+
+    for schema_type in (PeerGroupType, PeerEndpointType, PeerGroupAddressFamilyType, PeerEndpointAddressFamilyType):
+        registry["graphql_types"][schema_type._meta.model._meta.label_lower] = schema_type
@@ -1,5 +1,8 @@
 """BGP helper functions."""
 
+from collections import OrderedDict
+from collections.abc import Mapping
+
 
 def add_available_asns(instance, asns):
     """Create fake records for all gaps between used Autonomous Systems."""
@@ -28,3 +31,88 @@ def add_available_asns(instance, asns):
         new_list.append({"asn": last_asn + 1, "available": instance.asn_max - last_asn})
 
     return new_list
+
+
+class LayeredMapping(Mapping):
+    """Read-only view merging a list of dictionaries on access, without copying them.
+
+    `layers` are ordered from the lowest to the highest priority. Looking up a key gives the same result as merging
+    all layers in turn with `nautobot.core.utils.data.deepmerge`: nested dictionaries are returned as `LayeredMapping`
+    objects themselves, and other values are taken from the highest layer defining the key. An empty dictionary clears
+    the value beneath it rather than being merged into it. Use `materialize()` to get the equivalent `OrderedDict`, for
+    instance to serialize it.
+    """
+
+    __slots__ = ("_layers",)
+
+    def __init__(self, layers):
+        """Initialize the view; empty layers are ignored."""
+        self._layers = [layer for layer in layers if layer]
+
+    def _lookup(self, key):
+        """Return the values of `key` to be merged, from the highest to the lowest priority layer."""
+        values = []
+        for layer in reversed(self._layers):
+            if key not in layer:
+                continue
+            value = layer[key]
+            if isinstance(value, dict):
+                values.append(value)
+                if not value:
+                    # An empty dictionary clears the values beneath it
+                    break
+            else:
+                # A scalar value replaces everything beneath it, and can't be merged into a dictionary above it
+                if not values:
+                    values.append(value)
+                break
+        return values
+
+    def __getitem__(self, key):
+        """Return the merged value of `key`."""
+        values = self._lookup(key)
+        if not values:
+            raise KeyError(key)
+        if isinstance(values[0], dict):
+            return LayeredMapping(reversed(values))
+        return values[0]
+
+    def __contains__(self, key):
+        """Check whether any layer defines `key`."""
+        return any(key in layer for layer in self._layers)
+
+    def __iter__(self):
+        """Iterate over the keys in the order `deepmerge` would produce them."""
+        seen = set()
+        for layer in self._layers:
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        """Return the number of distinct keys."""
+        return len(set().union(*self._layers))
+
+    def __repr__(self):
+        """Representation."""
+        return f"{self.__class__.__name__}({self._layers!r})"
+
+    def materialize(self):
+        """Return the merged data as a regular (nested) `OrderedDict`."""
+        data = OrderedDict()
+        for layer in self._layers:
+            _merge_into(data, layer)
+        return data
+
+
+def _merge_into(data, layer):
+    """Merge `layer` into `data` in place, copying the nested dictionaries of `layer` rather than sharing them."""
+    for key, value in layer.items():
+        if isinstance(value, dict):
+            current = data.get(key)
+            if not value or not isinstance(current, OrderedDict):
+                current = data[key] = OrderedDict()
+            _merge_into(current, value)
+        else:
+            data[key] = value
@@ -0,0 +1,238 @@
+"""Jobs for nautobot_bgp_models."""
+
+import csv
+import io
+import itertools
+import multiprocessing
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import engines
+from nautobot.apps.jobs import IntegerVar, Job, JSONVar, TextVar, register_jobs
+from nautobot.dcim.filters import DeviceFilterSet
+from nautobot.dcim.models import Device
+
+from nautobot_bgp_models.effective_config import iter_effective_configs
+from nautobot_bgp_models.models import PeerEndpointEffective
+
+name = "BGP Models"  # pylint: disable=invalid-name
+
+# Number of devices sent together to a worker process by RenderBGPConfig
+RENDER_BATCH_SIZE = 25
+
+# Number of batches submitted to each worker process at once by RenderBGPConfig
+RENDER_BATCHES_PER_WORKER = 2
+
+# Job files, stored with `Job.create_file()`, were added in Nautobot 2.1
+JOB_FILES_SUPPORTED = hasattr(Job, "create_file")
+
+# Template compiled by `_init_render_worker()` in each worker process
+_render_template = None
+
+
+def _init_render_worker(template_code):
+    """Compile the template once per worker process."""
+    global _render_template  # pylint: disable=global-statement
+    _render_template = engines["jinja"].from_string(template_code)
+
+
+def render_configs(configs):
+    """Render the template of the worker process with each of the effective `configs` as context.
+
+    Returns:
+        (list): A `(device, rendered, error, seconds)` tuple per config, `rendered` being None if the rendering failed.
+    """
+    results = []
+    for config in configs:
+        start = time.perf_counter()
+        try:
+            # As in nautobot.core.utils.data.render_jinja2(), concatenating to "" drops the SafeString of django-jinja
+            rendered, error = "" + _render_template.render(context=config), None
+        except Exception as exc:  # pylint: disable=broad-except
+            rendered, error = None, f"{type(exc).__name__}: {exc}"
+        results.append((config["device"], rendered, error, time.perf_counter() - start))
+    return results
+
+
+def get_shard(devices, shard_index, shard_count):
+    """Return the devices of the `devices` queryset in shard `shard_index` of `shard_count`.
+
+    A device belongs to the shard given by its UUID modulo `shard_count`: shards don't depend on the order or number of
+    devices, so that job runs with the same filter and shard count split the devices between them without overlap.
+    """
+    if shard_count == 1:
+        return devices
+    pks = [pk for pk in devices.values_list("pk", flat=True) if pk.int % shard_count == shard_index]
+    return devices.filter(pk__in=pks)
+
+
+def _batches(iterable, size):
+    """Yield lists of `size` consecutive items of `iterable`."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def render_in_pool(executor, batches, max_pending):
+    """Render the `batches` of configs in the worker processes of `executor`; return the results in order.
+
+    At most `max_pending` batches are submitted at once, the next ones as the previous ones complete, so that the
+    configs are resolved just ahead of the workers rather than all held in memory at once.
+    """
+    results = {}
+    pending = {}
+    for index, batch in enumerate(batches):
+        if len(pending) >= max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+        pending[executor.submit(render_configs, batch)] = index
+    for future, index in pending.items():
+        results[index] = future.result()
+    return [result for index in sorted(results) for result in results[index]]
+
+
+class RebuildPeerEndpointEffective(Job):
+    """Recompute the effective configuration of every PeerEndpoint."""
+
+    class Meta:
+        """Meta object boilerplate for RebuildPeerEndpointEffective."""
+
+        name = "Rebuild PeerEndpoint effective configuration"
+        description = "Recompute the resolved (inherited) configuration stored for every BGP PeerEndpoint."
+        has_sensitive_variables = False
+
+    def run(self):  # pylint: disable=arguments-differ
+        """Rebuild all PeerEndpointEffective records."""
+        count = PeerEndpointEffective.rebuild()
+        self.logger.info("Rebuilt the effective configuration of %d PeerEndpoint(s).", count)
+        return count
+
+
+class RenderBGPConfig(Job):
+    """Render the BGP configuration of devices from a Jinja2 template, in parallel worker processes."""
+
+    device_filter = JSONVar(
+        required=False,
+        label="Device filter",
+        description='Filters of the DCIM device list, for instance {"location": ["DC1"], "role": ["edge"]}. '
+        "All devices with a BGP routing instance are rendered by default.",
+    )
+    template = TextVar(
+        description="Jinja2 template, rendered with the effective BGP configuration of each device as context "
+        "(`device` and `routing_instances`, as returned by the effective-config REST API endpoint).",
+    )
+    workers = IntegerVar(default=4, min_value=1, description="Number of worker processes rendering the template.")
+    shard_index = IntegerVar(
+        default=0, min_value=0, description="Shard of the devices rendered by this run, from 0 to shard count - 1."
+    )
+    shard_count = IntegerVar(
+        default=1, min_value=1, description="Number of shards the devices are split into, for instance one per run."
+    )
+
+    class Meta:
+        """Meta object boilerplate for RenderBGPConfig."""
+
+        name = "Render BGP configurations"
+        description = "Render the effective BGP configuration of devices through a Jinja2 template."
+        has_sensitive_variables = False
+
+    def run(  # pylint: disable=arguments-differ, too-many-arguments, too-many-locals
+        self, template, device_filter=None, workers=4, shard_index=0, shard_count=1
+    ):
+        """Render the devices of the shard, and store the configurations and their timings as job files."""
+        if shard_index >= shard_count:
+            raise ValueError(f"The shard index must be lower than the shard count ({shard_count}).")
+        # Fail early on syntax errors rather than once per device
+        engines["jinja"].from_string(template)
+        filterset = DeviceFilterSet(device_filter or {}, Device.objects.filter(bgp_routing_instances__isnull=False))
+        if not filterset.is_valid():
+            raise ValueError(f"Invalid device filter: {filterset.errors.as_json()}")
+        devices = get_shard(filterset.qs.distinct(), shard_index, shard_count)
+
+        start = time.perf_counter()
+        configs = iter_effective_configs(devices)
+        if workers == 1:
+            _init_render_worker(template)
+            results = [result for batch in _batches(configs, RENDER_BATCH_SIZE) for result in render_configs(batch)]
+        else:
+            # Forked workers inherit the loaded Django settings and Jinja2 environment; they don't access the database
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_render_worker,
+                initargs=(template,),
+            ) as executor:
+                # Configurations are resolved chunk by chunk while the workers render the previous ones
+                results = render_in_pool(
+                    executor, _batches(configs, RENDER_BATCH_SIZE), workers * RENDER_BATCHES_PER_WORKER
+                )
+        elapsed = time.perf_counter() - start
+
+        suffix = f"-shard-{shard_index}-of-{shard_count}" if shard_count > 1 else ""
+        archive = io.BytesIO()
+        timings = io.StringIO()
+        writer = csv.writer(timings)
+        writer.writerow(["device_id", "device", "status", "render_ms", "bytes", "error"])
+        filenames = set()
+        failed = 0
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+            for device, rendered, error, seconds in results:
+                if error is None:
+                    # Device names are only unique per location and tenant
+                    filename = (device["name"] or device["id"]).replace("/", "_")
+                    if filename in filenames:
+                        filename = f"{filename}-{device['id']}"
+                    filenames.add(filename)
+                    zip_file.writestr(f"{filename}.cfg", rendered)
+                else:
+                    failed += 1
+                    self.logger.warning("Failed to render the configuration of %s: %s", device["name"], error)
+                writer.writerow(
+                    [
+                        device["id"],
+                        device["name"],
+                        "rendered" if error is None else "failed",
+                        f"{seconds * 1000:.3f}",
+                        len(rendered.encode()) if rendered is not None else "",
+                        error or "",
+                    ]
+                )
+        self.store_file(f"bgp-configs{suffix}.zip", archive.getvalue())
+        self.store_file(f"bgp-render-timings{suffix}.csv", timings.getvalue())
+
+        summary = {
+            "devices": len(results),
+            "failed": failed,
+            "seconds": round(elapsed, 3),
+            "devices_per_second": round(len(results) / elapsed, 1) if elapsed else None,
+        }
+        self.logger.info(
+            "Rendered the BGP configuration of %d device(s) in %.1fs with %d worker(s): %s devices/s.",
+            len(results),
+            elapsed,
+            workers,
+            summary["devices_per_second"],
+        )
+        if failed:
+            raise RuntimeError(f"Failed to render the configuration of {failed} of {len(results)} device(s).")
+        return summary
+
+    def store_file(self, filename, content):
+        """Store `content` as the file `filename` of the job result.
+
+        Before Nautobot 2.1, which has no job files, the file is saved in the default storage instead, under the ID of
+        the job result, and its path is logged.
+        """
+        if JOB_FILES_SUPPORTED:
+            self.create_file(filename, content)
+            return
+        path = default_storage.save(f"nautobot_bgp_models/{self.job_result.pk}/{filename}", ContentFile(content))
+        self.logger.info("Saved %s as %s in the default file storage.", filename, path)
+
+
+jobs = [RebuildPeerEndpointEffective, RenderBGPConfig]
+register_jobs(*jobs)
@@ -0,0 +1 @@
+"""Management commands for nautobot_bgp_models app."""
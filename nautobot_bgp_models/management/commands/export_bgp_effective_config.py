@@ -0,0 +1,56 @@
+"""Management command exporting the effective BGP configuration of devices as NDJSON."""
+
+import contextlib
+import time
+
+from django.core.management.base import BaseCommand
+from nautobot.dcim.models import Device
+
+from nautobot_bgp_models.effective_config import EXPORT_CHUNK_SIZE, iter_effective_configs, to_ndjson
+
+
+class Command(BaseCommand):
+    """Export the effective BGP configuration of devices, one JSON document per line (NDJSON)."""
+
+    help = "Export the effective BGP configuration of devices, one JSON document per line (NDJSON)."
+
+    def add_arguments(self, parser):
+        """Add the command arguments."""
+        parser.add_argument(
+            "--device",
+            action="append",
+            dest="devices",
+            metavar="NAME",
+            help="Name of a device to export; may be repeated. All devices are exported by default.",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            metavar="FILE",
+            help="File to write the configurations to, instead of the standard output.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f"Number of devices resolved together (default: {EXPORT_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        """Write the effective configuration of each device."""
+        devices = Device.objects.all()
+        if options["devices"]:
+            devices = devices.filter(name__in=options["devices"])
+
+        start = time.perf_counter()
+        count = 0
+        if options["output"]:
+            output = open(options["output"], "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        else:
+            output = contextlib.nullcontext(self.stdout)
+        with output as stream:
+            for config in iter_effective_configs(devices, chunk_size=options["chunk_size"]):
+                stream.write(to_ndjson(config))
+                count += 1
+
+        self.stderr.write(f"Exported the BGP configuration of {count} devices in {time.perf_counter() - start:.1f}s.")
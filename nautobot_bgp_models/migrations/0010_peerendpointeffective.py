@@ -0,0 +1,104 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,invalid-name
+
+import uuid
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("extras", "0098_rename_data_jobresult_result"),
+        ("nautobot_bgp_models", "0009_autonomoussystemrange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PeerEndpointEffective",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True
+                    ),
+                ),
+                ("enabled", models.BooleanField(blank=True, null=True)),
+                (
+                    "extra_attributes",
+                    models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+                ),
+                (
+                    "autonomous_system",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="nautobot_bgp_models.autonomoussystem",
+                    ),
+                ),
+                (
+                    "local_ip",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="ipam.ipaddress",
+                    ),
+                ),
+                (
+                    "peer_endpoint",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="effective",
+                        to="nautobot_bgp_models.peerendpoint",
+                    ),
+                ),
+                (
+                    "role",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="extras.role",
+                    ),
+                ),
+                (
+                    "source_interface",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="dcim.interface",
+                    ),
+                ),
+                (
+                    "source_ip",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="ipam.ipaddress",
+                    ),
+                ),
+                (
+                    "vrf",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="ipam.vrf",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "BGP Peer Endpoint effective configuration",
+            },
+        ),
+    ]
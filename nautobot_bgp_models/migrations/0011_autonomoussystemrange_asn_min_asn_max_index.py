@@ -0,0 +1,16 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,invalid-name
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nautobot_bgp_models", "0010_peerendpointeffective"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="autonomoussystemrange",
+            index=models.Index(fields=["asn_min", "asn_max"], name="nautobot_bg_asn_min_a2a480_idx"),
+        ),
+    ]
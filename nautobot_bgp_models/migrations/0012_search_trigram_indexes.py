@@ -0,0 +1,65 @@
+# pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,invalid-name
+"""Trigram indexes backing the `q` searches of the filtersets, on PostgreSQL only.
+
+The searches use `icontains`, which Django compiles to `UPPER(column::text) LIKE UPPER(...)` on PostgreSQL: GIN
+indexes on that same expression with `gin_trgm_ops` let these substring searches use an index instead of a sequential
+scan. On other databases, or if the `pg_trgm` extension can't be created, no index is created and the searches fall
+back to scans.
+"""
+
+import logging
+
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+# (app label, model name, column) of the searched columns
+TRIGRAM_INDEXES = [
+    ("nautobot_bgp_models", "AutonomousSystem", "description"),
+    ("nautobot_bgp_models", "AutonomousSystemRange", "description"),
+    ("nautobot_bgp_models", "PeerGroup", "name"),
+    ("nautobot_bgp_models", "PeerGroup", "description"),
+    ("nautobot_bgp_models", "PeerGroupTemplate", "name"),
+    ("nautobot_bgp_models", "PeerGroupTemplate", "description"),
+    ("nautobot_bgp_models", "PeerEndpoint", "description"),
+]
+
+
+def index_name(db_table, column):
+    return f"nautobot_bgp_{db_table.replace('nautobot_bgp_models_', '')}_{column}_trgm"[:63]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError as exc:
+        logger.warning("The pg_trgm extension can't be created, BGP searches won't be indexed: %s", exc)
+        return
+    quote_name = schema_editor.quote_name
+    for app_label, model_name, column in TRIGRAM_INDEXES:
+        db_table = apps.get_model(app_label, model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_name(index_name(db_table, column))} ON {quote_name(db_table)} "
+            f"USING gin ((UPPER({quote_name(column)}::text)) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for app_label, model_name, column in TRIGRAM_INDEXES:
+        db_table = apps.get_model(app_label, model_name)._meta.db_table
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index_name(db_table, column))}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nautobot_bgp_models", "0011_autonomoussystemrange_asn_min_asn_max_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,23 +1,40 @@
 """BGP data models."""
 
 import functools
-from collections import OrderedDict
+import heapq
 
 from django.core.exceptions import ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.signals import class_prepared
 from nautobot.circuits.models import Provider
+from nautobot.core.models import BaseManager, BaseModel
 from nautobot.core.models.generics import PrimaryModel, OrganizationalModel
+from nautobot.core.utils.data import UtilizationData
 from nautobot.dcim.fields import ASNField
 from nautobot.extras.models import StatusModel, RoleField
 from nautobot.apps.models import extras_features
-from nautobot.ipam.models import IPAddress, IPAddressToInterface
-from nautobot.core.utils.data import deepmerge
+from nautobot.ipam.models import IPAddress
 from nautobot.tenancy.models import Tenant
 
 from netutils.asn import int_to_asdot
 
+from nautobot_bgp_models.asn_index import allocated_asn_index
+from nautobot_bgp_models.cache import extra_attributes_cache
 from nautobot_bgp_models.choices import AFISAFIChoices
+from nautobot_bgp_models.helpers import LayeredMapping
+from nautobot_bgp_models.querysets import (
+    AutonomousSystemQuerySet,
+    AutonomousSystemRangeQuerySet,
+    InheritanceQuerySet,
+    PeerEndpointAddressFamilyQuerySet,
+    PeerEndpointQuerySet,
+    PeeringQuerySet,
+    PeerGroupAddressFamilyQuerySet,
+)
+from nautobot_bgp_models.validation import ValidationContext
 
 
 def rgetattr(obj, attr, *args):
@@ -29,6 +46,14 @@ def rgetattr(obj, attr, *args):
     return functools.reduce(_getattr, [obj] + attr.split("."))
 
 
+def get_prefetched(obj, related_name):
+    """Return the list of `related_name` objects prefetched on `obj`, or None if they were not prefetched."""
+    try:
+        return list(obj._prefetched_objects_cache[related_name])  # pylint: disable=protected-access
+    except (AttributeError, KeyError):
+        return None
+
+
 class InheritanceMixin(models.Model):
     """BGP common mixin class."""
 
@@ -100,26 +125,153 @@ class BGPExtraAttributesMixin(models.Model):
 
         return [rgetattr(self, f"{x}.extra_attributes", None) for x in paths]
 
-    def get_extra_attributes(self):
-        """Render extra attributes for an object."""
-        # always manually query for extra attributes
-        extra_attributes_data = [x for x in self.get_extra_attributes_paths if x]
+    def get_extra_attributes_ancestors(self):
+        """Get all objects this object inherits extra attributes from."""
+        ancestors = [rgetattr(self, x, None) for x in getattr(self, "extra_attributes_inheritance", [])]
+        return [x for x in ancestors if x is not None]
+
+    def get_extra_attributes(self, lazy=False):
+        """Render extra attributes for an object, using the extra attributes cache when possible.
 
+        With `lazy=True`, a read-only `LayeredMapping` is returned instead, merging the inherited extra attributes on
+        access rather than copying them; this is cheaper when only a few keys are read, e.g. in configuration templates.
+        """
+        ancestors = self.get_extra_attributes_ancestors()
+        if lazy:
+            return LayeredMapping([*(x.extra_attributes for x in ancestors), self.extra_attributes])
+        return extra_attributes_cache.get_or_compute(self, ancestors, lambda: self._merge_extra_attributes(ancestors))
+
+    def _merge_extra_attributes(self, ancestors):
+        """Merge the extra attributes of `ancestors` and of this object."""
         # Compile all extra attributes, overwriting lower-weight values with higher-weight values where a collision occurs
-        data = OrderedDict()
+        # If the object has local extra attributes data defined, it is merged last
+        return LayeredMapping([*(x.extra_attributes for x in ancestors), self.extra_attributes]).materialize()
 
-        for extra_attributes in extra_attributes_data:
-            data = deepmerge(data, extra_attributes)
+    class Meta:
+        abstract = True
 
-        # If the object has local extra attributes data defined, merge it last
-        if self.extra_attributes:
-            data = deepmerge(data, self.extra_attributes)
-        return data
+
+def _copy_field_value(value):
+    """Copy the (JSON) containers of a field value, so that modifying them in place doesn't alter a snapshot."""
+    if isinstance(value, dict):
+        return {key: _copy_field_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_field_value(item) for item in value]
+    return value
+
+
+class SnapshotJSONAttribute(DeferredAttribute):
+    """Attribute of a JSON field of a `FieldSnapshotMixin` model, copying its loaded value into the snapshot when read.
+
+    The value loaded from the database can only be modified in place once read, so it is only copied then, rather than
+    for every record loaded. Assigning a new value before that keeps the loaded one, untouched, as the snapshot.
+    """
+
+    def __get__(self, instance, cls=None):
+        """Return the value, copying it into the snapshot if it was loaded and not read yet."""
+        value = super().__get__(instance, cls)
+        if instance is not None:
+            uncopied = instance.__dict__.get("_uncopied_snapshot_fields")
+            if uncopied and self.field.attname in uncopied:
+                uncopied.discard(self.field.attname)
+                instance._field_snapshot[self.field.attname] = _copy_field_value(value)
+        return value
+
+    def __set__(self, instance, value):
+        """Set the value; a loaded value not read yet stays the snapshot as is."""
+        uncopied = instance.__dict__.get("_uncopied_snapshot_fields")
+        if uncopied:
+            uncopied.discard(self.field.attname)
+        instance.__dict__[self.field.attname] = value
+
+
+class FieldSnapshotMixin(models.Model):
+    """Record the values of the concrete fields as loaded from, or last saved to, the database.
+
+    `has_changed()` then tells whether fields were modified since, without querying the database, so that the
+    validation and save paths can skip work depending only on unchanged fields. All the fields of a record that was
+    never loaded nor saved, e.g. a new record, are considered changed. The values of JSON fields, which may be modified
+    in place, are copied into the snapshot when they are first read (see `SnapshotJSONAttribute`).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Snapshot the fields of records loaded from the database."""
+        instance = super().from_db(db, field_names, values)
+        instance._take_field_snapshot(loaded=True)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        """Snapshot the fields reloaded from the database, including deferred fields loaded on access."""
+        super().refresh_from_db(using=using, fields=fields)
+        self._take_field_snapshot(fields, loaded=True)
+
+    def save(self, *args, **kwargs):
+        """Save, then snapshot the saved fields.
+
+        `post_save` signal handlers still see the fields changed by this save through `has_changed()`.
+        """
+        super().save(*args, **kwargs)
+        self._take_field_snapshot(kwargs.get("update_fields"))
+
+    def _take_field_snapshot(self, field_names=None, loaded=False):
+        """Snapshot the current values of the given fields (all fields by default) that are not deferred.
+
+        The JSON values just `loaded` from the database, which weren't read yet, are only copied when they are read.
+        """
+        if field_names is None or getattr(self, "_field_snapshot", None) is None:
+            self._field_snapshot = {}
+            self._uncopied_snapshot_fields = set()
+            fields = self._meta.concrete_fields
+        else:
+            fields = [self._meta.get_field(name) for name in field_names]
+        for field in fields:
+            if field.attname not in self.__dict__:
+                continue
+            value = self.__dict__[field.attname]
+            if isinstance(value, (dict, list)):
+                if loaded:
+                    self._field_snapshot[field.attname] = value
+                    self._uncopied_snapshot_fields.add(field.attname)
+                    continue
+                value = _copy_field_value(value)
+            self._field_snapshot[field.attname] = value
+            self._uncopied_snapshot_fields.discard(field.attname)
+
+    def get_changed_fields(self):
+        """Return the attribute names (e.g. `vrf_id`) of the concrete fields modified since the last snapshot."""
+        snapshot = getattr(self, "_field_snapshot", None)
+        if snapshot is None:
+            return {field.attname for field in self._meta.concrete_fields}
+        return {
+            field.attname
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (field.attname not in snapshot or snapshot[field.attname] != self.__dict__[field.attname])
+        }
+
+    def has_changed(self, *field_names):
+        """Return whether any of the given fields (all fields by default) was modified since the last snapshot."""
+        changed_fields = self.get_changed_fields()
+        if not field_names:
+            return bool(changed_fields)
+        return any(self._meta.get_field(name).attname in changed_fields for name in field_names)
 
     class Meta:
         abstract = True
 
 
+def install_snapshot_json_attributes(sender, **kwargs):
+    """Callback function for class_prepared() -- set the attributes of the JSON fields of `FieldSnapshotMixin` models."""
+    if issubclass(sender, FieldSnapshotMixin):
+        for field in sender._meta.concrete_fields:
+            if isinstance(field, models.JSONField):
+                setattr(sender, field.attname, SnapshotJSONAttribute(field))
+
+
+class_prepared.connect(install_snapshot_json_attributes)
+
+
 @extras_features(
     "custom_fields",
     "custom_links",
@@ -130,13 +282,15 @@ class BGPExtraAttributesMixin(models.Model):
     "statuses",
     "webhooks",
 )
-class AutonomousSystem(PrimaryModel, StatusModel):
+class AutonomousSystem(PrimaryModel, StatusModel, FieldSnapshotMixin):
     """Autonomous System information."""
 
     asn = ASNField(unique=True, verbose_name="ASN", help_text="32-bit autonomous system number")
     description = models.CharField(max_length=200, blank=True)
     provider = models.ForeignKey(to=Provider, on_delete=models.PROTECT, blank=True, null=True)
 
+    objects = BaseManager.from_queryset(AutonomousSystemQuerySet)()
+
     class Meta:
         ordering = ["asn"]
         verbose_name = "Autonomous system"
@@ -160,7 +314,7 @@ class AutonomousSystem(PrimaryModel, StatusModel):
     "relationships",
     "webhooks",
 )
-class AutonomousSystemRange(PrimaryModel):
+class AutonomousSystemRange(PrimaryModel, FieldSnapshotMixin):
     """Autonomous System Range information."""
 
     name = models.CharField(max_length=255, unique=True, blank=False)
@@ -169,9 +323,12 @@ class AutonomousSystemRange(PrimaryModel):
     description = models.CharField(max_length=255, blank=True)
     tenant = models.ForeignKey(to=Tenant, on_delete=models.PROTECT, blank=True, null=True)
 
+    objects = BaseManager.from_queryset(AutonomousSystemRangeQuerySet)()
+
     class Meta:
         ordering = ["asn_min"]
         verbose_name = "Autonomous System Range"
+        indexes = [models.Index(fields=["asn_min", "asn_max"])]
 
     def __str__(self):
         """String representation of an AutonomousSystemRange."""
@@ -182,16 +339,151 @@ class AutonomousSystemRange(PrimaryModel):
         if self.asn_min >= self.asn_max:
             raise ValidationError("asn_min value must be lower than asn_max value.")
 
+        overlapping = AutonomousSystemRange.objects.exclude(pk=self.pk).overlapping(self.asn_min, self.asn_max)
+        names = list(overlapping.order_by("asn_min").values_list("name", flat=True)[:5])
+        if names:
+            raise ValidationError(f"This range overlaps with existing range(s): {', '.join(names)}.")
+
+    @classmethod
+    def check_overlaps(cls, ranges):
+        """Check that none of the unsaved `ranges` overlap with each other or with the ranges of the database.
+
+        This is meant for bulk creation, where calling `clean()` on each range would miss the overlaps between the
+        new ranges. The new ranges are sorted once, then swept along with the existing ranges in `asn_min` order,
+        loaded with a single query: the whole check runs in O(n log n) instead of comparing every pair of ranges.
+
+        Raises:
+            ValidationError: listing each range overlapping a range with a lower `asn_min`.
+        """
+        existing = (
+            (name, asn_min, asn_max, False)
+            for name, asn_min, asn_max in cls.objects.order_by("asn_min").values_list("name", "asn_min", "asn_max")
+        )
+        new = sorted(((obj.name, obj.asn_min, obj.asn_max, True) for obj in ranges), key=lambda item: item[1])
+        errors = []
+        previous = None
+        for current in heapq.merge(existing, new, key=lambda item: item[1]):
+            # Overlaps among the existing ranges aren't reported, as they aren't caused by the new ranges
+            if previous is not None and current[1] <= previous[2] and (current[3] or previous[3]):
+                errors.append(
+                    f"{previous[0]} ({previous[1]}-{previous[2]}) overlaps with {current[0]} ({current[1]}-{current[2]})"
+                )
+            # Keep the range reaching the furthest, which is the one any following range may overlap with
+            if previous is None or current[2] > previous[2]:
+                previous = current
+        if errors:
+            raise ValidationError(errors)
+
+    def get_available_asn_ranges(self, limit=None):
+        """Return the `(first, last)` bounds of the blocks of available ASNs in the range, in ascending order.
+
+        Blocks are found in the database: apart from the one starting at `asn_min`, each block starts right after an
+        allocated ASN whose successor isn't allocated, and ends right before the next allocated ASN. This scans the
+        `asn` index up to the requested blocks only, whatever the size of the range.
+        """
+        allocated = AutonomousSystem.objects.filter(asn__gte=self.asn_min, asn__lte=self.asn_max)
+        next_allocated = allocated.filter(asn__gt=OuterRef("asn")).order_by("asn").values("asn")[:1]
+        gaps = (
+            allocated.filter(asn__lt=self.asn_max)
+            .filter(~Exists(AutonomousSystem.objects.filter(asn=OuterRef("asn") + 1)))
+            .annotate(next_allocated=Subquery(next_allocated))
+            .order_by("asn")
+            .values_list("asn", "next_allocated")
+        )
+        if limit is not None:
+            gaps = gaps[:limit]
+
+        ranges = []
+        first_allocated = allocated.order_by("asn").values_list("asn", flat=True).first()
+        if first_allocated is None:
+            return [(self.asn_min, self.asn_max)]
+        if first_allocated > self.asn_min:
+            ranges.append((self.asn_min, first_allocated - 1))
+        for asn, next_asn in gaps:
+            ranges.append((asn + 1, next_asn - 1 if next_asn is not None else self.asn_max))
+        return ranges[:limit] if limit is not None else ranges
+
+    def get_available_asns(self, count=1):
+        """Return the first `count` available ASN numbers in the range (fewer if the range runs out)."""
+        available = []
+        for first, last in self.get_available_asn_ranges(limit=count):
+            available.extend(range(first, min(last, first + count - len(available) - 1) + 1))
+            if len(available) >= count:
+                break
+        return available
+
     def get_next_available_asn(self):
         """Return the first available ASN number in the range, or None if none are available."""
-        asn_nums = AutonomousSystem.objects.filter(asn__gte=self.asn_min, asn__lte=self.asn_max).values_list(
-            "asn", flat=True
+        available = self.get_available_asns(count=1)
+        return available[0] if available else None
+
+    def get_utilization(self):
+        """Return the number of allocated ASNs and the size of the range, from the allocated ASN index."""
+        return UtilizationData(
+            numerator=allocated_asn_index.count(self.asn_min, self.asn_max),
+            denominator=self.asn_max - self.asn_min + 1,
         )
-        for i in range(self.asn_min, self.asn_max + 1):
-            if i not in asn_nums:
-                return i
 
-        return None
+    def get_available_count(self):
+        """Return the number of available ASNs in the range, from the allocated ASN index."""
+        utilization = self.get_utilization()
+        return utilization.denominator - utilization.numerator
+
+    def get_largest_available_block(self):
+        """Return the `(first, last)` bounds of the largest block of available ASNs, or None if the range is full."""
+        return allocated_asn_index.largest_gap(self.asn_min, self.asn_max)
+
+    def get_first_available_block(self, size=1):
+        """Return the `(first, last)` bounds of the first block of at least `size` available ASNs, or None."""
+        return allocated_asn_index.first_gap(self.asn_min, self.asn_max, size=size)
+
+    def get_overlap(self, other):
+        """Return the `(first, last)` bounds of the ASNs shared with range `other` and how many of them are allocated.
+
+        The result is a `(first, last, allocated)` tuple, or None if the two ranges don't overlap.
+        """
+        first, last = max(self.asn_min, other.asn_min), min(self.asn_max, other.asn_max)
+        if first > last:
+            return None
+        return (first, last, allocated_asn_index.count(first, last))
+
+    def get_asns_with_gaps(self, after=None, limit=50):
+        """Return up to `limit` rows describing the allocation of the range, in ascending order.
+
+        Rows are the allocated `AutonomousSystem` instances, interleaved with a `{"asn": first, "available": count}`
+        dictionary for each block of available ASNs, as built by `helpers.add_available_asns()`. Only the rows
+        starting after ASN `after` are returned, so that the listing can be paginated on the ASN number of the last
+        row of the previous page (keyset pagination). Each allocated ASN is annotated with the previous allocated one,
+        which gives the size of the block of available ASNs before it; this takes one query whatever the size of the
+        range and the position of the page.
+        """
+        start = self.asn_min if after is None else max(after + 1, self.asn_min)
+        allocated = AutonomousSystem.objects.filter(asn__gte=self.asn_min, asn__lte=self.asn_max)
+        previous_allocated = allocated.filter(asn__lt=OuterRef("asn")).order_by("-asn").values("asn")[:1]
+        asns = list(
+            allocated.filter(asn__gte=start)
+            .annotate(previous_allocated=Subquery(previous_allocated))
+            .order_by("asn")[:limit]
+        )
+
+        rows = []
+        for asn in asns:
+            first = asn.previous_allocated + 1 if asn.previous_allocated is not None else self.asn_min
+            if start <= first < asn.asn:
+                rows.append({"asn": first, "available": asn.asn - first})
+            rows.append(asn)
+
+        # The end of the range was reached: add the block of available ASNs after the last allocated one, if any
+        if len(asns) < limit:
+            if asns:
+                last = asns[-1].asn
+            else:
+                last = allocated.filter(asn__lt=start).order_by("-asn").values_list("asn", flat=True).first()
+            first = last + 1 if last is not None else self.asn_min
+            if start <= first <= self.asn_max:
+                rows.append({"asn": first, "available": self.asn_max - first + 1})
+
+        return rows[:limit]
 
 
 @extras_features(
@@ -204,7 +496,7 @@ class AutonomousSystemRange(PrimaryModel):
     "statuses",
     "webhooks",
 )
-class BGPRoutingInstance(PrimaryModel, StatusModel, BGPExtraAttributesMixin):
+class BGPRoutingInstance(PrimaryModel, StatusModel, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """BGP instance definition."""
 
     description = models.CharField(max_length=200, blank=True)
@@ -253,7 +545,7 @@ class BGPRoutingInstance(PrimaryModel, StatusModel, BGPExtraAttributesMixin):
     "relationships",
     "webhooks",
 )
-class PeerGroupTemplate(PrimaryModel, BGPExtraAttributesMixin):
+class PeerGroupTemplate(PrimaryModel, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """Model for Peer Group templates."""
 
     name = models.CharField(max_length=100, unique=True, blank=False)
@@ -297,7 +589,7 @@ class PeerGroupTemplate(PrimaryModel, BGPExtraAttributesMixin):
     "relationships",
     "webhooks",
 )
-class PeerGroup(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
+class PeerGroup(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """BGP peer group information."""
 
     extra_attributes_inheritance = ["peergroup_template", "routing_instance"]
@@ -308,6 +600,8 @@ class PeerGroup(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
         "role": ["peergroup_template"],
     }
 
+    objects = BaseManager.from_queryset(InheritanceQuerySet)()
+
     name = models.CharField(max_length=100)
 
     # Rename to avoid clash with DRF renderer
@@ -383,30 +677,32 @@ class PeerGroup(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
         ordering = ["name"]
 
     def clean(self):
-        """Clean."""
+        """Clean.
+
+        IP addresses and VRFs are looked up through the active `ValidationContext`, if any.
+        """
         if self.source_interface:
             # Ensure VRF membership
-            if self.vrf != self.source_interface.vrf:
+            if self.vrf_id != self.source_interface.vrf_id:
                 raise ValidationError(
                     f"VRF mismatch between PeerGroup VRF ({self.vrf}) "
                     f"and selected source interface VRF ({self.source_interface.vrf})"
                 )
 
         if self.source_ip:
+            context = ValidationContext.current()
             # Ensure IP related to the routing instance
-            if self.source_ip not in IPAddress.objects.filter(interfaces__device_id=self.routing_instance.device.id):
+            if self.source_ip_id not in context.device_ip_address_ids(self.routing_instance.device_id):
                 raise ValidationError("Group IP not associated with Routing Instance")
             # Ensure VRF membership
-            if self.vrf and (self.vrf not in self.source_ip.parent.vrfs.all()):  # PG's VRF in IPs' VRF
+            if self.vrf_id and self.vrf_id not in context.ip_address_vrf_ids(self.source_ip_id):  # PG's VRF in IPs' VRF
                 raise ValidationError(
                     f"VRF mismatch between PeerGroup VRF ({self.vrf}) and selected source IP VRF "
                     f"({self.source_ip.parent.vrfs.all().first()})"
                 )
 
-        if self.present_in_database:
-            original = self.__class__.objects.get(id=self.id)
-            if self.vrf != original.vrf and self.endpoints.exists():
-                raise ValidationError("Cannot change VRF of PeerGroup that has existing PeerEndpoints in this VRF.")
+        if self.present_in_database and self.has_changed("vrf") and self.endpoints.exists():
+            raise ValidationError("Cannot change VRF of PeerGroup that has existing PeerEndpoints in this VRF.")
 
     def validate_unique(self, exclude=None):
         """Validate uniqueness, handling NULL != NULL for VRF foreign key."""
@@ -430,7 +726,7 @@ class PeerGroup(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
     "relationships",
     "webhooks",
 )
-class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
+class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """BGP information about single endpoint of a peering."""
 
     natural_key_field_names = ["id"]
@@ -442,8 +738,12 @@ class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
         "enabled": ["peer_group", "peer_group.peergroup_template"],
         "source_ip": ["peer_group"],
         "source_interface": ["peer_group"],
-        "role": ["peer_group.role", "peer_group.peergroup_template.role"],
+        "role": ["peer_group", "peer_group.peergroup_template"],
     }
+    # Local fields `local_ip` depends on
+    local_ip_sources = ("source_ip", "source_interface", "peer_group")
+
+    objects = BaseManager.from_queryset(PeerEndpointQuerySet)()
 
     description = models.CharField(max_length=200, blank=True)
 
@@ -507,6 +807,25 @@ class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
         verbose_name="Source Interface",
     )
 
+    secret = models.ForeignKey(
+        to="extras.Secret",
+        on_delete=models.PROTECT,
+        related_name="bgp_peer_endpoints",
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = "BGP Peer Endpoint"
+
+    def __str__(self):
+        """String."""
+        asn, _, _ = self.get_inherited_field(field_name="autonomous_system")
+        if self.routing_instance and self.routing_instance.device:
+            return f"{self.routing_instance.device} {self.local_ip} ({asn})"
+
+        return f"{self.local_ip} ({asn})"
+
     @property
     def local_ip(self):
         """Compute effective peering endpoint IP address.
@@ -518,41 +837,107 @@ class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
          4. Peer Groups' `source_interface` attribute
 
         The effective IP Address of an endpoint is based on the above order.
+
+        If the record was retrieved with `PeerEndpoint.objects.with_local_ip()`, or with its `effective` record, and
+        none of the above attributes was changed since, the annotation or the stored local IP is used instead of
+        resolving them again.
         """
-        inherited_source_ip, _, _ = self.get_inherited_field(field_name="source_ip")
-        inherited_source_interface, _, _ = self.get_inherited_field(field_name="source_interface")
+        if "effective_local_ip_id" in self.__dict__ and not self.has_changed(*self.local_ip_sources):
+            return self._get_annotated_local_ip()
+        effective = self.get_loaded_effective()
+        if effective is not None:
+            return effective.local_ip
 
+        inherited_source_ip, _, _ = self.get_inherited_field(field_name="source_ip")
         if inherited_source_ip:
             return inherited_source_ip
 
-        if inherited_source_interface and inherited_source_interface.ip_addresses.count() == 1:
-            return inherited_source_interface.ip_addresses.first()
+        inherited_source_interface, _, _ = self.get_inherited_field(field_name="source_interface")
+        if inherited_source_interface:
+            ip_addresses = get_prefetched(inherited_source_interface, "ip_addresses")
+            if ip_addresses is None:
+                ip_addresses = list(inherited_source_interface.ip_addresses.all()[:2])
+            if len(ip_addresses) == 1:
+                return ip_addresses[0]
 
         return None
 
-    secret = models.ForeignKey(
-        to="extras.Secret",
-        on_delete=models.PROTECT,
-        related_name="bgp_peer_endpoints",
-        blank=True,
-        null=True,
-    )
+    def get_loaded_effective(self):
+        """Return the PeerEndpointEffective record loaded along with this record, if any.
 
-    class Meta:
-        verbose_name = "BGP Peer Endpoint"
+        Records are only returned if they were loaded with the endpoint, e.g. with `select_related("effective")`, and
+        no field of the endpoint was changed since; None is returned otherwise, without querying the database.
+        """
+        related = PeerEndpoint.effective.related
+        if not related.is_cached(self) or self.has_changed():
+            return None
+        return related.get_cached_value(self)
 
-    def __str__(self):
-        """String."""
-        asn, _, _ = self.get_inherited_field(field_name="autonomous_system")
-        if self.routing_instance and self.routing_instance.device:
-            return f"{self.routing_instance.device} {self.local_ip} ({asn})"
+    def _get_annotated_local_ip(self):
+        """Return the IPAddress matching the `effective_local_ip_id` annotation, avoiding a query where possible."""
+        if self.effective_local_ip_id is None:
+            return None
+        candidates = []
+        if PeerEndpoint.source_ip.is_cached(self):
+            candidates.append(self.source_ip)
+        if (
+            PeerEndpoint.peer_group.is_cached(self)
+            and self.peer_group
+            and PeerGroup.source_ip.is_cached(self.peer_group)
+        ):
+            candidates.append(self.peer_group.source_ip)
+        for candidate in candidates:
+            if candidate is not None and candidate.pk == self.effective_local_ip_id:
+                return candidate
+        if getattr(self, "_annotated_local_ip", None) is None:
+            self._annotated_local_ip = IPAddress.objects.get(pk=self.effective_local_ip_id)
+        return self._annotated_local_ip
+
+    def get_vrf_id(self, local_ip):
+        """Compute the PK of the effective VRF of the endpoint, given its `local_ip`.
+
+        This is the VRF of the endpoint's Peer Group if any, else the VRF of the parent prefix of the local IP.
+        """
+        if self.peer_group is not None and self.peer_group.vrf_id:
+            return self.peer_group.vrf_id
+        if local_ip is not None and local_ip.parent_id is not None:
+            vrf = local_ip.parent.vrfs.all().first()
+            return vrf.pk if vrf else None
+        return None
 
-        return f"{self.local_ip} ({asn})"
+    @property
+    def endpoint_key(self):
+        """Composite natural key of the endpoint: the PKs of its device, effective local IP and effective VRF.
+
+        The key is computed from inherited values, so it is available for endpoints not saved yet as well. If the
+        record was retrieved with `PeerEndpoint.objects.with_endpoint_key()` and none of the fields the key depends on
+        was changed since, the annotations are used instead. Remote endpoints (without a device) of the same IP
+        address share a key, but the keys of the two endpoints of a peering always differ.
+        """
+        if "endpoint_vrf_id" in self.__dict__ and not self.has_changed("routing_instance", *self.local_ip_sources):
+            return (self.endpoint_device_id, self.effective_local_ip_id, self.endpoint_vrf_id)
+        local_ip = self.local_ip
+        return (
+            self.routing_instance.device_id if self.routing_instance else None,
+            local_ip.pk if local_ip else None,
+            self.get_vrf_id(local_ip),
+        )
+
+    def save(self, *args, **kwargs):
+        """Save, discarding the `local_ip` and `endpoint_key` annotations if a field they depend on was changed."""
+        if self.has_changed(*self.local_ip_sources):
+            self.__dict__.pop("effective_local_ip_id", None)
+            self._annotated_local_ip = None
+        if self.has_changed("routing_instance", *self.local_ip_sources):
+            self.__dict__.pop("endpoint_vrf_id", None)
+        super().save(*args, **kwargs)
 
     def clean(self):
         """
         Clean Method.
 
+        IP addresses and VRFs are looked up through the active `ValidationContext`, if any.
+
         TODO(mzb):
          - add validation on PeerGroup while removing self.ipaddress -> check related Endpoints.
          - ensure self.peering has no more than > endpoints !.
@@ -567,17 +952,18 @@ class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
         if not local_ip_value:
             raise ValidationError("Endpoint IP not found at any inheritance level .")
 
+        context = ValidationContext.current()
         # Ensure IP related to the routing instance
         if self.routing_instance:
-            if local_ip_value not in IPAddress.objects.filter(interfaces__device_id=self.routing_instance.device.id):
+            if local_ip_value.pk not in context.device_ip_address_ids(self.routing_instance.device_id):
                 raise ValidationError("Peer IP not associated with Routing Instance")
         # Enforce Routing Instance if local IP belongs to the Device
-        elif not self.routing_instance and IPAddressToInterface.objects.filter(ip_address=local_ip_value).exists():
+        elif context.is_ip_address_assigned(local_ip_value.pk):
             raise ValidationError("Must specify Routing Instance for this IP Address")
 
         # Enforce peer group VRF membership
         if self.peer_group is not None:
-            if self.peer_group.vrf and (self.peer_group.vrf not in local_ip_value.parent.vrfs.all()):
+            if self.peer_group.vrf_id and self.peer_group.vrf_id not in context.ip_address_vrf_ids(local_ip_value.pk):
                 raise ValidationError(
                     f"VRF mismatch between {local_ip_value} (VRF {local_ip_value.parent.vrfs.all().first()}) "
                     f"and peer-group {self.peer_group.name} (VRF {self.peer_group.vrf})"
@@ -594,50 +980,70 @@ class PeerEndpoint(PrimaryModel, InheritanceMixin, BGPExtraAttributesMixin):
     "statuses",
     "webhooks",
 )
-class Peering(OrganizationalModel, StatusModel):
+class Peering(OrganizationalModel, StatusModel, FieldSnapshotMixin):
     """Linkage between two PeerEndpoint records."""
 
     natural_key_field_names = ["id"]
 
+    objects = BaseManager.from_queryset(PeeringQuerySet)()
+
     class Meta:
         verbose_name = "BGP Peering"
 
+    def _get_endpoints(self):
+        """Get the first two endpoints of this Peering ordered by PK, using prefetched endpoints if available."""
+        endpoints = get_prefetched(self, "endpoints")
+        if endpoints is None:
+            return list(self.endpoints.order_by("pk")[:2])
+        return sorted(endpoints, key=lambda endpoint: endpoint.pk)[:2]
+
     @property
     def endpoint_a(self):
         """Get the "first" endpoint associated with this Peering."""
-        return self.endpoints.order_by("pk")[0] if self.endpoints.exists() else None
+        endpoints = self._get_endpoints()
+        return endpoints[0] if endpoints else None
 
     @property
     def endpoint_z(self):
         """Get the "second" endpoint associated with this Peering."""
-        return self.endpoints.order_by("pk")[1] if self.endpoints.count() > 1 else None
+        endpoints = self._get_endpoints()
+        return endpoints[1] if len(endpoints) > 1 else None
 
     def __str__(self):
         """String representation of a single Peering."""
-        return f"{self.endpoint_a} ↔︎ {self.endpoint_z}"
+        endpoints = self._get_endpoints() + [None, None]
+        return f"{endpoints[0]} ↔︎ {endpoints[1]}"
+
+    @staticmethod
+    def get_key(endpoints):
+        """Composite natural key of a peering between the given endpoints: the unordered pair of their `endpoint_key`."""
+        return frozenset(endpoint.endpoint_key for endpoint in endpoints)
 
     def update_peers(self):
-        """Update peer field for both PeerEndpoints."""
+        """Update peer field for both PeerEndpoints.
+
+        Only the endpoints whose peer actually changed are saved, and only their `peer` field: the other fields are
+        unchanged and already valid, and `clean()` doesn't depend on the peer.
+        """
         endpoints = self.endpoints.all()
         if len(endpoints) < 2:
             return None
-        if endpoints[0].peer == endpoints[1] and endpoints[1].peer == endpoints[0]:
-            return False
 
         endpoints[0].peer = endpoints[1]
         endpoints[1].peer = endpoints[0]
+        changed_endpoints = [endpoint for endpoint in endpoints[:2] if endpoint.has_changed("peer")]
+        for endpoint in changed_endpoints:
+            endpoint.save(update_fields=["peer", "last_updated"])
 
-        endpoints[0].validated_save()
-        endpoints[1].validated_save()
+        return bool(changed_endpoints)
 
-        return True
-
-    def validate_peers(self):
-        """Peer Sanity Checks."""
-        if self.endpoint_a.routing_instance and self.endpoint_a.routing_instance == self.endpoint_z.routing_instance:
+    def validate_peers(self, endpoints=None):
+        """Peer Sanity Checks, of the given (A, Z) endpoints if they are not saved yet."""
+        endpoint_a, endpoint_z = endpoints if endpoints is not None else (self.endpoint_a, self.endpoint_z)
+        if endpoint_a.routing_instance and endpoint_a.routing_instance == endpoint_z.routing_instance:
             raise ValidationError("Peering between same routing instance not allowed")
 
-        if self.endpoint_a.local_ip == self.endpoint_z.local_ip:
+        if endpoint_a.local_ip == endpoint_z.local_ip:
             raise ValidationError("Peering between same IPs not allowed")
 
 
@@ -650,7 +1056,7 @@ class Peering(OrganizationalModel, StatusModel):
     "relationships",
     "webhooks",
 )
-class AddressFamily(OrganizationalModel, BGPExtraAttributesMixin):
+class AddressFamily(OrganizationalModel, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """Address-family (AFI-SAFI) model for the RoutingInstance and VRF levels of configuration."""
 
     extra_attributes_inheritance = []
@@ -717,12 +1123,18 @@ class AddressFamily(OrganizationalModel, BGPExtraAttributesMixin):
     "relationships",
     "webhooks",
 )
-class PeerGroupAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraAttributesMixin):
+class PeerGroupAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """Address-family (AFI-SAFI) model for PeerGroup-specific configuration."""
 
     @property
     def parent_address_family(self):
         """The routing-instance AddressFamily (if any) that this PeerGroupAddressFamily inherits from."""
+        address_families = get_prefetched(self.peer_group.routing_instance, "address_families")
+        if address_families is not None:
+            return next(
+                (af for af in address_families if af.vrf_id == self.peer_group.vrf_id and af.afi_safi == self.afi_safi),
+                None,
+            )
         try:
             return self.peer_group.routing_instance.address_families.get(
                 vrf=self.peer_group.vrf,
@@ -735,6 +1147,8 @@ class PeerGroupAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraAttr
 
     property_inheritance = {}  # no non-extra-attributes properties inherited from AddressFamily at this time
 
+    objects = BaseManager.from_queryset(PeerGroupAddressFamilyQuerySet)()
+
     afi_safi = models.CharField(max_length=64, choices=AFISAFIChoices, verbose_name="AFI-SAFI")
 
     peer_group = models.ForeignKey(
@@ -787,7 +1201,7 @@ class PeerGroupAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraAttr
     "relationships",
     "webhooks",
 )
-class PeerEndpointAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraAttributesMixin):
+class PeerEndpointAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraAttributesMixin, FieldSnapshotMixin):
     """Address-family (AFI-SAFI) model for PeerEndpoint-specific configuration."""
 
     @property
@@ -796,6 +1210,9 @@ class PeerEndpointAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraA
         try:
             parent_pg = self.peer_endpoint.peer_group
             if parent_pg is not None:
+                address_families = get_prefetched(parent_pg, "address_families")
+                if address_families is not None:
+                    return next((af for af in address_families if af.afi_safi == self.afi_safi), None)
                 return parent_pg.address_families.get(afi_safi=self.afi_safi)
         except PeerGroupAddressFamily.DoesNotExist:
             pass
@@ -804,9 +1221,20 @@ class PeerEndpointAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraA
     @property
     def parent_address_family(self):
         """The routing-instance AddressFamily (if any) that this PeerEndpointAddressFamily inherits from."""
+        vrf = self.peer_endpoint.local_ip.parent.vrfs.all().first()  # TODO(mzb): If local IP has >1 vrfs ?
+        address_families = get_prefetched(self.peer_endpoint.routing_instance, "address_families")
+        if address_families is not None:
+            return next(
+                (
+                    af
+                    for af in address_families
+                    if af.vrf_id == getattr(vrf, "pk", None) and af.afi_safi == self.afi_safi
+                ),
+                None,
+            )
         try:
             return self.peer_endpoint.routing_instance.address_families.get(
-                vrf=self.peer_endpoint.local_ip.parent.vrfs.all().first(),  # TODO(mzb): If local IP has >1 vrfs ?
+                vrf=vrf,
                 afi_safi=self.afi_safi,
             )
         except AddressFamily.DoesNotExist:
@@ -820,6 +1248,8 @@ class PeerEndpointAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraA
         "multipath": ["parent_peer_group_address_family"],
     }
 
+    objects = BaseManager.from_queryset(PeerEndpointAddressFamilyQuerySet)()
+
     afi_safi = models.CharField(max_length=64, choices=AFISAFIChoices, verbose_name="AFI-SAFI")
 
     peer_endpoint = models.ForeignKey(
@@ -861,3 +1291,120 @@ class PeerEndpointAddressFamily(OrganizationalModel, InheritanceMixin, BGPExtraA
     def __str__(self):
         """String representation."""
         return f"{self.afi_safi} AF - {self.peer_endpoint}"
+
+
+class PeerEndpointEffective(BaseModel):
+    """Fully resolved (inherited) configuration of a single PeerEndpoint.
+
+    Records are denormalized copies maintained by the signal handlers in `signals.py` whenever a PeerEndpoint or any
+    object it inherits from is saved or deleted; `rebuild()` recomputes them from scratch.
+    """
+
+    peer_endpoint = models.OneToOneField(
+        to=PeerEndpoint,
+        on_delete=models.CASCADE,
+        related_name="effective",
+    )
+    autonomous_system = models.ForeignKey(
+        to=AutonomousSystem,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    enabled = models.BooleanField(blank=True, null=True)
+    role = models.ForeignKey(
+        to="extras.Role",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    source_ip = models.ForeignKey(
+        to="ipam.IPAddress",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    source_interface = models.ForeignKey(
+        to="dcim.Interface",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    local_ip = models.ForeignKey(
+        to="ipam.IPAddress",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    vrf = models.ForeignKey(
+        to="ipam.VRF",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    extra_attributes = models.JSONField(encoder=DjangoJSONEncoder, blank=True, null=True)
+
+    natural_key_field_names = ["peer_endpoint"]
+
+    class Meta:
+        verbose_name = "BGP Peer Endpoint effective configuration"
+
+    def __str__(self):
+        """String."""
+        return f"Effective configuration of {self.peer_endpoint}"
+
+    @classmethod
+    def from_peer_endpoint(cls, peer_endpoint):
+        """Build an (unsaved) record resolving all inherited values of `peer_endpoint`."""
+        fields = peer_endpoint.get_fields(include_inherited=True)
+        local_ip = peer_endpoint.local_ip
+
+        return cls(
+            peer_endpoint=peer_endpoint,
+            autonomous_system=fields["autonomous_system"]["value"],
+            enabled=fields["enabled"]["value"],
+            role=fields["role"]["value"],
+            source_ip=fields["source_ip"]["value"],
+            source_interface=fields["source_interface"]["value"],
+            local_ip=local_ip,
+            vrf_id=peer_endpoint.get_vrf_id(local_ip),
+            extra_attributes=peer_endpoint.get_extra_attributes(),
+        )
+
+    @classmethod
+    def rebuild(cls, peer_endpoints=None, batch_size=1000):
+        """Recompute the records of the given PeerEndpoint queryset (all PeerEndpoints by default).
+
+        Returns the number of records written.
+        """
+        if peer_endpoints is None:
+            peer_endpoints = PeerEndpoint.objects.all()
+        pks = list(peer_endpoints.order_by("pk").values_list("pk", flat=True))
+        queryset = (
+            PeerEndpoint.objects.prefetch_inherited()
+            .select_related("peer_group__vrf", "source_ip__parent", "peer_group__source_ip__parent")
+            .prefetch_related("source_ip__parent__vrfs", "peer_group__source_ip__parent__vrfs")
+        )
+
+        # Existing records are updated in place, keeping their primary key, rather than deleted and created again:
+        # deletions run Nautobot's delete signal receivers record by record
+        fields = [field.name for field in cls._meta.concrete_fields if not field.primary_key]
+        count = 0
+        with transaction.atomic():
+            for start in range(0, len(pks), batch_size):
+                end = start + batch_size
+                batch = pks[start:end]
+                records = [cls.from_peer_endpoint(peer_endpoint) for peer_endpoint in queryset.filter(pk__in=batch)]
+                existing = dict(cls.objects.filter(peer_endpoint__in=batch).values_list("peer_endpoint", "pk"))
+                for record in records:
+                    record.pk = existing.get(record.peer_endpoint_id, record.pk)
+                cls.objects.bulk_update([record for record in records if record.peer_endpoint_id in existing], fields)
+                cls.objects.bulk_create([record for record in records if record.peer_endpoint_id not in existing])
+                count += len(records)
+        return count
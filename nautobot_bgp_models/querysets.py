@@ -0,0 +1,364 @@
+"""Custom QuerySets for nautobot_bgp_models."""
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Case, Exists, F, OuterRef, Prefetch, Q, Subquery, UUIDField, Value, When
+from django.db.models.functions import Coalesce, NullIf
+from nautobot.core.models.querysets import RestrictedQuerySet
+
+
+class AutonomousSystemQuerySet(RestrictedQuerySet):
+    """QuerySet for AutonomousSystem."""
+
+    def with_containing_range(self):
+        """Annotate each record with the PK (`containing_range_id`) and name (`containing_range_name`) of its range.
+
+        Ranges created before their overlaps were validated may still overlap; an ASN in several ranges is annotated
+        with the one starting closest to it.
+        """
+        autonomous_system_range = apps.get_model("nautobot_bgp_models", "AutonomousSystemRange")
+        containing = autonomous_system_range.objects.filter(
+            asn_min__lte=OuterRef("asn"), asn_max__gte=OuterRef("asn")
+        ).order_by("-asn_min")[:1]
+        return self.annotate(
+            containing_range_id=Subquery(containing.values("pk")),
+            containing_range_name=Subquery(containing.values("name")),
+        )
+
+
+class AutonomousSystemRangeQuerySet(RestrictedQuerySet):
+    """QuerySet for AutonomousSystemRange."""
+
+    def containing(self, asn):
+        """Return the ranges containing ASN `asn`."""
+        return self.overlapping(asn, asn)
+
+    def overlapping(self, asn_min, asn_max):
+        """Return the ranges sharing at least one ASN with the `asn_min`-`asn_max` interval.
+
+        The lookup doesn't assume that the ranges are disjoint, as ranges created before their overlaps were validated
+        may still overlap: it scans the `(asn_min, asn_max)` index up to `asn_max`.
+        """
+        return self.filter(asn_min__lte=asn_max, asn_max__gte=asn_min)
+
+
+class InheritanceQuerySet(RestrictedQuerySet):
+    """QuerySet for models using `InheritanceMixin`, able to resolve inherited fields in the database."""
+
+    def with_inherited(self, *field_names):
+        """Annotate each record with the effective value of the given fields (all of `property_inheritance` by default).
+
+        Each field is exposed as an `effective_<field_name>` annotation, computed with a single `Coalesce` across
+        the field's inheritance path. As with `values()`, foreign keys are annotated with the related object's PK.
+
+        The annotations mirror `InheritanceMixin.get_inherited_field()`: a falsy value (`None`, `""`, `False`) at
+        one level falls through to the next level, and `None` is returned if no level provides a truthy value.
+        """
+        return self.annotate(
+            **{
+                f"effective_{field_name}": self.inherited_field_expression(
+                    field_name, self.model.property_inheritance[field_name]
+                )
+                for field_name in field_names or self.model.property_inheritance
+            }
+        )
+
+    def prefetch_inherited(self):
+        """Load every object along the inheritance paths together with the records themselves.
+
+        `get_inherited_field()` and `get_extra_attributes()` walk `property_inheritance` and
+        `extra_attributes_inheritance` one related object at a time; with this method applied, all of those objects
+        are fetched up front for the whole queryset, so that inherited values get resolved in memory.
+        """
+        return self.select_related(*sorted(self._inheritance_select_related()))
+
+    def _inheritance_select_related(self):
+        """Return the `select_related()` lookups covering the inheritance paths of this model."""
+        paths = set(getattr(self.model, "extra_attributes_inheritance", []))
+        for field_name, inheritance_path in self.model.property_inheritance.items():
+            paths.update(inheritance_path)
+            if self.model._meta.get_field(field_name).is_relation:
+                paths.add(field_name)
+                paths.update(f"{path_element}.{field_name}" for path_element in inheritance_path)
+
+        lookups = set()
+        for path in paths:
+            model = self.model
+            components = []
+            for component in path.split("."):
+                try:
+                    field = model._meta.get_field(component)
+                except FieldDoesNotExist:
+                    break  # A Python property, to be handled by subclasses
+                if not (field.many_to_one or field.one_to_one):
+                    break
+                components.append(component)
+                model = field.related_model
+            if components:
+                lookups.add("__".join(components))
+        return lookups
+
+    def inherited_field_expression(self, field_name, inheritance_path):
+        """Return a `Coalesce` expression resolving `field_name` along `inheritance_path`."""
+        field = self.model._meta.get_field(field_name)
+        if field.is_relation:
+            output_field = field.target_field.__class__()
+        else:
+            output_field = field.__class__()
+
+        expressions = [self._nullif_falsy(F(field_name), field)]
+        for path_element in inheritance_path:
+            expression = self.inherited_path_expression(path_element, field_name)
+            expressions.append(self._nullif_falsy(expression, field))
+
+        return Coalesce(*expressions, output_field=output_field)
+
+    def inherited_path_expression(self, path_element, field_name):
+        """Return the expression for the value of `field_name` on the object found at `path_element`.
+
+        `path_element` uses the same dotted notation as `property_inheritance`; subclasses can override this to
+        translate inheritance paths that go through Python properties rather than database relations.
+        """
+        return F(f"{path_element.replace('.', '__')}__{field_name}")
+
+    @staticmethod
+    def _nullif_falsy(expression, field):
+        """Turn the falsy values of a non-nullable column into NULL, so that Coalesce falls through them."""
+        if isinstance(field, models.BooleanField):
+            return NullIf(expression, Value(False))
+        if isinstance(field, models.CharField):
+            return NullIf(expression, Value(""))
+        return expression
+
+
+class PeerGroupAddressFamilyQuerySet(InheritanceQuerySet):
+    """QuerySet for PeerGroupAddressFamily records."""
+
+    def prefetch_inherited(self):
+        """Also prefetch the routing-instance address families looked up by `parent_address_family`."""
+        return (
+            super()
+            .prefetch_inherited()
+            .select_related("peer_group__routing_instance", "peer_group__vrf")
+            .prefetch_related("peer_group__routing_instance__address_families")
+        )
+
+
+class PeerEndpointAddressFamilyQuerySet(InheritanceQuerySet):
+    """QuerySet for PeerEndpointAddressFamily records."""
+
+    def prefetch_inherited(self):
+        """Also prefetch the parent address families looked up by the `parent_*` properties."""
+        return (
+            super()
+            .prefetch_inherited()
+            .select_related(
+                "peer_endpoint__peer_group",
+                "peer_endpoint__routing_instance",
+                "peer_endpoint__source_ip__parent",
+                "peer_endpoint__peer_group__source_ip__parent",
+            )
+            .prefetch_related(
+                "peer_endpoint__peer_group__address_families",
+                "peer_endpoint__routing_instance__address_families",
+                "peer_endpoint__source_ip__parent__vrfs",
+                "peer_endpoint__peer_group__source_ip__parent__vrfs",
+            )
+        )
+
+    def inherited_path_expression(self, path_element, field_name):
+        """Resolve `parent_peer_group_address_family` as a correlated subquery."""
+        if path_element == "parent_peer_group_address_family":
+            peer_group_address_family = apps.get_model("nautobot_bgp_models", "PeerGroupAddressFamily")
+            return Subquery(
+                peer_group_address_family.objects.filter(
+                    peer_group=OuterRef("peer_endpoint__peer_group"),
+                    afi_safi=OuterRef("afi_safi"),
+                ).values(field_name)[:1]
+            )
+        return super().inherited_path_expression(path_element, field_name)
+
+
+class PeerEndpointQuerySet(InheritanceQuerySet):
+    """QuerySet for PeerEndpoint records."""
+
+    def prefetch_display(self):
+        """Load everything `__str__()` needs (device, inherited ASN and local IP) together with the records."""
+        return (
+            self.prefetch_inherited()
+            .select_related("routing_instance__device")
+            .prefetch_related(
+                "source_interface__ip_addresses",
+                "peer_group__source_interface__ip_addresses",
+            )
+        )
+
+    def with_local_ip(self):
+        """Annotate each record with `effective_local_ip_id`, the PK of the IP address `PeerEndpoint.local_ip` returns.
+
+        The same precedence is applied in the database: the inherited `source_ip` if any, else the only IP address
+        assigned to the inherited `source_interface` (NULL if that interface has no or several IP addresses).
+        """
+        return self.annotate(effective_local_ip_id=self.local_ip_expression())
+
+    def local_ip_expression(self):
+        """Return the expression computing the PK of the effective local IP of a record, see `with_local_ip()`."""
+        ip_address_to_interface = apps.get_model("ipam", "IPAddressToInterface")
+        source_interface = Coalesce(
+            OuterRef("source_interface"),
+            *(
+                OuterRef(f"{path_element.replace('.', '__')}__source_interface")
+                for path_element in self.model.property_inheritance["source_interface"]
+            ),
+        )
+        other_assignments = ip_address_to_interface.objects.filter(interface=OuterRef("interface")).exclude(
+            pk=OuterRef("pk")
+        )
+        sole_ip_address = (
+            ip_address_to_interface.objects.filter(interface=source_interface)
+            .filter(~Exists(other_assignments))
+            .values("ip_address")[:1]
+        )
+        return Coalesce(
+            self.inherited_field_expression("source_ip", self.model.property_inheritance["source_ip"]),
+            Subquery(sole_ip_address),
+            output_field=UUIDField(),
+        )
+
+    def with_endpoint_key(self):
+        """Annotate each record with the parts of its `PeerEndpoint.endpoint_key`.
+
+        The annotations are `endpoint_device_id`, `effective_local_ip_id` and `endpoint_vrf_id`. The local IP and VRF
+        are read from the `PeerEndpointEffective` record of the endpoint if it has one, and computed from the live
+        records otherwise: the local IP as `with_local_ip()` does, and the VRF of the peer group if any, else the
+        first VRF of the parent prefix of the local IP.
+        """
+        vrf_prefix_assignment = apps.get_model("ipam", "VRFPrefixAssignment")
+        vrf_ordering = [
+            f"-vrf__{field[1:]}" if field.startswith("-") else f"vrf__{field}"
+            for field in apps.get_model("ipam", "VRF")._meta.ordering
+        ]
+        parent_vrf = (
+            vrf_prefix_assignment.objects.filter(prefix__ip_addresses=OuterRef("effective_local_ip_id"))
+            .order_by(*vrf_ordering)
+            .values("vrf")[:1]
+        )
+        has_effective = Q(effective__isnull=False)
+        return self.annotate(
+            endpoint_device_id=F("routing_instance__device"),
+            effective_local_ip_id=Case(
+                When(has_effective, then=F("effective__local_ip")),
+                default=self.local_ip_expression(),
+                output_field=UUIDField(),
+            ),
+            endpoint_vrf_id=Case(
+                When(has_effective, then=F("effective__vrf")),
+                default=Coalesce(F("peer_group__vrf"), Subquery(parent_vrf), output_field=UUIDField()),
+                output_field=UUIDField(),
+            ),
+        )
+
+
+class PeeringQuerySet(RestrictedQuerySet):
+    """QuerySet for Peering records."""
+
+    def prefetch_endpoints(self):
+        """Prefetch the endpoints of each Peering, with everything needed to display them.
+
+        This covers `Peering.endpoint_a`, `Peering.endpoint_z` and the endpoints' `__str__()` (device, inherited ASN
+        and local IP), so that a list of peerings is rendered with a constant number of queries.
+        """
+        peer_endpoint = apps.get_model("nautobot_bgp_models", "PeerEndpoint")
+        return self.prefetch_related(
+            Prefetch(
+                "endpoints",
+                queryset=peer_endpoint.objects.prefetch_display().order_by("pk"),
+            )
+        )
+
+    def with_endpoint_details(self):
+        """Annotate each Peering with details about its A and Z endpoints, computed with subqueries.
+
+        The annotations are `endpoint_<side>_device` (device name), `endpoint_<side>_local_ip` (host address of the
+        local IP), `endpoint_<side>_asn` (effective ASN) and `endpoint_<side>_provider` (provider name of the
+        effective ASN), where `<side>` is `a` or `z`, matching `Peering.endpoint_a` and `Peering.endpoint_z`.
+        They can be used for filtering and ordering.
+        """
+        peer_endpoint = apps.get_model("nautobot_bgp_models", "PeerEndpoint")
+        autonomous_system = apps.get_model("nautobot_bgp_models", "AutonomousSystem")
+        ip_address = apps.get_model("ipam", "IPAddress")
+
+        endpoints = (
+            peer_endpoint.objects.filter(peering=OuterRef("pk"))
+            .with_local_ip()
+            .annotate(
+                effective_autonomous_system=peer_endpoint.objects.inherited_field_expression(
+                    "autonomous_system", peer_endpoint.property_inheritance["autonomous_system"]
+                )
+            )
+            .order_by("pk")
+        )
+        effective_autonomous_system = autonomous_system.objects.filter(pk=OuterRef("effective_autonomous_system"))
+        details = {
+            "device": endpoints.values("routing_instance__device__name"),
+            "local_ip": endpoints.annotate(
+                local_ip_host=Subquery(ip_address.objects.filter(pk=OuterRef("effective_local_ip_id")).values("host"))
+            ).values("local_ip_host"),
+            "asn": endpoints.annotate(asn=Subquery(effective_autonomous_system.values("asn"))).values("asn"),
+            "provider": endpoints.annotate(
+                provider_name=Subquery(effective_autonomous_system.values("provider__name"))
+            ).values("provider_name"),
+        }
+
+        annotations = {}
+        for index, side in enumerate(("a", "z")):
+            for name, queryset in details.items():
+                annotations[f"endpoint_{side}_{name}"] = Subquery(queryset[index:][:1])
+        return self.annotate(**annotations)
+
+    def match_keys(self, keys):
+        """Map each of the given peering keys (see `Peering.get_key()`) to the PKs of the matching peerings.
+
+        All the keys are matched with a single query, on the keys of the endpoints annotated by
+        `PeerEndpoint.objects.with_endpoint_key()`. Endpoints are looked up by the indexed local IP of their
+        `PeerEndpointEffective` record; the few without one are looked up by their own or their peer group's source IP
+        or source interface instead, and their keys computed from the live records. Keys without any matching peering
+        are left out.
+        """
+        peer_endpoint = apps.get_model("nautobot_bgp_models", "PeerEndpoint")
+        peer_group = apps.get_model("nautobot_bgp_models", "PeerGroup")
+        ip_address_to_interface = apps.get_model("ipam", "IPAddressToInterface")
+        keys = set(keys)
+        local_ip_ids = {local_ip_id for key in keys for _, local_ip_id, _ in key} - {None}
+        interfaces = ip_address_to_interface.objects.filter(ip_address__in=local_ip_ids).values("interface")
+        peer_groups = peer_group.objects.filter(Q(source_ip__in=local_ip_ids) | Q(source_interface__in=interfaces))
+        endpoints = peer_endpoint.objects.filter(peering__in=self)
+        stored = endpoints.filter(effective__local_ip__in=local_ip_ids)
+        live = (
+            endpoints.filter(effective__isnull=True)
+            .filter(
+                Q(source_ip__in=local_ip_ids)
+                | Q(source_interface__in=interfaces)
+                | Q(peer_group__in=peer_groups.values("pk"))
+            )
+            .with_endpoint_key()
+            .filter(effective_local_ip_id__in=local_ip_ids)
+        )
+        fields = ["peering", "endpoint_device_id", "effective_local_ip_id", "endpoint_vrf_id"]
+        candidates = (
+            stored.with_endpoint_key()
+            .order_by()
+            .values_list(*fields)
+            .union(live.order_by().values_list(*fields), all=True)
+        )
+        endpoint_keys = {}
+        for peering_id, *endpoint_key in candidates:
+            endpoint_keys.setdefault(peering_id, set()).add(tuple(endpoint_key))
+
+        matches = {}
+        for peering_id, peering_endpoint_keys in endpoint_keys.items():
+            key = frozenset(peering_endpoint_keys)
+            if key in keys:
+                matches.setdefault(key, []).append(peering_id)
+        return matches
@@ -1,7 +1,19 @@
 """Nautobot signal handler functions for nautobot_bgp_models."""
 
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import reduce
+import operator
+
 from django.apps import apps as global_apps
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from nautobot.ipam.models import IPAddress, IPAddressToInterface, VRFPrefixAssignment
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.asn_index import allocated_asn_index
+from nautobot_bgp_models.cache import extra_attributes_cache
 
 PLUGIN_SETTINGS = settings.PLUGINS_CONFIG["nautobot_bgp_models"]
 
@@ -29,3 +41,140 @@ def post_migrate_create_statuses(sender, *, apps=global_apps, **kwargs):
             if ct_model not in status.content_types.all():
                 status.content_types.add(ct_model)
                 status.save()
+
+
+def invalidate_extra_attributes_cache(sender, instance, **kwargs):
+    """Callback function for post_save() and post_delete() -- evict the cached extra attributes depending on instance."""
+    extra_attributes_cache.invalidate(instance)
+
+
+# Fields of each model the PeerEndpointEffective records depend on
+EFFECTIVE_DEPENDENCIES = {
+    models.PeerEndpoint: (
+        "autonomous_system",
+        "enabled",
+        "role",
+        "source_ip",
+        "source_interface",
+        "peer_group",
+        "routing_instance",
+        "extra_attributes",
+    ),
+    models.PeerGroup: (
+        "autonomous_system",
+        "enabled",
+        "role",
+        "source_ip",
+        "source_interface",
+        "vrf",
+        "peergroup_template",
+        "routing_instance",
+        "extra_attributes",
+    ),
+    models.PeerGroupTemplate: ("autonomous_system", "enabled", "role", "extra_attributes"),
+    models.BGPRoutingInstance: ("autonomous_system", "device", "extra_attributes"),
+}
+
+
+# Queries of the PeerEndpoints to rebuild collected by `deferred_peer_endpoint_effective_rebuild()`, if active
+deferred_rebuild_queries = ContextVar("nautobot_bgp_models_deferred_rebuild_queries", default=None)
+
+
+@contextmanager
+def deferred_peer_endpoint_effective_rebuild(batch_size=1000):
+    """Rebuild the PeerEndpointEffective records the signals sent within the block affect together, when it ends.
+
+    For bulk operations sending the signals of many records, which would otherwise each rebuild their records once
+    the transaction commits. Nothing is rebuilt if the block raises an exception.
+    """
+    queries = []
+    token = deferred_rebuild_queries.set(queries)
+    try:
+        yield
+    finally:
+        deferred_rebuild_queries.reset(token)
+    while queries:
+        batch, queries = queries[:batch_size], queries[batch_size:]
+        models.PeerEndpointEffective.rebuild(models.PeerEndpoint.objects.filter(reduce(operator.or_, batch)))
+
+
+def rebuild_peer_endpoint_effective_on_commit(query):
+    """Rebuild the PeerEndpointEffective records of the PeerEndpoints matching `query` once the transaction commits.
+
+    The endpoints are only looked up then, so that a transaction changing many records doesn't rebuild them while it
+    runs, and so that changes Nautobot makes after the signal was sent, such as reparenting IP addresses, are seen.
+    Within `deferred_peer_endpoint_effective_rebuild()`, they are rebuilt when it ends instead.
+    """
+    queries = deferred_rebuild_queries.get()
+    if queries is not None:
+        queries.append(query)
+        return
+    transaction.on_commit(lambda: models.PeerEndpointEffective.rebuild(models.PeerEndpoint.objects.filter(query)))
+
+
+def refresh_peer_endpoint_effective(sender, instance, raw=False, created=None, update_fields=None, **kwargs):
+    """Callback function for post_save() and post_delete() -- refresh the affected PeerEndpointEffective records.
+
+    Saves of existing records that didn't change any field the PeerEndpointEffective records depend on are ignored.
+    The fields saved in bulk, whose signals are sent for records loaded afterwards, are given by `update_fields`.
+    """
+    if raw or sender not in EFFECTIVE_DEPENDENCIES:
+        return
+    # `created` is only given by post_save()
+    dependencies = EFFECTIVE_DEPENDENCIES[sender]
+    if (
+        created is False
+        and not instance.has_changed(*dependencies)
+        and not {sender._meta.get_field(name).name for name in update_fields or ()} & set(dependencies)
+    ):
+        return
+
+    if sender is models.PeerEndpoint:
+        query = Q(pk=instance.pk)
+    elif sender is models.PeerGroup:
+        query = Q(peer_group=instance.pk)
+    elif sender is models.PeerGroupTemplate:
+        query = Q(peer_group__peergroup_template=instance.pk)
+    else:
+        query = Q(routing_instance=instance.pk) | Q(peer_group__routing_instance=instance.pk)
+
+    rebuild_peer_endpoint_effective_on_commit(query)
+
+
+def refresh_peer_endpoint_effective_local_ip(sender, instance, raw=False, **kwargs):
+    """Callback function for post_save() and post_delete() of IPAM models -- refresh the affected local IPs and VRFs.
+
+    The local IP of an endpoint may come from the IP addresses of its source interface, and its VRF from the parent
+    prefix of its local IP, so the PeerEndpointEffective records depend on these IPAM records as well.
+    """
+    if raw:
+        return
+
+    if sender is IPAddressToInterface:
+        if instance.interface_id is None:
+            return
+        query = Q(source_interface=instance.interface_id) | Q(peer_group__source_interface=instance.interface_id)
+    elif sender is IPAddress:
+        query = Q(effective__local_ip=instance.pk)
+    elif sender is VRFPrefixAssignment:
+        query = Q(effective__local_ip__parent=instance.prefix_id)
+    else:  # Prefix
+        # Nautobot reparents the child IP addresses of a prefix to it when it is saved, and to its parent when it is
+        # deleted; this is done by the time the transaction commits
+        query = Q(effective__local_ip__parent__in=[pk for pk in (instance.pk, instance.parent_id) if pk])
+
+    rebuild_peer_endpoint_effective_on_commit(query)
+
+
+def update_allocated_asn_index_on_save(sender, instance, created=False, raw=False, **kwargs):
+    """Callback function for post_save() -- add the AutonomousSystem to the allocated ASN index once committed."""
+    if raw:
+        return
+    asn, last_updated = instance.asn, instance.last_updated
+    transaction.on_commit(lambda: allocated_asn_index.record_save(asn, last_updated, created))
+
+
+def update_allocated_asn_index_on_delete(sender, instance, **kwargs):
+    """Callback function for post_delete() -- remove the AutonomousSystem from the allocated ASN index once committed."""
+    asn, last_updated = instance.asn, instance.last_updated
+    transaction.on_commit(lambda: allocated_asn_index.record_delete(asn, last_updated))
@@ -15,6 +15,20 @@ from nautobot.apps.tables import (
 
 from . import models
 
+CONTAINING_RANGE_LINK = """
+{% if record.containing_range_id %}
+<a href="{% url 'plugins:nautobot_bgp_models:autonomoussystemrange' pk=record.containing_range_id %}">\
+{{ record.containing_range_name }}</a>
+{% else %}
+&mdash;
+{% endif %}
+"""
+
+UTILIZATION_GRAPH = """
+{% load helpers %}
+{% utilization_graph record.get_utilization %}
+"""
+
 ASN_LINK = """
 {% if record.present_in_database %}
 <a href="{{ record.get_absolute_url }}">{{ record.asn }}</a>
@@ -38,11 +52,14 @@ class AutonomousSystemTable(StatusTableMixin, BaseTable):
     tags = TagColumn(url_name="plugins:nautobot_bgp_models:autonomoussystem_list")
     actions = ButtonsColumn(model=models.AutonomousSystem)
     asn_asdot = tables.Column(accessor=A("asn_asdot"), linkify=True, order_by=A("asn"), verbose_name="ASN ASDOT")
+    containing_range = tables.TemplateColumn(
+        template_code=CONTAINING_RANGE_LINK, order_by=A("containing_range_name"), verbose_name="Range"
+    )
 
     class Meta(BaseTable.Meta):
         model = models.AutonomousSystem
-        fields = ("pk", "asn", "asn_asdot", "status", "provider", "description", "tags")
-        default_columns = ("pk", "asn", "status", "provider", "description", "tags")
+        fields = ("pk", "asn", "asn_asdot", "status", "provider", "containing_range", "description", "tags")
+        default_columns = ("pk", "asn", "status", "provider", "containing_range", "description", "tags")
 
 
 class AutonomousSystemRangeTable(StatusTableMixin, BaseTable):
@@ -53,12 +70,14 @@ class AutonomousSystemRangeTable(StatusTableMixin, BaseTable):
     asn_min = tables.LinkColumn()
     asn_max = tables.LinkColumn()
     tenant = tables.LinkColumn()
+    utilization = tables.TemplateColumn(template_code=UTILIZATION_GRAPH, orderable=False)
+    available = tables.Column(accessor=A("get_available_count"), orderable=False, verbose_name="Available ASNs")
     tags = TagColumn(url_name="plugins:nautobot_bgp_models:autonomoussystemrange_list")
     actions = ButtonsColumn(model=models.AutonomousSystemRange)
 
     class Meta(BaseTable.Meta):
         model = models.AutonomousSystemRange
-        fields = ("pk", "name", "asn_min", "asn_max", "tenant", "description", "tags")
+        fields = ("pk", "name", "asn_min", "asn_max", "tenant", "utilization", "available", "description", "tags")
 
 
 class BGPRoutingInstanceTable(StatusTableMixin, BaseTable):
@@ -223,7 +242,7 @@ class PeerEndpointTable(BaseTable):
 class PeeringTable(StatusTableMixin, BaseTable):
     """Table representation of Peering records."""
 
-    # TODO(mzb): Add columns: Device_A, Device_B, Provider_A, Provider_Z
+    # The endpoint_a_* and endpoint_z_* columns rely on the annotations of `PeeringQuerySet.with_endpoint_details()`
 
     pk = ToggleColumn()
     peering = tables.LinkColumn(
@@ -233,13 +252,23 @@ class PeeringTable(StatusTableMixin, BaseTable):
         orderable=False,
     )
 
+    endpoint_a_device = tables.Column(verbose_name="Device A")
     endpoint_a = tables.LinkColumn(
-        verbose_name="Endpoint", text=lambda x: str(x.endpoint_a.local_ip) if x.endpoint_a else None, orderable=False
+        verbose_name="Endpoint",
+        text=lambda x: str(x.endpoint_a.local_ip) if x.endpoint_a else None,
+        order_by=("endpoint_a_local_ip",),
     )
+    endpoint_a_asn = tables.Column(verbose_name="ASN A")
+    endpoint_a_provider = tables.Column(verbose_name="Provider A")
 
+    endpoint_z_device = tables.Column(verbose_name="Device Z")
     endpoint_z = tables.LinkColumn(
-        verbose_name="Endpoint", text=lambda x: str(x.endpoint_z.local_ip) if x.endpoint_z else None, orderable=False
+        verbose_name="Endpoint",
+        text=lambda x: str(x.endpoint_z.local_ip) if x.endpoint_z else None,
+        order_by=("endpoint_z_local_ip",),
     )
+    endpoint_z_asn = tables.Column(verbose_name="ASN Z")
+    endpoint_z_provider = tables.Column(verbose_name="Provider Z")
     actions = ButtonsColumn(model=models.Peering)
 
     class Meta(BaseTable.Meta):
@@ -247,10 +276,26 @@ class PeeringTable(StatusTableMixin, BaseTable):
         fields = (
             "pk",
             "peering",
+            "endpoint_a_device",
             "endpoint_a",
+            "endpoint_a_asn",
+            "endpoint_a_provider",
+            "endpoint_z_device",
             "endpoint_z",
+            "endpoint_z_asn",
+            "endpoint_z_provider",
             "status",
         )
+        default_columns = (
+            "pk",
+            "peering",
+            "endpoint_a_device",
+            "endpoint_a",
+            "endpoint_z_device",
+            "endpoint_z",
+            "status",
+            "actions",
+        )
 
 
 class AddressFamilyTable(BaseTable):
@@ -0,0 +1,31 @@
+"""Benchmarks for nautobot_bgp_models.
+
+Benchmark modules are named `bench_*.py` so that they aren't collected with the unit tests; run them with
+`invoke benchmark`, or `nautobot-server test nautobot_bgp_models.tests.benchmarks --pattern "bench_*.py"`.
+Sizes can be adjusted through the environment variables documented in each module.
+"""
+
+import os
+import time
+
+
+def env_int(name, default):
+    """Return the integer value of environment variable `name`, or `default` if unset."""
+    return int(os.environ.get(name, default))
+
+
+def timed(function, repeat=5):
+    """Return the best wall-clock time in seconds of `repeat` calls of `function`."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(title, results):
+    """Print a table of `(label, seconds)` timings."""
+    print(f"\n{title}")
+    for label, seconds in results:
+        print(f"  {label:<50} {seconds * 1000:>10.3f} ms")
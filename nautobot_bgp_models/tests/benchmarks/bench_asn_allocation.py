@@ -0,0 +1,111 @@
+"""Stress test of the concurrent allocation of ASNs through the available-asns REST API endpoint.
+
+Several threads, each with its own database connection, allocate ASNs from the same range at the same time. The test
+checks that no ASN was allocated twice and reports the allocation throughput.
+
+Environment variables:
+
+- `BGP_BENCHMARK_ALLOCATION_THREADS`: number of concurrent clients (default: 8)
+- `BGP_BENCHMARK_ALLOCATION_REQUESTS`: number of requests sent by each client (default: 25)
+- `BGP_BENCHMARK_ALLOCATION_BATCH`: number of ASNs allocated by each request (default: 4)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import reverse
+from nautobot.extras.models import ObjectChange, Status
+from nautobot.users.models import Token
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.tests.benchmarks import env_int, report
+
+
+class AvailableASNsAllocationBenchmark(SimpleTestCase):
+    """Allocate ASNs from concurrent threads and check that none is allocated twice.
+
+    The allocations have to be committed to be visible to the other threads, so this doesn't run in a test transaction;
+    the created objects are deleted when the test ends instead.
+    """
+
+    databases = {"default"}
+
+    def setUp(self):
+        """Create the range to allocate from, and a user with an API token."""
+        self.threads = env_int("BGP_BENCHMARK_ALLOCATION_THREADS", 8)
+        self.requests = env_int("BGP_BENCHMARK_ALLOCATION_REQUESTS", 25)
+        self.batch = env_int("BGP_BENCHMARK_ALLOCATION_BATCH", 4)
+
+        self.status_active = Status.objects.get(name__iexact="active")
+        # Leave a few allocated ASNs in the way, so that allocations span several blocks
+        self.asn_range = models.AutonomousSystemRange.objects.create(
+            name="Allocation benchmark", asn_min=4200000000, asn_max=4294967294
+        )
+        self.addCleanup(self.asn_range.delete)
+        self.addCleanup(
+            lambda: models.AutonomousSystem.objects.filter(
+                asn__gte=self.asn_range.asn_min, asn__lte=self.asn_range.asn_max
+            ).delete()
+        )
+        models.AutonomousSystem.objects.bulk_create(
+            [
+                models.AutonomousSystem(asn=self.asn_range.asn_min + offset, status=self.status_active)
+                for offset in range(0, 1000, 7)
+            ]
+        )
+
+        user = get_user_model().objects.create(username="allocation-benchmark", is_superuser=True)
+        self.addCleanup(user.delete)
+        self.addCleanup(lambda: ObjectChange.objects.filter(user=user).delete())
+        self.token = Token.objects.create(user=user)
+
+    def _allocate(self, barrier):
+        """Send the requests of one client, returning the allocated ASNs."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        url = reverse(
+            "plugins-api:nautobot_bgp_models-api:autonomoussystemrange-available-asns",
+            kwargs={"pk": self.asn_range.pk},
+        )
+        data = [{"status": str(self.status_active.pk)} for _ in range(self.batch)]
+        asns = []
+        try:
+            barrier.wait()
+            for _ in range(self.requests):
+                response = client.post(url, data, format="json")
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+                asns.extend(item["asn"] for item in response.data)
+        finally:
+            connection.close()
+        return asns
+
+    def test_concurrent_allocation(self):
+        """No ASN is allocated twice, and every allocated ASN belongs to the range."""
+        barrier = threading.Barrier(self.threads + 1)
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = [executor.submit(self._allocate, barrier) for _ in range(self.threads)]
+            barrier.wait()
+            start = time.perf_counter()
+            allocated = [asn for future in futures for asn in future.result()]
+            elapsed = time.perf_counter() - start
+
+        expected_count = self.threads * self.requests * self.batch
+        self.assertEqual(len(allocated), expected_count)
+        self.assertEqual(len(set(allocated)), expected_count, "Some ASNs were allocated more than once")
+        self.assertTrue(all(self.asn_range.asn_min <= asn <= self.asn_range.asn_max for asn in allocated))
+        self.assertEqual(
+            models.AutonomousSystem.objects.filter(asn__in=allocated).count(),
+            expected_count,
+        )
+
+        report(
+            f"Concurrent ASN allocation ({self.threads} threads x {self.requests} requests x {self.batch} ASNs)",
+            [("Total", elapsed)],
+        )
+        print(f"  {'Throughput':<50} {expected_count / elapsed:>10.1f} ASN/s")
@@ -0,0 +1,95 @@
+"""Benchmark of the range analytics answered by the allocated ASN index.
+
+Environment variables:
+
+- `BGP_BENCHMARK_ASNS`: number of allocated ASNs (default: 100000)
+- `BGP_BENCHMARK_RANGES`: number of AutonomousSystemRange records sharing them (default: 2000)
+"""
+
+import random
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from nautobot.extras.models import Status
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.asn_index import allocated_asn_index
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+PRIVATE_ASN_MIN = 4200000000
+
+
+class AllocatedASNIndexBenchmark(TestCase):
+    """Time the utilization of every range, and free block lookups, against the equivalent database queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the ranges and their allocated ASNs."""
+        cls.count = env_int("BGP_BENCHMARK_ASNS", 100000)
+        cls.range_count = env_int("BGP_BENCHMARK_RANGES", 2000)
+        status = Status.objects.get(name__iexact="active")
+
+        # Each range is 4 times larger than its share of allocated ASNs, which are randomly placed within it
+        rng = random.Random(42)
+        range_size = 4 * cls.count // cls.range_count
+        asns = []
+        ranges = []
+        for index in range(cls.range_count):
+            asn_min = PRIVATE_ASN_MIN + index * range_size
+            ranges.append(
+                models.AutonomousSystemRange(name=f"Range {index}", asn_min=asn_min, asn_max=asn_min + range_size - 1)
+            )
+            asns.extend(rng.sample(range(asn_min, asn_min + range_size), range_size // 4))
+        models.AutonomousSystemRange.objects.bulk_create(ranges, batch_size=5000)
+        models.AutonomousSystem.objects.bulk_create(
+            [models.AutonomousSystem(asn=asn, status=status) for asn in asns], batch_size=5000
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {models.AutonomousSystem._meta.db_table}")
+
+    def setUp(self):
+        allocated_asn_index.clear()
+        self.addCleanup(allocated_asn_index.clear)
+
+    def test_range_analytics(self):
+        """Time the analytics of all ranges with the index and with COUNT queries."""
+        ranges = list(models.AutonomousSystemRange.objects.filter(name__startswith="Range "))
+        results = [("Index load", timed(lambda: (allocated_asn_index.clear(), allocated_asn_index.count(0, 0))))]
+
+        # Leave out the periodic check against the database, which costs one query at most every refresh_interval
+        patcher = mock.patch.object(allocated_asn_index, "refresh_interval", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        results.append(("Utilization of all ranges (index)", timed(lambda: [r.get_utilization() for r in ranges])))
+        results.append(
+            (
+                "Utilization of all ranges (COUNT per range)",
+                timed(
+                    lambda: [
+                        models.AutonomousSystem.objects.filter(asn__gte=r.asn_min, asn__lte=r.asn_max).count()
+                        for r in ranges
+                    ],
+                    repeat=1,
+                ),
+            )
+        )
+        results.append(
+            ("Largest available block of all ranges", timed(lambda: [r.get_largest_available_block() for r in ranges]))
+        )
+        results.append(
+            (
+                "First block of 5 available ASNs of all ranges",
+                timed(lambda: [r.get_first_available_block(size=5) for r in ranges]),
+            )
+        )
+
+        utilization = ranges[0].get_utilization()
+        self.assertEqual(
+            utilization.numerator,
+            models.AutonomousSystem.objects.filter(asn__gte=ranges[0].asn_min, asn__lte=ranges[0].asn_max).count(),
+        )
+        self.assertEqual(len(ranges[0].get_available_asns(count=10)), 10)
+
+        report(f"Allocated ASN index ({self.count} allocated ASNs in {len(ranges)} ranges)", results)
@@ -0,0 +1,106 @@
+"""Benchmark of the overlap validation and ASN to range lookups of AutonomousSystemRange.
+
+Environment variables:
+
+- `BGP_BENCHMARK_RANGES`: number of existing ranges, and of ranges to validate for a bulk import (default: 10000)
+- `BGP_BENCHMARK_LEGACY_RANGES`: largest number of ranges for which the pairwise comparison is timed too, as it is
+  quadratic (default: 2000)
+"""
+
+from django.db import connection
+from django.test import TestCase
+from nautobot.extras.models import Status
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+RANGE_SIZE = 100
+
+
+def pairwise_overlaps(ranges):
+    """Compare every pair of ranges, for comparison."""
+    return [
+        (first, second)
+        for index, first in enumerate(ranges)
+        for second in ranges[index + 1 :]  # noqa: E203
+        if first.asn_min <= second.asn_max and second.asn_min <= first.asn_max
+    ]
+
+
+class AutonomousSystemRangeOverlapBenchmark(TestCase):
+    """Time the validation of a bulk import of ranges, and the lookup of the range containing ASNs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the existing ranges, every other block of RANGE_SIZE ASNs, and one ASN in each."""
+        cls.count = env_int("BGP_BENCHMARK_RANGES", 10000)
+        status = Status.objects.get(name__iexact="active")
+        models.AutonomousSystemRange.objects.bulk_create(
+            [
+                models.AutonomousSystemRange(
+                    name=f"Existing {index}", asn_min=2 * index * RANGE_SIZE + 1, asn_max=(2 * index + 1) * RANGE_SIZE
+                )
+                for index in range(cls.count)
+            ],
+            batch_size=5000,
+        )
+        models.AutonomousSystem.objects.bulk_create(
+            [models.AutonomousSystem(asn=index * RANGE_SIZE + 1, status=status) for index in range(2 * cls.count)],
+            batch_size=5000,
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {models.AutonomousSystemRange._meta.db_table}")
+                cursor.execute(f"ANALYZE {models.AutonomousSystem._meta.db_table}")
+
+    def test_overlaps(self):
+        """Time the validation of new ranges filling the gaps between the existing ones."""
+        new_ranges = [
+            models.AutonomousSystemRange(
+                name=f"New {index}", asn_min=(2 * index + 1) * RANGE_SIZE + 1, asn_max=(2 * index + 2) * RANGE_SIZE
+            )
+            for index in range(self.count)
+        ]
+        results = [
+            (
+                "check_overlaps() of the new ranges",
+                timed(lambda: models.AutonomousSystemRange.check_overlaps(new_ranges)),
+            ),
+            ("clean() of 1000 new ranges", timed(lambda: [r.clean() for r in new_ranges[:1000]], repeat=1)),
+            (
+                "containing() lookup of 1000 ASNs",
+                timed(
+                    lambda: [
+                        list(models.AutonomousSystemRange.objects.containing(index * RANGE_SIZE + 50))
+                        for index in range(1000)
+                    ],
+                    repeat=1,
+                ),
+            ),
+            (
+                "List of 50 ASNs with their containing range",
+                timed(
+                    lambda: list(
+                        models.AutonomousSystem.objects.with_containing_range().filter(asn__gt=self.count)[:50]
+                    )
+                ),
+            ),
+        ]
+        existing_ranges = list(models.AutonomousSystemRange.objects.all())
+        if self.count <= env_int("BGP_BENCHMARK_LEGACY_RANGES", 2000):
+            results.append(
+                ("Pairwise comparison", timed(lambda: pairwise_overlaps(existing_ranges + new_ranges), repeat=1))
+            )
+
+        overlapping = models.AutonomousSystemRange(name="Overlapping", asn_min=RANGE_SIZE // 2, asn_max=RANGE_SIZE * 3)
+        with self.assertRaises(Exception):
+            models.AutonomousSystemRange.check_overlaps([*new_ranges, overlapping])
+        self.assertEqual(
+            [r.name for r in models.AutonomousSystemRange.objects.containing(RANGE_SIZE * 2 + 50)], ["Existing 1"]
+        )
+        self.assertEqual(
+            models.AutonomousSystem.objects.with_containing_range().get(asn=RANGE_SIZE * 2 + 1).containing_range_name,
+            "Existing 1",
+        )
+
+        report(f"Range overlaps ({self.count} existing ranges, {self.count} new ranges)", results)
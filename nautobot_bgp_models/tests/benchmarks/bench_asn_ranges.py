@@ -0,0 +1,125 @@
+"""Benchmark of the lookup of available ASNs in AutonomousSystemRange.
+
+Environment variables:
+
+- `BGP_BENCHMARK_ASNS`: number of allocated ASNs in each range (default: 20000)
+- `BGP_BENCHMARK_LEGACY_ASNS`: largest number of allocated ASNs for which the former Python implementations are timed
+  too, as they load the whole range (default: 2000)
+"""
+
+from django.db import connection
+from django.test import TestCase
+from nautobot.extras.models import Status
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.helpers import add_available_asns
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+PRIVATE_ASN_MIN = 4200000000
+PRIVATE_ASN_MAX = 4294967294
+
+
+def legacy_get_next_available_asn(asn_range):
+    """Former implementation of `AutonomousSystemRange.get_next_available_asn()`, for comparison."""
+    asn_nums = models.AutonomousSystem.objects.filter(
+        asn__gte=asn_range.asn_min, asn__lte=asn_range.asn_max
+    ).values_list("asn", flat=True)
+    for i in range(asn_range.asn_min, asn_range.asn_max + 1):
+        if i not in asn_nums:
+            return i
+    return None
+
+
+class AvailableASNsBenchmark(TestCase):
+    """Time the lookup of available ASNs in dense, sparse and full ranges."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the ranges and their allocated ASNs."""
+        cls.count = env_int("BGP_BENCHMARK_ASNS", 20000)
+        status = Status.objects.get(name__iexact="active")
+
+        # Dense: the first `count` ASNs of the range are allocated
+        cls.dense = models.AutonomousSystemRange.objects.create(
+            name="Dense", asn_min=100000, asn_max=100000 + 2 * cls.count
+        )
+        dense_asns = range(cls.dense.asn_min, cls.dense.asn_min + cls.count)
+        # Sparse: a contiguous block at the start of the 32-bit private range, then ASNs spread across all of it
+        cls.sparse = models.AutonomousSystemRange.objects.create(
+            name="Sparse", asn_min=PRIVATE_ASN_MIN, asn_max=PRIVATE_ASN_MAX
+        )
+        step = (PRIVATE_ASN_MAX - PRIVATE_ASN_MIN) // cls.count
+        sparse_asns = [*range(PRIVATE_ASN_MIN, PRIVATE_ASN_MIN + cls.count // 2)]
+        sparse_asns += range(PRIVATE_ASN_MIN + cls.count, PRIVATE_ASN_MAX, 2 * step)
+        # Full: every ASN of the range is allocated
+        cls.full = models.AutonomousSystemRange.objects.create(
+            name="Full", asn_min=1000000, asn_max=1000000 + cls.count - 1
+        )
+        full_asns = range(cls.full.asn_min, cls.full.asn_max + 1)
+
+        models.AutonomousSystem.objects.bulk_create(
+            [models.AutonomousSystem(asn=asn, status=status) for asn in [*dense_asns, *sparse_asns, *full_asns]],
+            batch_size=5000,
+        )
+        # Refresh the planner statistics after the bulk load, as autovacuum would do on a live database
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {models.AutonomousSystem._meta.db_table}")
+
+    def test_available_asns(self):
+        """Time get_next_available_asn() and get_available_asns() on each range."""
+        legacy_max = env_int("BGP_BENCHMARK_LEGACY_ASNS", 2000)
+        results = []
+        for asn_range in (self.dense, self.sparse, self.full):
+            results.append((f"{asn_range.name}: get_next_available_asn()", timed(asn_range.get_next_available_asn)))
+            results.append(
+                (
+                    f"{asn_range.name}: get_available_asns(count=100)",
+                    timed(lambda r=asn_range: r.get_available_asns(100)),
+                )
+            )
+            if self.count <= legacy_max:
+                self.assertEqual(asn_range.get_next_available_asn(), legacy_get_next_available_asn(asn_range))
+                results.append(
+                    (
+                        f"{asn_range.name}: former get_next_available_asn()",
+                        timed(lambda r=asn_range: legacy_get_next_available_asn(r), repeat=1),
+                    )
+                )
+
+        self.assertEqual(self.dense.get_next_available_asn(), self.dense.asn_min + self.count)
+        self.assertEqual(self.sparse.get_next_available_asn(), PRIVATE_ASN_MIN + self.count // 2)
+        self.assertIsNone(self.full.get_next_available_asn())
+        self.assertEqual(len(self.sparse.get_available_asns(100)), 100)
+
+        report(f"Available ASNs lookup ({self.count} allocated ASNs per range)", results)
+
+    def test_asns_with_gaps(self):
+        """Time the first and last pages of the ASN listing of each range, against the former whole-range listing."""
+        legacy_max = env_int("BGP_BENCHMARK_LEGACY_ASNS", 2000)
+        results = []
+        for asn_range in (self.dense, self.sparse, self.full):
+            last_allocated = (
+                models.AutonomousSystem.objects.filter(asn__lte=asn_range.asn_max).order_by("-asn").first().asn
+            )
+            results.append(
+                (f"{asn_range.name}: first page of 50", timed(lambda r=asn_range: r.get_asns_with_gaps(limit=50)))
+            )
+            results.append(
+                (
+                    f"{asn_range.name}: last page of 50",
+                    timed(lambda r=asn_range, a=last_allocated: r.get_asns_with_gaps(after=a - 100, limit=50)),
+                )
+            )
+            if self.count <= legacy_max:
+                asns = models.AutonomousSystem.objects.filter(asn__gte=asn_range.asn_min, asn__lte=asn_range.asn_max)
+                results.append(
+                    (
+                        f"{asn_range.name}: former add_available_asns()",
+                        timed(lambda r=asn_range, a=asns: add_available_asns(r, a.all()), repeat=1),
+                    )
+                )
+
+        self.assertEqual(len(self.sparse.get_asns_with_gaps(limit=50)), 50)
+
+        report(f"ASN listing of a range ({self.count} allocated ASNs per range)", results)
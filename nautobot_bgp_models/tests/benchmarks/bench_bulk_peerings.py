@@ -0,0 +1,238 @@
+"""Benchmark of the creation and update of peerings with their endpoints, one by one and with the bulk APIs.
+
+The update of the peerings is also timed with the reconciliation of the desired state of each routing instance.
+
+Environment variables:
+
+- `BGP_BENCHMARK_BULK_PEERINGS`: number of peerings created (default: 1000)
+- `BGP_BENCHMARK_BULK_DEVICE_PEERINGS`: number of peerings of each device (default: 50)
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import TestCase
+from nautobot.dcim.models import Device, DeviceType, Interface, Location, LocationType, Manufacturer
+from nautobot.extras.context_managers import web_request_context
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.models import IPAddress, IPAddressToInterface, Namespace, Prefix
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.api import serializers
+from nautobot_bgp_models.api.reconcile import Reconciler
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+
+def legacy_create(items, status):
+    """Create the peerings one by one, as a Peering POST and two PeerEndpoint POSTs do, for comparison."""
+    for item in items:
+        peering = models.Peering.objects.create(status=status)
+        for data in (item["endpoint_a"], item["endpoint_z"]):
+            models.PeerEndpoint(peering=peering, **data).validated_save()
+            peering.update_peers()
+
+
+def legacy_sync(items):
+    """Update the peerings one by one, looking up their endpoints by local IP first as a sync job would, for comparison."""
+    for item in items:
+        for data in (item["endpoint_a"], item["endpoint_z"]):
+            endpoint = models.PeerEndpoint.objects.get(source_ip=data["source_ip"])
+            for name, value in data.items():
+                setattr(endpoint, name, value)
+            endpoint.validated_save()
+
+
+class BulkPeeringsBenchmark(TestCase):
+    """Time the creation of peerings between routers and a remote AS, with change logging enabled."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        """Create the devices, each with a routing instance and IP addresses, and the remote IP addresses."""
+        cls.count = env_int("BGP_BENCHMARK_BULK_PEERINGS", 1000)
+        per_device = env_int("BGP_BENCHMARK_BULK_DEVICE_PEERINGS", 50)
+        cls.user = get_user_model().objects.create(username="Benchmark", is_superuser=True)
+        cls.status = Status.objects.get(name__iexact="active")
+        cls.status.content_types.add(ContentType.objects.get_for_model(models.Peering))
+        manufacturer = Manufacturer.objects.create(name="Benchmark")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="Router")
+        location_type = LocationType.objects.create(name="Benchmark")
+        location = Location.objects.create(
+            name="Benchmark", location_type=location_type, status=Status.objects.get_for_model(Location).first()
+        )
+        role = Role.objects.create(name="Benchmark router")
+        role.content_types.add(ContentType.objects.get_for_model(Device))
+        namespace = Namespace.objects.create(name="Benchmark")
+        prefix = Prefix.objects.create(
+            prefix="10.0.0.0/8", namespace=namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+        interface_status = Status.objects.get_for_model(Interface).first()
+
+        device_count = max(cls.count // per_device, 1)
+        devices = Device.objects.bulk_create(
+            [
+                Device(device_type=devicetype, role=role, name=f"Router {index}", location=location, status=cls.status)
+                for index in range(device_count)
+            ]
+        )
+        interfaces = Interface.objects.bulk_create(
+            [Interface(device=device, name="Loopback0", status=interface_status) for device in devices]
+        )
+        local_as = models.AutonomousSystem.objects.create(asn=64999, status=cls.status)
+        remote_as = models.AutonomousSystem.objects.create(asn=65000, status=cls.status)
+        routing_instances = models.BGPRoutingInstance.objects.bulk_create(
+            [
+                models.BGPRoutingInstance(device=device, autonomous_system=local_as, status=cls.status)
+                for device in devices
+            ]
+        )
+        addresses = IPAddress.objects.bulk_create(
+            [
+                IPAddress(
+                    host=f"10.{index // 65536}.{index // 256 % 256}.{index % 256}",
+                    mask_length=32,
+                    ip_version=4,
+                    status=cls.status,
+                    parent=prefix,
+                )
+                for index in range(2 * cls.count)
+            ],
+            batch_size=5000,
+        )
+        local_addresses, remote_addresses = addresses[0::2], addresses[1::2]
+        IPAddressToInterface.objects.bulk_create(
+            [
+                IPAddressToInterface(ip_address=address, interface=interfaces[index // per_device % device_count])
+                for index, address in enumerate(local_addresses)
+            ],
+            batch_size=5000,
+        )
+
+        cls.items = [
+            {
+                "endpoint_a": {
+                    "routing_instance": routing_instances[index // per_device % device_count],
+                    "source_ip": local_addresses[index],
+                },
+                "endpoint_z": {"source_ip": remote_addresses[index], "autonomous_system": remote_as},
+            }
+            for index in range(cls.count)
+        ]
+        cls.data = [
+            {
+                "status": str(cls.status.pk),
+                "endpoint_a": {key: str(value.pk) for key, value in item["endpoint_a"].items()},
+                "endpoint_z": {key: str(value.pk) for key, value in item["endpoint_z"].items()},
+            }
+            for item in cls.items
+        ]
+
+    def run_rolled_back(self, function):
+        """Run `function` in a change logging context, then roll its changes back; return its time and queries."""
+        queries = []
+
+        def run():
+            with transaction.atomic():
+                with web_request_context(self.user) as request:
+                    function(request)
+                self.assertEqual(models.PeerEndpoint.objects.filter(peer__isnull=False).count(), 2 * self.count)
+                transaction.set_rollback(True)
+
+        with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+            seconds = timed(run, repeat=1)
+        return seconds, len(queries)
+
+    def test_bulk_create(self):
+        """Time the creation of the peerings one by one and in bulk."""
+
+        def bulk_create(request):
+            serializer = serializers.PeeringBulkCreateSerializer(
+                data=self.data, many=True, context={"request": request}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        legacy, legacy_queries = self.run_rolled_back(lambda request: legacy_create(self.items, self.status))
+        bulk, bulk_queries = self.run_rolled_back(bulk_create)
+
+        report(
+            f"Creation of {self.count} peerings",
+            [
+                (f"One by one ({legacy_queries} queries)", legacy),
+                (f"Bulk create ({bulk_queries} queries)", bulk),
+            ],
+        )
+
+    def test_upsert(self):
+        """Time the update of existing peerings one by one and with upserts, with and without changes."""
+
+        def upsert(data):
+            def run(request):
+                serializer = serializers.PeeringUpsertSerializer(data=data, many=True, context={"request": request})
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+
+            return run
+
+        with web_request_context(self.user) as request:
+            upsert(self.data)(request)
+        changed_data = [{**item, "endpoint_a": {**item["endpoint_a"], "description": "Changed"}} for item in self.data]
+
+        legacy, legacy_queries = self.run_rolled_back(lambda request: legacy_sync(self.items))
+        unchanged, unchanged_queries = self.run_rolled_back(upsert(self.data))
+        changed, changed_queries = self.run_rolled_back(upsert(changed_data))
+
+        report(
+            f"Update of {self.count} peerings",
+            [
+                (f"One by one ({legacy_queries} queries)", legacy),
+                (f"Upsert, unchanged ({unchanged_queries} queries)", unchanged),
+                (f"Upsert, changed ({changed_queries} queries)", changed),
+            ],
+        )
+
+    def test_reconcile(self):
+        """Time the update of existing peerings one by one and with the reconciliation of each routing instance."""
+        desired_states = {}
+        for item in self.data:
+            endpoints = desired_states.setdefault(item["endpoint_a"]["routing_instance"], {"endpoints": []})
+            endpoints["endpoints"].append(
+                {
+                    "source_ip": item["endpoint_a"]["source_ip"],
+                    "peer": item["endpoint_z"],
+                    "peering": {"status": item["status"]},
+                }
+            )
+
+        def reconcile(changed):
+            def run(request):
+                for pk, data in desired_states.items():
+                    if changed:
+                        data = {"endpoints": [{**item, "description": "Changed"} for item in data["endpoints"]]}
+                    serializer = serializers.RoutingInstanceDesiredStateSerializer(
+                        data=data, context={"request": request}
+                    )
+                    serializer.is_valid(raise_exception=True)
+                    routing_instance = models.BGPRoutingInstance.objects.select_related(
+                        "device", "autonomous_system", "status"
+                    ).get(pk=pk)
+                    reconciler = Reconciler(routing_instance, serializer.validated_data)
+                    reconciler.plan()
+                    reconciler.apply()
+
+            return run
+
+        with web_request_context(self.user) as request:
+            reconcile(changed=False)(request)
+
+        legacy, legacy_queries = self.run_rolled_back(lambda request: legacy_sync(self.items))
+        unchanged, unchanged_queries = self.run_rolled_back(reconcile(changed=False))
+        changed, changed_queries = self.run_rolled_back(reconcile(changed=True))
+
+        report(
+            f"Update of {self.count} peerings on {len(desired_states)} routing instances",
+            [
+                (f"One by one ({legacy_queries} queries)", legacy),
+                (f"Reconcile, unchanged ({unchanged_queries} queries)", unchanged),
+                (f"Reconcile, changed ({changed_queries} queries)", changed),
+            ],
+        )
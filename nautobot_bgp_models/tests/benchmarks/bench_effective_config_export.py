@@ -0,0 +1,151 @@
+"""Benchmark of the export of the effective BGP configuration of many devices.
+
+Environment variables:
+
+- `BGP_BENCHMARK_DEVICES`: number of devices (default: 200)
+- `BGP_BENCHMARK_DEVICE_ENDPOINTS`: number of peer endpoints of each device (default: 20)
+"""
+
+import tracemalloc
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from nautobot.dcim.models import Device, DeviceType, Interface, Location, LocationType, Manufacturer
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.models import IPAddress, IPAddressToInterface, Namespace, Prefix
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.effective_config import get_effective_config, iter_effective_configs, to_ndjson
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+
+class EffectiveConfigExportBenchmark(TestCase):
+    """Time the export of all devices in chunks, against one effective configuration request per device."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        """Create the devices, each with a routing instance, a peer group and peerings with external endpoints."""
+        cls.device_count = env_int("BGP_BENCHMARK_DEVICES", 200)
+        cls.endpoint_count = env_int("BGP_BENCHMARK_DEVICE_ENDPOINTS", 20)
+        status = Status.objects.get(name__iexact="active")
+        status.content_types.add(ContentType.objects.get_for_model(models.Peering))
+        manufacturer = Manufacturer.objects.create(name="Benchmark")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="Router")
+        location_type = LocationType.objects.create(name="Benchmark")
+        location = Location.objects.create(
+            name="Benchmark", location_type=location_type, status=Status.objects.get_for_model(Location).first()
+        )
+        role = Role.objects.create(name="Benchmark router")
+        role.content_types.add(ContentType.objects.get_for_model(Device))
+        namespace = Namespace.objects.create(name="Benchmark")
+        prefix = Prefix.objects.create(
+            prefix="10.0.0.0/8", namespace=namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+        interface_status = Status.objects.get_for_model(Interface).first()
+        template = models.PeerGroupTemplate.objects.create(
+            name="Benchmark",
+            autonomous_system=models.AutonomousSystem.objects.create(asn=64999, status=status),
+            extra_attributes={"template": True},
+        )
+
+        devices = Device.objects.bulk_create(
+            [
+                Device(device_type=devicetype, role=role, name=f"Router {index}", location=location, status=status)
+                for index in range(cls.device_count)
+            ]
+        )
+        interfaces = Interface.objects.bulk_create(
+            [Interface(device=device, name="Loopback0", status=interface_status) for device in devices]
+        )
+        asns = models.AutonomousSystem.objects.bulk_create(
+            [models.AutonomousSystem(asn=4200000000 + index, status=status) for index in range(cls.device_count)]
+        )
+        routing_instances = models.BGPRoutingInstance.objects.bulk_create(
+            [
+                models.BGPRoutingInstance(device=device, autonomous_system=asn, status=status)
+                for device, asn in zip(devices, asns)
+            ]
+        )
+        peer_groups = models.PeerGroup.objects.bulk_create(
+            [
+                models.PeerGroup(name="Group", routing_instance=routing_instance, peergroup_template=template)
+                for routing_instance in routing_instances
+            ]
+        )
+
+        addresses = IPAddress.objects.bulk_create(
+            [
+                IPAddress(
+                    host=f"10.{index // 256}.{index % 256}.{side + 1}",
+                    mask_length=32,
+                    ip_version=4,
+                    status=status,
+                    parent=prefix,
+                )
+                for index in range(cls.device_count * cls.endpoint_count)
+                for side in range(2)
+            ]
+        )
+        IPAddressToInterface.objects.bulk_create(
+            [
+                IPAddressToInterface(ip_address=addresses[2 * index], interface=interfaces[index // cls.endpoint_count])
+                for index in range(cls.device_count * cls.endpoint_count)
+            ]
+        )
+        peerings = models.Peering.objects.bulk_create(
+            [models.Peering(status=status) for _ in range(cls.device_count * cls.endpoint_count)]
+        )
+        models.PeerEndpoint.objects.bulk_create(
+            [
+                endpoint
+                for index, peering in enumerate(peerings)
+                for endpoint in (
+                    models.PeerEndpoint(
+                        routing_instance=routing_instances[index // cls.endpoint_count],
+                        peer_group=peer_groups[index // cls.endpoint_count],
+                        source_ip=addresses[2 * index],
+                        peering=peering,
+                    ),
+                    models.PeerEndpoint(source_ip=addresses[2 * index + 1], autonomous_system=asns[0], peering=peering),
+                )
+            ],
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            for model in (models.PeerEndpoint, IPAddress, models.BGPRoutingInstance, Device):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    @staticmethod
+    def export(chunk_size=None):
+        """Serialize the configuration of every device, as the NDJSON export does."""
+        for config in iter_effective_configs(Device.objects.all(), chunk_size=chunk_size):
+            to_ndjson(config)
+
+    def test_export(self):
+        """Time and count the queries of both approaches, and measure the peak memory of the export."""
+        devices = list(Device.objects.all())
+        with CaptureQueriesContext(connection) as per_device_queries:
+            per_device = timed(lambda: [get_effective_config(device) for device in devices], repeat=1)
+        with CaptureQueriesContext(connection) as export_queries:
+            export = timed(self.export, repeat=1)
+        results = [
+            (f"One effective configuration per device ({len(per_device_queries)} queries)", per_device),
+            (f"Chunked export ({len(export_queries)} queries)", export),
+        ]
+
+        for chunk_size in (50, 200):
+            tracemalloc.start()
+            self.export(chunk_size=chunk_size)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  Peak memory with chunks of {chunk_size} devices: {peak / 1024 / 1024:.1f} MiB")
+
+        config = get_effective_config(devices[0])
+        self.assertEqual(len(config["routing_instances"][0]["endpoints"]), self.endpoint_count)
+
+        report(
+            f"Effective configuration export ({self.device_count} devices x {self.endpoint_count} peer endpoints)",
+            results,
+        )
@@ -0,0 +1,65 @@
+"""Benchmark of extra attributes merging: eager `deepmerge` chain versus lazy `LayeredMapping`.
+
+Environment variables:
+
+- `BGP_BENCHMARK_LAYERS`: number of inheritance layers (default: 5)
+- `BGP_BENCHMARK_KEYS`: number of keys per layer (default: 10000)
+"""
+
+from collections import OrderedDict
+
+from django.test import SimpleTestCase
+from nautobot.core.utils.data import deepmerge
+
+from nautobot_bgp_models.helpers import LayeredMapping
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+
+def build_layers(layers, keys):
+    """Return `layers` nested documents of `keys` keys, overlapping on half of their keys."""
+    documents = []
+    for layer in range(layers):
+        document = {}
+        for index in range(keys):
+            key = f"key-{index if index % 2 else f'{layer}-{index}'}"
+            document[key] = {"layer": layer, "values": [index, layer], "nested": {f"n{layer}": index}}
+        documents.append(document)
+    return documents
+
+
+def merge_eager(layers):
+    """Merge the layers the way `get_extra_attributes()` does."""
+    data = OrderedDict()
+    for layer in layers:
+        data = deepmerge(data, layer)
+    return data
+
+
+class ExtraAttributesMergeBenchmark(SimpleTestCase):
+    """Compare eager and lazy merging of extra attributes."""
+
+    def test_merge(self):
+        """Time a full merge, reading a handful of keys, and materializing."""
+        layers = build_layers(env_int("BGP_BENCHMARK_LAYERS", 5), env_int("BGP_BENCHMARK_KEYS", 10000))
+        sample_keys = [f"key-{index}" for index in range(1, 20, 2)]
+
+        def read_eager():
+            data = merge_eager(layers)
+            return [data[key]["nested"] for key in sample_keys]
+
+        def read_lazy():
+            data = LayeredMapping(layers)
+            return [data[key]["nested"] for key in sample_keys]
+
+        self.assertEqual(LayeredMapping(layers).materialize(), merge_eager(layers))
+        self.assertEqual(read_eager(), read_lazy())
+
+        report(
+            f"Extra attributes merge ({len(layers)} layers, {len(layers[0])} keys per layer)",
+            [
+                ("deepmerge chain", timed(lambda: merge_eager(layers))),
+                ("deepmerge chain + read 10 keys", timed(read_eager)),
+                ("LayeredMapping + read 10 keys", timed(read_lazy)),
+                ("LayeredMapping + materialize", timed(lambda: LayeredMapping(layers).materialize())),
+            ],
+        )
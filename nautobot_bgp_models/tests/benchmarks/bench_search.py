@@ -0,0 +1,130 @@
+"""Benchmark of the `q` searches of the PeerEndpoint and PeerGroup filtersets.
+
+The searches are timed against the former implementation (joins followed by `.distinct()`); on PostgreSQL, they
+use the trigram indexes of migration 0012 if the `pg_trgm` extension is available.
+
+Environment variables:
+
+- `BGP_BENCHMARK_SEARCH_ENDPOINTS`: number of peer endpoints, for instance 1000000 (default: 100000)
+- `BGP_BENCHMARK_SEARCH_DEVICE_ENDPOINTS`: number of peer endpoints of each device (default: 100)
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from nautobot.dcim.models import Device, DeviceType, Location, LocationType, Manufacturer
+from nautobot.extras.models import Role, Status
+
+from nautobot_bgp_models import filters, models
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+
+
+def legacy_peer_endpoint_search(queryset, value):
+    """Search peer endpoints as before, for comparison."""
+    return queryset.filter(Q(routing_instance__device__name__iexact=value) | Q(description__icontains=value)).distinct()
+
+
+def legacy_peer_group_search(queryset, value):
+    """Search peer groups as before, for comparison."""
+    return queryset.filter(Q(name__icontains=value) | Q(description__icontains=value)).distinct()
+
+
+class SearchBenchmark(TestCase):
+    """Time the searches of peer endpoints and peer groups by description, name and device name."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        """Create the devices, each with a routing instance, a peer group and its endpoints."""
+        cls.count = env_int("BGP_BENCHMARK_SEARCH_ENDPOINTS", 100000)
+        per_device = env_int("BGP_BENCHMARK_SEARCH_DEVICE_ENDPOINTS", 100)
+        status = Status.objects.get(name__iexact="active")
+        manufacturer = Manufacturer.objects.create(name="Benchmark")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="Router")
+        location_type = LocationType.objects.create(name="Benchmark")
+        location = Location.objects.create(
+            name="Benchmark", location_type=location_type, status=Status.objects.get_for_model(Location).first()
+        )
+        role = Role.objects.create(name="Benchmark router")
+        role.content_types.add(ContentType.objects.get_for_model(Device))
+
+        device_count = max(cls.count // per_device, 1)
+        devices = Device.objects.bulk_create(
+            [
+                Device(device_type=devicetype, role=role, name=f"Router {index}", location=location, status=status)
+                for index in range(device_count)
+            ],
+            batch_size=5000,
+        )
+        autonomous_system = models.AutonomousSystem.objects.create(asn=64999, status=status)
+        routing_instances = models.BGPRoutingInstance.objects.bulk_create(
+            [
+                models.BGPRoutingInstance(device=device, autonomous_system=autonomous_system, status=status)
+                for device in devices
+            ],
+            batch_size=5000,
+        )
+        peer_groups = models.PeerGroup.objects.bulk_create(
+            [
+                models.PeerGroup(
+                    name=f"Group {index}", routing_instance=routing_instance, description=f"Peers of router {index}"
+                )
+                for index, routing_instance in enumerate(routing_instances)
+            ],
+            batch_size=5000,
+        )
+        peerings = models.Peering.objects.bulk_create(
+            [models.Peering(status=status) for _ in range((cls.count + 1) // 2)], batch_size=5000
+        )
+        for start in range(0, cls.count, 50000):
+            models.PeerEndpoint.objects.bulk_create(
+                [
+                    models.PeerEndpoint(
+                        routing_instance=routing_instances[index // per_device % device_count],
+                        peer_group=peer_groups[index // per_device % device_count],
+                        peering=peerings[index // 2],
+                        description=f"Transit {index:07d} via edge{index % 1000}",
+                    )
+                    for index in range(start, min(start + 50000, cls.count))
+                ],
+                batch_size=5000,
+            )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (Device, models.BGPRoutingInstance, models.PeerGroup, models.PeerEndpoint):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def test_search(self):
+        """Time the searches of a single endpoint, of the endpoints of a device, and of 11% of the endpoints."""
+        peer_endpoints = models.PeerEndpoint.objects.all()
+        peer_groups = models.PeerGroup.objects.all()
+        searches = [
+            ("Peer endpoint description", f"{self.count // 2:07d}", 1),
+            ("Peer endpoint device name", "Router 1", None),
+            ("Peer endpoint common term", "edge7", None),
+        ]
+        results = []
+        for label, value, expected in searches:
+            new = filters.PeerEndpointFilterSet({"q": value}, peer_endpoints).qs
+            legacy = legacy_peer_endpoint_search(peer_endpoints, value)
+            self.assertEqual(new.count(), legacy.count())
+            if expected is not None:
+                self.assertEqual(new.count(), expected)
+            results.append((f"{label}, former", timed(lambda qs=legacy: list(qs.values_list("pk", flat=True)))))
+            results.append((f"{label}, EXISTS", timed(lambda qs=new: list(qs.values_list("pk", flat=True)))))
+
+        value = "router 42"
+        new = filters.PeerGroupFilterSet({"q": value}, peer_groups).qs
+        legacy = legacy_peer_group_search(peer_groups, value)
+        self.assertEqual(new.count(), legacy.count())
+        results.append(("Peer group description, former", timed(lambda: list(legacy.values_list("pk", flat=True)))))
+        results.append(
+            ("Peer group description, without DISTINCT", timed(lambda: list(new.values_list("pk", flat=True))))
+        )
+
+        indexed = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM pg_indexes WHERE indexname LIKE 'nautobot_bgp_%_trgm'")
+                indexed = bool(cursor.fetchone()[0])
+        report(f"Searches ({self.count} peer endpoints, {'with' if indexed else 'without'} trigram indexes)", results)
@@ -0,0 +1,162 @@
+"""Benchmark of the validation of peer endpoints imported in bulk.
+
+Environment variables:
+
+- `BGP_BENCHMARK_VALIDATION_DEVICES`: number of devices (default: 200)
+- `BGP_BENCHMARK_VALIDATION_DEVICE_IPS`: number of IP addresses of each device, each used by an endpoint (default: 100)
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from nautobot.dcim.models import Device, DeviceType, Interface, Location, LocationType, Manufacturer
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.models import VRF, IPAddress, IPAddressToInterface, Namespace, Prefix
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.tests.benchmarks import env_int, report, timed
+from nautobot_bgp_models.validation import ValidationContext
+
+
+def legacy_clean(endpoint):
+    """Validate the local IP of `endpoint` as `PeerEndpoint.clean()` did before ValidationContext, for comparison."""
+    local_ip_value = endpoint.local_ip
+    if endpoint.routing_instance:
+        if local_ip_value not in IPAddress.objects.filter(interfaces__device_id=endpoint.routing_instance.device.id):
+            raise ValidationError("Peer IP not associated with Routing Instance")
+    elif IPAddressToInterface.objects.filter(ip_address=local_ip_value).exists():
+        raise ValidationError("Must specify Routing Instance for this IP Address")
+    if endpoint.peer_group is not None:
+        if endpoint.peer_group.vrf and (endpoint.peer_group.vrf not in local_ip_value.parent.vrfs.all()):
+            raise ValidationError("VRF mismatch")
+
+
+class ValidationBenchmark(TestCase):
+    """Time the validation of new endpoints on existing devices, without and with a ValidationContext."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        """Create the devices, each with a routing instance, a peer group in a VRF and IP addresses in that VRF."""
+        cls.device_count = env_int("BGP_BENCHMARK_VALIDATION_DEVICES", 200)
+        cls.ip_count = env_int("BGP_BENCHMARK_VALIDATION_DEVICE_IPS", 100)
+        status = Status.objects.get(name__iexact="active")
+        manufacturer = Manufacturer.objects.create(name="Benchmark")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="Router")
+        location_type = LocationType.objects.create(name="Benchmark")
+        location = Location.objects.create(
+            name="Benchmark", location_type=location_type, status=Status.objects.get_for_model(Location).first()
+        )
+        role = Role.objects.create(name="Benchmark router")
+        role.content_types.add(ContentType.objects.get_for_model(Device))
+        namespace = Namespace.objects.create(name="Benchmark")
+        prefix = Prefix.objects.create(
+            prefix="10.0.0.0/8", namespace=namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+        vrf = VRF.objects.create(name="Benchmark", namespace=namespace)
+        vrf.add_prefix(prefix)
+        interface_status = Status.objects.get_for_model(Interface).first()
+
+        devices = Device.objects.bulk_create(
+            [
+                Device(device_type=devicetype, role=role, name=f"Router {index}", location=location, status=status)
+                for index in range(cls.device_count)
+            ]
+        )
+        interfaces = Interface.objects.bulk_create(
+            [Interface(device=device, name="Loopback0", status=interface_status) for device in devices]
+        )
+        autonomous_system = models.AutonomousSystem.objects.create(asn=64999, status=status)
+        routing_instances = models.BGPRoutingInstance.objects.bulk_create(
+            [
+                models.BGPRoutingInstance(device=device, autonomous_system=autonomous_system, status=status)
+                for device in devices
+            ]
+        )
+        peer_groups = models.PeerGroup.objects.bulk_create(
+            [
+                models.PeerGroup(name="Group", routing_instance=routing_instance, vrf=vrf)
+                for routing_instance in routing_instances
+            ]
+        )
+        addresses = IPAddress.objects.bulk_create(
+            [
+                IPAddress(
+                    host=f"10.{index // 65536}.{index // 256 % 256}.{index % 256}",
+                    mask_length=32,
+                    ip_version=4,
+                    status=status,
+                    parent=prefix,
+                )
+                for index in range(cls.device_count * cls.ip_count)
+            ],
+            batch_size=5000,
+        )
+        IPAddressToInterface.objects.bulk_create(
+            [
+                IPAddressToInterface(ip_address=address, interface=interfaces[index // cls.ip_count])
+                for index, address in enumerate(addresses)
+            ],
+            batch_size=5000,
+        )
+        peering = models.Peering.objects.create(status=status)
+        # The unsaved endpoints of an import, referencing loaded records as deserialized rows do
+        cls.endpoints = [
+            models.PeerEndpoint(
+                routing_instance=routing_instances[index // cls.ip_count],
+                peer_group=peer_groups[index // cls.ip_count],
+                source_ip=address,
+                peering=peering,
+            )
+            for index, address in enumerate(addresses)
+        ]
+        with connection.cursor() as cursor:
+            for model in (IPAddress, IPAddressToInterface, Interface, Device):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def validate_all(self, validate):
+        """Run `validate` on each endpoint."""
+        for endpoint in self.endpoints:
+            validate(endpoint)
+
+    def test_validation(self):
+        """Time the validation of every endpoint with the former checks, and with clean() in various contexts."""
+
+        def with_context():
+            with ValidationContext():
+                self.validate_all(lambda endpoint: endpoint.clean())
+
+        def with_primed_context():
+            with ValidationContext() as context:
+                context.prime(
+                    device_ids={endpoint.routing_instance.device_id for endpoint in self.endpoints},
+                    ip_address_ids={endpoint.source_ip_id for endpoint in self.endpoints},
+                )
+                self.validate_all(lambda endpoint: endpoint.clean())
+
+        results = {}
+        for label, function in (
+            ("legacy", lambda: self.validate_all(legacy_clean)),
+            ("no_context", lambda: self.validate_all(lambda endpoint: endpoint.clean())),
+            ("context", with_context),
+            ("primed", with_primed_context),
+        ):
+            queries = []
+            with connection.execute_wrapper(lambda execute, *args: queries.append(1) or execute(*args)):
+                seconds = timed(function, repeat=1)
+            results[label] = (seconds, len(queries))
+        legacy, legacy_queries = results["legacy"]
+        no_context, no_context_queries = results["no_context"]
+        context, context_queries = results["context"]
+        primed, primed_queries = results["primed"]
+
+        self.assertLessEqual(primed_queries, 5)
+        report(
+            f"Validation of {len(self.endpoints)} endpoints on {self.device_count} devices",
+            [
+                (f"Former checks ({legacy_queries} queries)", legacy),
+                (f"clean(), no context ({no_context_queries} queries)", no_context),
+                (f"clean(), ValidationContext ({context_queries} queries)", context),
+                (f"clean(), primed ValidationContext ({primed_queries} queries)", primed),
+            ],
+        )
@@ -1,17 +1,23 @@
 """Unit tests for nautobot_bgp_models."""  # pylint: disable=too-many-lines
 
-from unittest import skip
+import json
+from unittest import mock, skip
 from rest_framework import status
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from django.contrib.contenttypes.models import ContentType
 
 from nautobot.circuits.models import Provider
 from nautobot.dcim.choices import InterfaceTypeChoices
 from nautobot.dcim.models import Device, DeviceType, Interface, Manufacturer, Location, LocationType
-from nautobot.extras.models import Status, Role, Tag
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.models import CustomField, ObjectChange, Status, Role, Tag, Webhook
 from nautobot.ipam.models import IPAddress, VRF, Prefix, Namespace
-from nautobot.apps.testing import APIViewTestCases
+from nautobot.apps.testing import APITestCase, APIViewTestCases
 from nautobot.users.models import ObjectPermission
 
 from nautobot_bgp_models import models
@@ -82,6 +88,136 @@ class AutonomousSystemRangeAPITestCase(APIViewTestCases.APIViewTestCase):
             {"name": "Test 6", "asn_min": 601, "asn_max": 700, "description": "Test 6"},
         ]
 
+    def test_bulk_create_overlapping_objects(self):
+        """Ranges created in bulk may not overlap with each other."""
+        self.add_permissions("nautobot_bgp_models.add_autonomoussystemrange")
+        data = [
+            {"name": "Test 4", "asn_min": 401, "asn_max": 500},
+            {"name": "Test 5", "asn_min": 450, "asn_max": 600},
+        ]
+        response = self.client.post(self._get_list_url(), data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Test 4 (401-500) overlaps with Test 5 (450-600)", str(response.data))
+        self.assertFalse(models.AutonomousSystemRange.objects.filter(name__in=["Test 4", "Test 5"]).exists())
+
+
+class AutonomousSystemRangeAvailableASNsAPITestCase(APITestCase):
+    """Test the available-asns endpoint of the AutonomousSystemRange API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.status_active = Status.objects.get(name__iexact="active")
+        cls.status_active.content_types.add(ContentType.objects.get_for_model(models.AutonomousSystem))
+        cls.asn_range = models.AutonomousSystemRange.objects.create(name="Range 1", asn_min=100, asn_max=109)
+        for asn in (100, 101, 104):
+            models.AutonomousSystem.objects.create(asn=asn, status=cls.status_active)
+
+    def _get_url(self):
+        return reverse(
+            "plugins-api:nautobot_bgp_models-api:autonomoussystemrange-available-asns",
+            kwargs={"pk": self.asn_range.pk},
+        )
+
+    def test_list_available_asns(self):
+        """A GET lists the first available ASNs of the range."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.view_autonomoussystem"
+        )
+        response = self.client.get(f"{self._get_url()}?limit=4", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"asn": 102}, {"asn": 103}, {"asn": 105}, {"asn": 106}])
+
+    def test_create_single_available_asn(self):
+        """A POST of a single object allocates the first available ASN."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.add_autonomoussystem"
+        )
+        data = {"status": self.status_active.pk, "description": "Allocated"}
+        response = self.client.post(self._get_url(), data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["asn"], 102)
+        self.assertEqual(models.AutonomousSystem.objects.get(asn=102).description, "Allocated")
+
+    def test_create_multiple_available_asns(self):
+        """A POST of a list allocates as many ASNs, skipping the allocated ones."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.add_autonomoussystem"
+        )
+        data = [{"status": self.status_active.pk, "description": f"Allocated {index}"} for index in range(4)]
+        response = self.client.post(self._get_url(), data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual([item["asn"] for item in response.data], [102, 103, 105, 106])
+        self.assertEqual(self.asn_range.get_available_asns(count=10), [107, 108, 109])
+
+    def test_create_insufficient_available_asns(self):
+        """A POST of more objects than there are available ASNs allocates none."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.add_autonomoussystem"
+        )
+        data = [{"status": self.status_active.pk} for _ in range(8)]
+        response = self.client.post(self._get_url(), data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_204_NO_CONTENT)
+        self.assertIn("8 requested, 7 available", response.data["detail"])
+        self.assertEqual(models.AutonomousSystem.objects.count(), 3)
+
+    def test_create_invalid_data(self):
+        """A POST failing validation allocates no ASN at all."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.add_autonomoussystem"
+        )
+        data = [{"status": self.status_active.pk}, {}]
+        response = self.client.post(self._get_url(), data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(models.AutonomousSystem.objects.count(), 3)
+
+    def test_create_invalid_items(self):
+        """A POST of anything else than objects is rejected, and allocates no ASN at all."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.add_autonomoussystem"
+        )
+        response = self.client.post(
+            self._get_url(), [{"status": self.status_active.pk}, 1], format="json", **self.header
+        )
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(response.data[1]["non_field_errors"], ["Invalid data. Expected a dictionary, but got int."])
+
+        response = self.client.post(self._get_url(), "ASN", format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(models.AutonomousSystem.objects.count(), 3)
+
+    def test_asn_allocation(self):
+        """The ASNs and blocks of available ASNs of the range are paginated on the ASN number."""
+        self.add_permissions(
+            "nautobot_bgp_models.view_autonomoussystemrange", "nautobot_bgp_models.view_autonomoussystem"
+        )
+        url = reverse(
+            "plugins-api:nautobot_bgp_models-api:autonomoussystemrange-asn-allocation",
+            kwargs={"pk": self.asn_range.pk},
+        )
+        response = self.client.get(f"{url}?limit=3", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["asn"], row["available"]) for row in response.data["results"]], [(100, 0), (101, 0), (102, 2)]
+        )
+        self.assertEqual(
+            response.data["results"][0]["autonomous_system"]["id"],
+            models.AutonomousSystem.objects.get(asn=100).pk,
+        )
+        self.assertIsNone(response.data["results"][2]["autonomous_system"])
+        self.assertIn("after=102", response.data["next"])
+
+        response = self.client.get(response.data["next"], **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([(row["asn"], row["available"]) for row in response.data["results"]], [(104, 0), (105, 5)])
+        self.assertIsNone(response.data["next"])
+
+    def test_create_without_permission(self):
+        """Allocating ASNs requires the permission to add AutonomousSystems."""
+        self.add_permissions("nautobot_bgp_models.view_autonomoussystemrange")
+        response = self.client.post(self._get_url(), {"status": self.status_active.pk}, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+
 
 class PeerGroupTemplateAPITestCase(APIViewTestCases.APIViewTestCase):
     """Test the PeerGroupTemplate API."""
@@ -816,6 +952,23 @@ class PeerEndpointAPITestCase(APIViewTestCases.APIViewTestCase):
             # Ensure extra_attributes are not deep-merged and returned as defined on the model instance.
             self.assertEqual(api_extra_attrs, pe_extra_attrs)
 
+    def test_update_peers_only_on_peering_change(self):
+        """The peers are only updated when the peering of an endpoint changes."""
+        self.add_permissions("nautobot_bgp_models.change_peerendpoint")
+        url = self._get_detail_url(self.pe)
+        with mock.patch.object(models.Peering, "update_peers") as update_peers:
+            response = self.client.patch(url, {"description": "Updated"}, format="json", **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            update_peers.assert_not_called()
+
+            response = self.client.patch(url, {"peering": self.peering[0].pk}, format="json", **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            update_peers.assert_not_called()
+
+            response = self.client.patch(url, {"peering": self.peering[1].pk}, format="json", **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            update_peers.assert_called_once()
+
 
 #     @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
 #     def test_get_object_include_inherited(self):
@@ -962,6 +1115,539 @@ class PeeringAPITestCase(APIViewTestCases.APIViewTestCase):
         }
 
 
+class PeeringBulkCreateAPITestCase(APITestCase):
+    """Test the bulk-create and upsert actions of the Peering API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.status_active = Status.objects.get(name__iexact="active")
+        cls.status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location = Location.objects.create(
+            name="Site 1", location_type=location_type, status=Status.objects.get_for_model(Location).first()
+        )
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        device = Device.objects.create(
+            device_type=devicetype, role=devicerole, name="Device 1", location=location, status=cls.status_active
+        )
+        interface = Interface.objects.create(
+            device=device, name="Loopback1", status=Status.objects.get_for_model(Interface).first()
+        )
+        namespace = Namespace.objects.first()
+        Prefix.objects.create(
+            prefix="10.0.0.0/8", namespace=namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+        cls.local_addresses = []
+        cls.remote_addresses = []
+        for index in range(3):
+            cls.local_addresses.append(
+                IPAddress.objects.create(address=f"10.1.0.{index}/32", status=cls.status_active, namespace=namespace)
+            )
+            cls.remote_addresses.append(
+                IPAddress.objects.create(address=f"10.2.0.{index}/32", status=cls.status_active, namespace=namespace)
+            )
+        interface.add_ip_addresses(cls.local_addresses)
+        cls.routing_instance = models.BGPRoutingInstance.objects.create(
+            autonomous_system=models.AutonomousSystem.objects.create(asn=64512, status=cls.status_active),
+            device=device,
+            status=cls.status_active,
+        )
+        cls.remote_asn = models.AutonomousSystem.objects.create(asn=65000, status=cls.status_active)
+        cls.url = reverse("plugins-api:nautobot_bgp_models-api:peering-bulk-create")
+        cls.upsert_url = reverse("plugins-api:nautobot_bgp_models-api:peering-upsert")
+
+    def get_data(self, count=3):
+        """Return the data of `count` peerings between the routing instance and the remote AS."""
+        return [
+            {
+                "status": self.status_active.pk,
+                "endpoint_a": {
+                    "routing_instance": self.routing_instance.pk,
+                    "source_ip": self.local_addresses[index].pk,
+                    "description": f"Peering {index}",
+                },
+                "endpoint_z": {
+                    "source_ip": self.remote_addresses[index].pk,
+                    "autonomous_system": self.remote_asn.pk,
+                    "extra_attributes": {"index": index},
+                },
+            }
+            for index in range(count)
+        ]
+
+    def test_bulk_create(self):
+        """The peerings and their endpoints are created, with their peers and effective configuration."""
+        self.add_permissions("nautobot_bgp_models.add_peering", "nautobot_bgp_models.add_peerendpoint")
+        response = self.client.post(self.url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(tuple(sorted((item["endpoint_a_local_ip"], item["endpoint_z_local_ip"]))) for item in response.data),
+            [(f"10.1.0.{index}", f"10.2.0.{index}") for index in range(3)],
+        )
+
+        self.assertEqual(models.Peering.objects.count(), 3)
+        for endpoint in models.PeerEndpoint.objects.filter(routing_instance=self.routing_instance):
+            self.assertEqual(endpoint.peer.peer, endpoint)
+            self.assertEqual(endpoint.peer.peering, endpoint.peering)
+            self.assertEqual(endpoint.peer.autonomous_system, self.remote_asn)
+            self.assertEqual(endpoint.effective.autonomous_system, self.routing_instance.autonomous_system)
+        self.assertEqual(
+            ObjectChange.objects.filter(changed_object_type=ContentType.objects.get_for_model(models.PeerEndpoint))
+            .filter(action=ObjectChangeActionChoices.ACTION_CREATE)
+            .count(),
+            6,
+        )
+
+    def test_bulk_create_change_logging(self):
+        """The changes are handled as for records saved one by one: signals, user, webhooks and custom field defaults."""
+        self.add_permissions("nautobot_bgp_models.add_peering", "nautobot_bgp_models.add_peerendpoint")
+        endpoint_type = ContentType.objects.get_for_model(models.PeerEndpoint)
+        custom_field = CustomField.objects.create(label="Circuit ID", key="circuit_id", type="text", default="N/A")
+        custom_field.content_types.add(endpoint_type)
+        webhook = Webhook.objects.create(name="Endpoints", type_create=True, payload_url="http://localhost/")
+        webhook.content_types.add(endpoint_type)
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=models.PeerEndpoint)
+        self.addCleanup(post_save.disconnect, receiver, sender=models.PeerEndpoint)
+        with mock.patch("nautobot.extras.webhooks.process_webhook") as process_webhook:
+            response = self.client.post(self.url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+
+        self.assertEqual(
+            sorted(call.kwargs["instance"].pk for call in receiver.call_args_list if call.kwargs["created"]),
+            sorted(models.PeerEndpoint.objects.values_list("pk", flat=True)),
+        )
+        self.assertEqual(process_webhook.apply_async.call_count, 6)
+        for object_change in ObjectChange.objects.all():
+            self.assertEqual(object_change.user, self.user)
+        for endpoint in models.PeerEndpoint.objects.all():
+            self.assertEqual(endpoint.cf["circuit_id"], "N/A")
+
+    def test_bulk_create_errors(self):
+        """The errors of each invalid record are returned, and nothing is created."""
+        self.add_permissions("nautobot_bgp_models.add_peering", "nautobot_bgp_models.add_peerendpoint")
+        data = self.get_data()
+        data[1]["endpoint_a"]["source_ip"] = self.remote_addresses[1].pk
+        data[2]["endpoint_z"] = {"routing_instance": self.routing_instance.pk, "source_ip": self.local_addresses[0].pk}
+        response = self.client.post(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(
+            response.data[1]["endpoint_a"]["non_field_errors"], ["Peer IP not associated with Routing Instance"]
+        )
+        self.assertEqual(response.data[2]["non_field_errors"], ["Peering between same routing instance not allowed"])
+        self.assertFalse(models.Peering.objects.exists())
+
+    def test_bulk_create_without_permission(self):
+        """Creating peerings in bulk requires the permissions to add peerings and peer endpoints."""
+        for permission in ("nautobot_bgp_models.add_peering", "nautobot_bgp_models.add_peerendpoint"):
+            with self.subTest(permission=permission):
+                self.user.object_permissions.all().delete()
+                self.add_permissions(permission)
+                response = self.client.post(self.url, self.get_data(), format="json", **self.header)
+                self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+                self.assertFalse(models.Peering.objects.exists())
+
+    def test_upsert(self):
+        """Peerings are matched on their endpoints, created or updated, and unchanged records aren't written."""
+        self.add_permissions(
+            "nautobot_bgp_models.add_peering",
+            "nautobot_bgp_models.add_peerendpoint",
+            "nautobot_bgp_models.change_peering",
+            "nautobot_bgp_models.change_peerendpoint",
+        )
+        response = self.client.put(self.upsert_url, self.get_data(count=2), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        peering_pks = [item["id"] for item in response.data]
+        self.assertEqual(models.Peering.objects.count(), 2)
+
+        data = self.get_data()
+        data[0]["endpoint_a"]["description"] = "Updated"
+        data[1]["endpoint_a"], data[1]["endpoint_z"] = data[1]["endpoint_z"], data[1]["endpoint_a"]
+        endpoint_changes = ObjectChange.objects.filter(
+            changed_object_type=ContentType.objects.get_for_model(models.PeerEndpoint)
+        )
+        response = self.client.put(self.upsert_url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data][:2], peering_pks)
+        self.assertEqual(models.Peering.objects.count(), 3)
+        self.assertEqual(models.PeerEndpoint.objects.filter(description="Updated").count(), 1)
+        self.assertEqual(endpoint_changes.filter(action=ObjectChangeActionChoices.ACTION_UPDATE).count(), 1)
+        self.assertEqual(endpoint_changes.filter(action=ObjectChangeActionChoices.ACTION_CREATE).count(), 6)
+        endpoint = models.PeerEndpoint.objects.get(source_ip=self.local_addresses[2])
+        self.assertEqual(endpoint.peer.source_ip, self.remote_addresses[2])
+
+        # Sending the same records again doesn't change anything
+        last_updated = dict(models.PeerEndpoint.objects.values_list("pk", "last_updated"))
+        response = self.client.put(self.upsert_url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(dict(models.PeerEndpoint.objects.values_list("pk", "last_updated")), last_updated)
+        self.assertEqual(endpoint_changes.count(), 7)
+
+    def test_upsert_without_effective_configuration(self):
+        """Peerings are matched on their live endpoints, even if their effective configuration is missing."""
+        self.add_permissions(
+            "nautobot_bgp_models.add_peering",
+            "nautobot_bgp_models.add_peerendpoint",
+            "nautobot_bgp_models.change_peering",
+            "nautobot_bgp_models.change_peerendpoint",
+        )
+        response = self.client.put(self.upsert_url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        models.PeerEndpointEffective.objects.all().delete()
+
+        data = self.get_data()
+        data[0]["endpoint_a"]["description"] = "Updated"
+        response = self.client.put(self.upsert_url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(models.Peering.objects.count(), 3)
+        self.assertEqual(models.PeerEndpoint.objects.filter(description="Updated").count(), 1)
+
+    def _count_upsert_queries(self, data):
+        # The webhooks and job hooks Nautobot enqueues for each change at the end of the request are left out, as are
+        # the custom fields its change logging looks up for each serializer of each changed record
+        with CaptureQueriesContext(connection) as queries, mock.patch(
+            "nautobot.extras.context_managers.enqueue_webhooks"
+        ), mock.patch("nautobot.extras.jobs.enqueue_job_hooks"):
+            response = self.client.put(self.upsert_url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        return len([query for query in queries if not query["sql"].startswith('SELECT "extras_customfield"."key"')])
+
+    def test_upsert_query_count(self):
+        """Matching and updating 3 peerings costs as many queries as 1, whether they change or not."""
+        self.add_permissions(
+            "nautobot_bgp_models.add_peering",
+            "nautobot_bgp_models.add_peerendpoint",
+            "nautobot_bgp_models.change_peering",
+            "nautobot_bgp_models.change_peerendpoint",
+        )
+        response = self.client.put(self.upsert_url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(
+            self._count_upsert_queries(self.get_data(count=1)), self._count_upsert_queries(self.get_data())
+        )
+
+        def changed(data, description):
+            for item in data:
+                item["endpoint_a"]["description"] = description
+            return data
+
+        self.assertEqual(
+            self._count_upsert_queries(changed(self.get_data(count=1), "First")),
+            self._count_upsert_queries(changed(self.get_data(), "Second")),
+        )
+
+    def test_upsert_errors(self):
+        """Records matching the same peering are rejected, and nothing is created."""
+        self.add_permissions(
+            "nautobot_bgp_models.add_peering",
+            "nautobot_bgp_models.add_peerendpoint",
+            "nautobot_bgp_models.change_peering",
+        )
+        data = self.get_data(count=2)
+        data.append(data[0])
+        response = self.client.put(self.upsert_url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[2]["non_field_errors"], ["Duplicate peering in the request."])
+        self.assertFalse(models.Peering.objects.exists())
+
+    def test_upsert_without_permission(self):
+        """Updating matched peerings requires the permissions to change peerings and peer endpoints."""
+        self.add_permissions(
+            "nautobot_bgp_models.add_peering",
+            "nautobot_bgp_models.add_peerendpoint",
+            "nautobot_bgp_models.change_peering",
+        )
+        response = self.client.put(self.upsert_url, self.get_data(count=1), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        response = self.client.put(self.upsert_url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(models.Peering.objects.count(), 1)
+
+
+class BGPRoutingInstanceReconcileAPITestCase(APITestCase):
+    """Test the reconcile action of the BGPRoutingInstance API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.status_active = Status.objects.get(name__iexact="active")
+        cls.status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location = Location.objects.create(
+            name="Site 1", location_type=location_type, status=Status.objects.get_for_model(Location).first()
+        )
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        device = Device.objects.create(
+            device_type=devicetype, role=devicerole, name="Device 1", location=location, status=cls.status_active
+        )
+        interface = Interface.objects.create(
+            device=device, name="Loopback1", status=Status.objects.get_for_model(Interface).first()
+        )
+        namespace = Namespace.objects.first()
+        Prefix.objects.create(
+            prefix="10.0.0.0/8", namespace=namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+        cls.local_addresses = [
+            IPAddress.objects.create(address=f"10.1.0.{index}/32", status=cls.status_active, namespace=namespace)
+            for index in range(3)
+        ]
+        cls.remote_addresses = [
+            IPAddress.objects.create(address=f"10.2.0.{index}/32", status=cls.status_active, namespace=namespace)
+            for index in range(3)
+        ]
+        interface.add_ip_addresses(cls.local_addresses)
+        cls.routing_instance = models.BGPRoutingInstance.objects.create(
+            autonomous_system=models.AutonomousSystem.objects.create(asn=64512, status=cls.status_active),
+            device=device,
+            status=cls.status_active,
+        )
+        cls.remote_asn = models.AutonomousSystem.objects.create(asn=65000, status=cls.status_active)
+        cls.url = reverse(
+            "plugins-api:nautobot_bgp_models-api:bgproutinginstance-reconcile", kwargs={"pk": cls.routing_instance.pk}
+        )
+
+    def get_data(self, count=2):
+        """Return a desired state with an address family, a peer group and `count` sessions to the remote AS."""
+        return {
+            "extra_attributes": {"router": "desired"},
+            "address_families": [{"afi_safi": "ipv4_unicast", "extra_attributes": {"maximum_paths": 4}}],
+            "peer_groups": [
+                {
+                    "name": "EBGP",
+                    "description": "Transit",
+                    "address_families": [{"afi_safi": "ipv4_unicast", "import_policy": "TRANSIT-IN"}],
+                },
+            ],
+            "endpoints": [
+                {
+                    "peer_group": "EBGP",
+                    "source_ip": self.local_addresses[index].pk,
+                    "description": f"Session {index}",
+                    "address_families": [{"afi_safi": "ipv4_unicast", "export_policy": "TRANSIT-OUT"}],
+                    "peer": {"source_ip": self.remote_addresses[index].pk, "autonomous_system": self.remote_asn.pk},
+                    "peering": {"status": self.status_active.pk},
+                }
+                for index in range(count)
+            ],
+        }
+
+    def add_all_permissions(self):
+        """Grant the permissions to add, change and delete every BGP model the desired state covers."""
+        self.add_permissions(
+            *(
+                f"nautobot_bgp_models.{action}_{model}"
+                for action in ("add", "change", "delete")
+                for model in (
+                    "bgproutinginstance",
+                    "addressfamily",
+                    "peergroup",
+                    "peergroupaddressfamily",
+                    "peering",
+                    "peerendpoint",
+                    "peerendpointaddressfamily",
+                )
+            )
+        )
+
+    def test_dry_run(self):
+        """A dry run returns the changes without writing anything."""
+        self.add_all_permissions()
+        response = self.client.put(f"{self.url}?dry_run=true", self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertTrue(response.data["dry_run"])
+        self.assertEqual(
+            sorted((change["action"], change["object_type"]) for change in response.data["changes"]),
+            sorted(
+                [
+                    ("update", "nautobot_bgp_models.bgproutinginstance"),
+                    ("create", "nautobot_bgp_models.addressfamily"),
+                    ("create", "nautobot_bgp_models.peergroup"),
+                    ("create", "nautobot_bgp_models.peergroupaddressfamily"),
+                ]
+                + 2 * [("create", "nautobot_bgp_models.peering")]
+                + 4 * [("create", "nautobot_bgp_models.peerendpoint")]
+                + 2 * [("create", "nautobot_bgp_models.peerendpointaddressfamily")]
+            ),
+        )
+        self.assertTrue(all(change["id"] is None for change in response.data["changes"][1:]))
+        self.assertEqual(
+            response.data["changes"][0]["changes"], {"extra_attributes": {"old": None, "new": {"router": "desired"}}}
+        )
+        self.assertFalse(models.PeerGroup.objects.exists())
+        self.assertFalse(models.Peering.objects.exists())
+        self.routing_instance.refresh_from_db()
+        self.assertIsNone(self.routing_instance.extra_attributes)
+
+    def test_reconcile(self):
+        """The changes are applied, and reconciling the same desired state again doesn't change anything."""
+        self.add_all_permissions()
+        response = self.client.put(self.url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["changes"]), 12)
+        peer_group = models.PeerGroup.objects.get(routing_instance=self.routing_instance)
+        self.assertEqual(peer_group.address_families.get().import_policy, "TRANSIT-IN")
+        for endpoint in models.PeerEndpoint.objects.filter(routing_instance=self.routing_instance):
+            self.assertEqual(endpoint.peer_group, peer_group)
+            self.assertEqual(endpoint.peer.peer, endpoint)
+            self.assertEqual(endpoint.peer.autonomous_system, self.remote_asn)
+            self.assertEqual(endpoint.effective.extra_attributes, {"router": "desired"})
+            self.assertEqual(endpoint.address_families.get().export_policy, "TRANSIT-OUT")
+        self.assertEqual(ObjectChange.objects.count(), 12)
+
+        last_updated = dict(models.PeerEndpoint.objects.values_list("pk", "last_updated"))
+        response = self.client.put(self.url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["changes"], [])
+        self.assertEqual(dict(models.PeerEndpoint.objects.values_list("pk", "last_updated")), last_updated)
+        self.assertEqual(ObjectChange.objects.count(), 12)
+
+    def test_reconcile_changes(self):
+        """Records are matched on their natural keys; only the differences are written, the rest is deleted."""
+        self.add_all_permissions()
+        self.client.put(self.url, self.get_data(), format="json", **self.header)
+        endpoint = models.PeerEndpoint.objects.get(source_ip=self.local_addresses[1])
+        data = self.get_data(count=3)
+        del data["address_families"]
+        data["peer_groups"][0]["address_families"] = []
+        data["endpoints"][1]["description"] = "Updated"
+        del data["endpoints"][0]
+
+        response = self.client.put(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        changes = {(change["action"], change["object_type"]): change for change in response.data["changes"]}
+        self.assertEqual(
+            sorted(changes),
+            [
+                ("create", "nautobot_bgp_models.peerendpoint"),
+                ("create", "nautobot_bgp_models.peerendpointaddressfamily"),
+                ("create", "nautobot_bgp_models.peering"),
+                ("delete", "nautobot_bgp_models.peergroupaddressfamily"),
+                ("delete", "nautobot_bgp_models.peering"),
+                ("update", "nautobot_bgp_models.peerendpoint"),
+            ],
+        )
+        self.assertEqual(
+            changes[("update", "nautobot_bgp_models.peerendpoint")],
+            {
+                "action": "update",
+                "object_type": "nautobot_bgp_models.peerendpoint",
+                "id": endpoint.pk,
+                "display": str(endpoint),
+                "changes": {"description": {"old": "Session 1", "new": "Updated"}},
+            },
+        )
+        endpoint.refresh_from_db()
+        self.assertEqual(endpoint.description, "Updated")
+        self.assertEqual(models.Peering.objects.count(), 2)
+        self.assertFalse(models.PeerEndpoint.objects.filter(source_ip=self.local_addresses[0]).exists())
+        self.assertFalse(models.PeerGroupAddressFamily.objects.exists())
+        # The address families section was left out
+        self.assertTrue(models.AddressFamily.objects.exists())
+
+    def test_reconcile_extra_attributes_cache(self):
+        """The cached extra attributes depending on the records updated are invalidated."""
+        self.add_all_permissions()
+        self.client.put(self.url, self.get_data(), format="json", **self.header)
+        peer_group = models.PeerGroup.objects.get(routing_instance=self.routing_instance)
+        self.assertEqual(peer_group.get_extra_attributes(), {"router": "desired"})
+        data = self.get_data()
+        data["extra_attributes"] = {"router": "updated"}
+
+        response = self.client.put(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        peer_group = models.PeerGroup.objects.get(pk=peer_group.pk)
+        self.assertEqual(peer_group.get_extra_attributes(), {"router": "updated"})
+        for endpoint in models.PeerEndpoint.objects.filter(routing_instance=self.routing_instance):
+            self.assertEqual(endpoint.effective.extra_attributes, {"router": "updated"})
+
+    def test_reconcile_peer_of_other_routing_instance(self):
+        """The endpoint of another routing instance is neither updated nor deleted, and keeps its peering."""
+        self.add_all_permissions()
+        device = self.routing_instance.device
+        other_device = Device.objects.create(
+            device_type=device.device_type,
+            role=device.role,
+            name="Device 2",
+            location=device.location,
+            status=self.status_active,
+        )
+        interface = Interface.objects.create(
+            device=other_device, name="Loopback1", status=Status.objects.get_for_model(Interface).first()
+        )
+        interface.add_ip_addresses(self.remote_addresses[0])
+        other_instance = models.BGPRoutingInstance.objects.create(
+            autonomous_system=self.remote_asn, device=other_device, status=self.status_active
+        )
+        data = self.get_data(count=1)
+        data["endpoints"][0]["peer"]["routing_instance"] = other_instance.pk
+        response = self.client.put(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        peer = models.PeerEndpoint.objects.get(routing_instance=other_instance)
+
+        data["endpoints"][0]["peer"]["description"] = "Updated"
+        response = self.client.put(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["changes"], [])
+
+        data["endpoints"] = []
+        response = self.client.put(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(
+            [(change["action"], change["object_type"]) for change in response.data["changes"]],
+            [("delete", "nautobot_bgp_models.peerendpoint")],
+        )
+        self.assertFalse(models.PeerEndpoint.objects.filter(routing_instance=self.routing_instance).exists())
+        peer.refresh_from_db()
+        self.assertEqual(peer.description, "")
+        self.assertIsNone(peer.peer)
+        self.assertEqual(models.Peering.objects.get().endpoints.get(), peer)
+
+    def test_reconcile_without_effective_configuration(self):
+        """Sessions are matched on their live endpoints, even if their effective configuration is missing."""
+        self.add_all_permissions()
+        self.client.put(self.url, self.get_data(), format="json", **self.header)
+        models.PeerEndpointEffective.objects.all().delete()
+        response = self.client.put(self.url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["changes"], [])
+
+    def test_reconcile_errors(self):
+        """The errors are returned by path in the desired state, and nothing is written."""
+        self.add_all_permissions()
+        data = self.get_data(count=3)
+        data["peer_groups"].append(data["peer_groups"][0])
+        data["endpoints"][1]["source_ip"] = self.remote_addresses[1].pk
+        data["endpoints"][2]["peer_group"] = "Unknown"
+        response = self.client.put(self.url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {
+                "peer_groups": {1: {"non_field_errors": ["Duplicate BGP Peer Group in the desired state."]}},
+                "endpoints": {
+                    1: {"non_field_errors": ["Peer IP not associated with Routing Instance"]},
+                    2: {"peer_group": ["Unknown peer group Unknown."]},
+                },
+            },
+        )
+        self.assertFalse(models.PeerGroup.objects.exists())
+
+    def test_reconcile_without_permission(self):
+        """Applying the changes requires the permissions for each of them, but a dry run doesn't."""
+        self.add_permissions("nautobot_bgp_models.change_bgproutinginstance", "nautobot_bgp_models.add_peergroup")
+        response = self.client.put(self.url, self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+        response = self.client.put(f"{self.url}?dry_run=1", self.get_data(), format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertFalse(models.PeerGroup.objects.exists())
+
+
 class AddressFamilyAPITestCase(APIViewTestCases.APIViewTestCase):
     """Test the AddressFamily API."""
 
@@ -1380,3 +2066,422 @@ class PeerEndpointAddressFamilyAPITestCase(APIViewTestCases.APIViewTestCase):
                 "afi_safi": "vpnv4_unicast",
             },
         ]
+
+
+class IncludeInheritedQueryCountTestCase(APITestCase):
+    """Test that `include_inherited` list responses are resolved with a bounded number of queries."""
+
+    model = models.PeerEndpoint
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        status_active = Status.objects.get(name__iexact="active")
+        status_active.content_types.add(ContentType.objects.get_for_model(models.AutonomousSystem))
+        status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        interface_status = Status.objects.get_for_model(Interface).first()
+        namespace = Namespace.objects.first()
+        prefix_status = Status.objects.get_for_model(Prefix).first()
+        Prefix.objects.create(prefix="10.0.0.0/8", namespace=namespace, status=prefix_status)
+
+        peeringrole = Role.objects.create(name="Internal", color="333333")
+        peeringrole.content_types.add(ContentType.objects.get_for_model(models.PeerGroupTemplate))
+        template = models.PeerGroupTemplate.objects.create(
+            name="PGT1",
+            role=peeringrole,
+            autonomous_system=models.AutonomousSystem.objects.create(asn=65000, status=status_active),
+            extra_attributes={"pgt_key": "pgt_value"},
+        )
+
+        for device_index in range(5):
+            device = Device.objects.create(
+                device_type=devicetype,
+                role=devicerole,
+                name=f"Device {device_index}",
+                location=location,
+                status=status_active,
+            )
+            interface = Interface.objects.create(
+                device=device, name="Loopback1", type=InterfaceTypeChoices.TYPE_VIRTUAL, status=interface_status
+            )
+            routing_instance = models.BGPRoutingInstance.objects.create(
+                autonomous_system=models.AutonomousSystem.objects.create(
+                    asn=64512 + device_index, status=status_active
+                ),
+                device=device,
+                status=status_active,
+                extra_attributes={"ri_key": device_index},
+            )
+            peergroup = models.PeerGroup.objects.create(
+                name="Group 1",
+                routing_instance=routing_instance,
+                peergroup_template=template,
+                extra_attributes={"pg_key": device_index},
+            )
+            for endpoint_index in range(4):
+                address = IPAddress.objects.create(
+                    address=f"10.0.{device_index}.{endpoint_index + 1}/32", status=status_active, namespace=namespace
+                )
+                interface.add_ip_addresses(address)
+                models.PeerEndpoint.objects.create(
+                    routing_instance=routing_instance,
+                    source_ip=address,
+                    peer_group=peergroup,
+                    peering=models.Peering.objects.create(status=status_active),
+                    extra_attributes={"pe_key": endpoint_index},
+                )
+
+    def _count_list_queries(self, limit):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self._get_list_url()}?include_inherited=true&limit={limit}", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), limit)
+        return response, len(queries)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_count_does_not_grow_with_page_size(self):
+        """Listing 20 endpoints with inherited values costs as many queries as listing 2."""
+        self._count_list_queries(limit=1)  # Warm up per-process caches (content types, custom fields...)
+        _, small_page_queries = self._count_list_queries(limit=2)
+        response, large_page_queries = self._count_list_queries(limit=20)
+        self.assertEqual(small_page_queries, large_page_queries)
+
+        for result in response.data["results"]:
+            self.assertIsNotNone(result["autonomous_system"])
+            self.assertIsNotNone(result["role"])
+            self.assertEqual(set(result["extra_attributes"]), {"pe_key", "pg_key", "pgt_key", "ri_key"})
+
+
+class PeeringQueryCountTestCase(IncludeInheritedQueryCountTestCase):
+    """Test that Peering lists are rendered with a bounded number of queries."""
+
+    model = models.Peering
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        status_active = Status.objects.get(name__iexact="active")
+        interface_status = Status.objects.get_for_model(Interface).first()
+        namespace = Namespace.objects.first()
+        routing_instances = list(models.BGPRoutingInstance.objects.select_related("device"))
+
+        # Complete each Peering with an endpoint sourced from an interface on another device
+        for index, peering in enumerate(models.Peering.objects.select_related(None)):
+            routing_instance = routing_instances[index % len(routing_instances)]
+            if peering.endpoints.filter(routing_instance=routing_instance).exists():
+                routing_instance = routing_instances[(index + 1) % len(routing_instances)]
+            interface = Interface.objects.create(
+                device=routing_instance.device,
+                name=f"Loopback{index + 100}",
+                type=InterfaceTypeChoices.TYPE_VIRTUAL,
+                status=interface_status,
+            )
+            interface.add_ip_addresses(
+                IPAddress.objects.create(address=f"10.1.0.{index + 1}/32", status=status_active, namespace=namespace)
+            )
+            models.PeerEndpoint.objects.create(
+                routing_instance=routing_instance, source_interface=interface, peering=peering
+            )
+
+    def _count_list_queries(self, limit):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self._get_list_url()}?limit={limit}", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), limit)
+        return response, len(queries)
+
+    def _count_ui_list_queries(self, per_page):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{reverse('plugins:nautobot_bgp_models:peering_list')}?per_page={per_page}")
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        return response, len(queries)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_count_does_not_grow_with_page_size(self):
+        """Listing 20 peerings costs as many queries as listing 2."""
+        self._count_list_queries(limit=1)  # Warm up per-process caches (content types, custom fields...)
+        _, small_page_queries = self._count_list_queries(limit=2)
+        response, large_page_queries = self._count_list_queries(limit=20)
+        self.assertEqual(small_page_queries, large_page_queries)
+        for result in response.data["results"]:
+            self.assertIn("↔︎ Device", result["display"])
+            self.assertTrue(result["endpoint_a_device"].startswith("Device"))
+            self.assertTrue(any(result[f"endpoint_{side}_local_ip"].startswith("10.1.0.") for side in ("a", "z")))
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_ui_query_count_does_not_grow_with_page_size(self):
+        """Rendering 20 peerings in the UI list costs as many queries as rendering 2."""
+        self.client.force_login(self.user)
+        self._count_ui_list_queries(per_page=1)
+        _, small_page_queries = self._count_ui_list_queries(per_page=2)
+        response, large_page_queries = self._count_ui_list_queries(per_page=20)
+        self.assertEqual(small_page_queries, large_page_queries)
+        self.assertContains(response, "10.1.0.1/32")
+
+        for column in ("endpoint_a", "endpoint_a_device", "endpoint_z_asn", "endpoint_z_provider"):
+            with self.subTest(column=column):
+                response = self.client.get(f"{reverse('plugins:nautobot_bgp_models:peering_list')}?sort=-{column}")
+                self.assertHttpStatus(response, status.HTTP_200_OK)
+
+
+class DeviceEffectiveConfigAPITestCase(APITestCase):
+    """Test the effective-config endpoint of devices."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        status_active = Status.objects.get(name__iexact="active")
+        status_active.content_types.add(ContentType.objects.get_for_model(models.AutonomousSystem))
+        status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        interface_status = Status.objects.get_for_model(Interface).first()
+        cls.namespace = Namespace.objects.first()
+        prefix_status = Status.objects.get_for_model(Prefix).first()
+        Prefix.objects.create(prefix="10.0.0.0/8", namespace=cls.namespace, status=prefix_status)
+
+        cls.status_active = status_active
+        cls.template = models.PeerGroupTemplate.objects.create(
+            name="PGT1",
+            autonomous_system=models.AutonomousSystem.objects.create(asn=65000, status=status_active),
+            extra_attributes={"pgt_key": "pgt_value", "shared": "pgt"},
+        )
+        cls.devices = []
+        cls.interfaces = []
+        cls.peer_groups = []
+        for device_index in range(2):
+            device = Device.objects.create(
+                device_type=devicetype,
+                role=devicerole,
+                name=f"Device {device_index}",
+                location=location,
+                status=status_active,
+            )
+            cls.devices.append(device)
+            cls.interfaces.append(
+                Interface.objects.create(
+                    device=device, name="Loopback1", type=InterfaceTypeChoices.TYPE_VIRTUAL, status=interface_status
+                )
+            )
+            routing_instance = models.BGPRoutingInstance.objects.create(
+                autonomous_system=models.AutonomousSystem.objects.create(
+                    asn=64512 + device_index, status=status_active
+                ),
+                device=device,
+                status=status_active,
+                extra_attributes={"ri_key": device_index, "shared": "ri"},
+            )
+            models.AddressFamily.objects.create(
+                routing_instance=routing_instance,
+                afi_safi=choices.AFISAFIChoices.AFI_IPV4_UNICAST,
+                extra_attributes={"af_key": device_index},
+            )
+            peer_group = models.PeerGroup.objects.create(
+                name="Group 1",
+                routing_instance=routing_instance,
+                peergroup_template=cls.template,
+                extra_attributes={"shared": "pg"},
+            )
+            models.PeerGroupAddressFamily.objects.create(
+                peer_group=peer_group,
+                afi_safi=choices.AFISAFIChoices.AFI_IPV4_UNICAST,
+                import_policy="PG-IMPORT",
+                extra_attributes={"pgaf_key": device_index},
+            )
+            cls.peer_groups.append(peer_group)
+        cls.create_peerings(1)
+
+    @classmethod
+    def create_peerings(cls, count):
+        """Create `count` peerings between the two devices, each with an address family on the first endpoint."""
+        # The effective configuration of the endpoints is stored once the transaction is committed
+        with cls.captureOnCommitCallbacks(execute=True):
+            start = models.Peering.objects.count()
+            for index in range(start, start + count):
+                peering = models.Peering.objects.create(status=cls.status_active)
+                endpoints = []
+                for device_index, interface in enumerate(cls.interfaces):
+                    address = IPAddress.objects.create(
+                        address=f"10.{device_index}.0.{index + 1}/32", status=cls.status_active, namespace=cls.namespace
+                    )
+                    interface.add_ip_addresses(address)
+                    endpoints.append(
+                        models.PeerEndpoint.objects.create(
+                            routing_instance=models.BGPRoutingInstance.objects.get(device=interface.device),
+                            source_ip=address,
+                            peer_group=cls.peer_groups[device_index],
+                            peering=peering,
+                            extra_attributes={"pe_key": index},
+                        )
+                    )
+                peering.update_peers()
+                models.PeerEndpointAddressFamily.objects.create(
+                    peer_endpoint=endpoints[0],
+                    afi_safi=choices.AFISAFIChoices.AFI_IPV4_UNICAST,
+                    export_policy="PE-EXPORT",
+                )
+
+    def _get_url(self, device):
+        return reverse(
+            "plugins-api:nautobot_bgp_models-api:device-effective-config",
+            kwargs={"pk": device.pk},
+        )
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_effective_config(self):
+        """The configuration includes inherited values and merged extra attributes at every level."""
+        response = self.client.get(self._get_url(self.devices[0]), **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["device"], {"id": str(self.devices[0].pk), "name": "Device 0"})
+
+        (routing_instance,) = response.data["routing_instances"]
+        self.assertEqual(routing_instance["autonomous_system"], 64512)
+        self.assertEqual(routing_instance["extra_attributes"], {"ri_key": 0, "shared": "ri"})
+        self.assertEqual(routing_instance["address_families"][0]["afi_safi"], "ipv4_unicast")
+
+        (peer_group,) = routing_instance["peer_groups"]
+        self.assertEqual(peer_group["autonomous_system"], 65000)
+        self.assertEqual(peer_group["peergroup_template"], "PGT1")
+        self.assertEqual(peer_group["extra_attributes"], {"pgt_key": "pgt_value", "shared": "pg", "ri_key": 0})
+        self.assertEqual(peer_group["address_families"][0]["import_policy"], "PG-IMPORT")
+
+        (endpoint,) = routing_instance["endpoints"]
+        self.assertEqual(endpoint["local_ip"], "10.0.0.1/32")
+        self.assertEqual(endpoint["autonomous_system"], 65000)
+        self.assertEqual(endpoint["peer_group"], "Group 1")
+        self.assertEqual(
+            endpoint["extra_attributes"], {"pgt_key": "pgt_value", "shared": "ri", "ri_key": 0, "pe_key": 0}
+        )
+        (address_family,) = endpoint["address_families"]
+        self.assertEqual(address_family["import_policy"], "PG-IMPORT")
+        self.assertEqual(address_family["export_policy"], "PE-EXPORT")
+        self.assertEqual(address_family["extra_attributes"], {"pgaf_key": 0, "af_key": 0})
+        self.assertEqual(endpoint["peer"]["device"], "Device 1")
+        self.assertEqual(endpoint["peer"]["local_ip"], "10.1.0.1/32")
+        self.assertEqual(endpoint["peer"]["autonomous_system"], 65000)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_effective_config_stored(self):
+        """The configuration of the endpoints is read from their stored effective configuration, if any."""
+        endpoint = models.PeerEndpoint.objects.get(routing_instance__device=self.devices[0])
+        models.PeerEndpointEffective.objects.filter(peer_endpoint=endpoint).update(extra_attributes={"stored": True})
+        response = self.client.get(self._get_url(self.devices[0]), **self.header)
+        self.assertEqual(response.data["routing_instances"][0]["endpoints"][0]["extra_attributes"], {"stored": True})
+
+        models.PeerEndpointEffective.objects.filter(peer_endpoint=endpoint).delete()
+        response = self.client.get(self._get_url(self.devices[0]), **self.header)
+        (endpoint_config,) = response.data["routing_instances"][0]["endpoints"]
+        self.assertEqual(endpoint_config["local_ip"], "10.0.0.1/32")
+        self.assertEqual(endpoint_config["autonomous_system"], 65000)
+        self.assertEqual(
+            endpoint_config["extra_attributes"], {"pgt_key": "pgt_value", "shared": "ri", "ri_key": 0, "pe_key": 0}
+        )
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_count_does_not_grow_with_endpoints(self):
+        """The configuration of a device with 5 peerings costs as many queries as with 1."""
+        self.client.get(self._get_url(self.devices[0]), **self.header)  # Warm up per-process caches
+        with CaptureQueriesContext(connection) as one_peering:
+            self.client.get(self._get_url(self.devices[0]), **self.header)
+        self.create_peerings(4)
+        with CaptureQueriesContext(connection) as five_peerings:
+            response = self.client.get(self._get_url(self.devices[0]), **self.header)
+        self.assertEqual(len(response.data["routing_instances"][0]["endpoints"]), 5)
+        self.assertEqual(len(one_peering), len(five_peerings))
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_etag(self):
+        """A request with a matching If-None-Match header gets a 304 response, until the configuration changes."""
+        url = self._get_url(self.devices[0])
+        response = self.client.get(url, **self.header)
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.header)
+        self.assertHttpStatus(response, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        models.PeerGroup.objects.filter(pk=self.peer_groups[0].pk).update(description="Changed")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_permissions(self):
+        """The device must be visible to the user, and only the BGP objects the user may view are included."""
+        url = self._get_url(self.devices[0])
+        self.assertHttpStatus(self.client.get(url, **self.header), status.HTTP_403_FORBIDDEN)
+
+        obj_perm = ObjectPermission.objects.create(
+            name="Device 1 only", constraints={"name": "Device 1"}, actions=["view"]
+        )
+        obj_perm.object_types.add(ContentType.objects.get_for_model(Device))
+        obj_perm.users.add(self.user)
+        self.assertHttpStatus(self.client.get(url, **self.header), status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(self._get_url(self.devices[1]), **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data["routing_instances"], [])
+
+    def _get_export_url(self):
+        return reverse("plugins-api:nautobot_bgp_models-api:device-effective-config-export")
+
+    def _get_export(self, query=""):
+        response = self.client.get(f"{self._get_export_url()}{query}", **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_export(self):
+        """The export streams one line per device, matching the effective configuration of the device."""
+        configs = self._get_export()
+        self.assertEqual(
+            [config["device"]["name"] for config in configs],
+            [device.name for device in sorted(self.devices, key=lambda device: device.pk)],
+        )
+        for config in configs:
+            response = self.client.get(self._get_url(Device.objects.get(pk=config["device"]["id"])), **self.header)
+            self.assertEqual(config, json.loads(response.content))
+
+        configs = self._get_export("?name=Device 1")
+        self.assertEqual([config["device"]["name"] for config in configs], ["Device 1"])
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_export_query_count(self):
+        """Within a chunk, the number of queries doesn't depend on the number of devices."""
+        self._get_export()  # Warm up per-process caches
+        with CaptureQueriesContext(connection) as one_device:
+            self.assertEqual(len(self._get_export("?name=Device 1")), 1)
+        with CaptureQueriesContext(connection) as two_devices:
+            self.assertEqual(len(self._get_export()), 2)
+        self.assertEqual(len(one_device), len(two_devices))
+
+        with mock.patch("nautobot_bgp_models.effective_config.EXPORT_CHUNK_SIZE", 1):
+            with CaptureQueriesContext(connection) as two_chunks:
+                self.assertEqual(len(self._get_export()), 2)
+        self.assertGreater(len(two_chunks), len(two_devices))
+
+    def test_export_permissions(self):
+        """Only the devices the user may view are exported."""
+        response = self.client.get(self._get_export_url(), **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+
+        obj_perm = ObjectPermission.objects.create(
+            name="Device 1 only", constraints={"name": "Device 1"}, actions=["view"]
+        )
+        obj_perm.object_types.add(ContentType.objects.get_for_model(Device))
+        obj_perm.users.add(self.user)
+        configs = self._get_export()
+        self.assertEqual([config["device"]["name"] for config in configs], ["Device 1"])
+        self.assertEqual(configs[0]["routing_instances"], [])
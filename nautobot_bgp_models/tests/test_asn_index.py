@@ -0,0 +1,143 @@
+"""Unit test automation for the allocated ASN index in nautobot_bgp_models."""
+
+import random
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import SimpleTestCase, TestCase
+from nautobot.extras.models import Status
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.asn_index import ARRAY_CONTAINER_MAX, AllocatedASNIndex, ASNBitmap, allocated_asn_index
+
+
+def expected_gaps(values, first, last):
+    """Return the blocks of numbers between `first` and `last` absent from the set `values`, the slow way."""
+    gaps, start = [], None
+    for value in range(first, last + 1):
+        if value not in values and start is None:
+            start = value
+        elif value in values and start is not None:
+            gaps.append((start, value - 1))
+            start = None
+    if start is not None:
+        gaps.append((start, last))
+    return gaps
+
+
+class ASNBitmapTestCase(SimpleTestCase):
+    """Test the ASNBitmap data structure against a plain set."""
+
+    def setUp(self):
+        rng = random.Random(42)
+        # A sparse container, a dense one and a few values spread over the 32-bit space
+        self.values = set(rng.sample(range(0, 65536), 100))
+        self.values |= set(rng.sample(range(65536, 2 * 65536), 2 * ARRAY_CONTAINER_MAX))
+        self.values |= set(range(3 * 65536 - 10, 3 * 65536 + 10))
+        self.values |= {4200000000, 4294967294}
+        self.bitmap = ASNBitmap(sorted(self.values))
+
+    def test_contents(self):
+        """The bitmap holds the same values as the set, in ascending order."""
+        self.assertEqual(len(self.bitmap), len(self.values))
+        self.assertEqual(list(self.bitmap), sorted(self.values))
+        self.assertIn(4200000000, self.bitmap)
+        self.assertNotIn(4200000001, self.bitmap)
+
+    def test_count(self):
+        """Counting the values of an interval matches the set."""
+        for first, last in [(0, 2**32 - 1), (10, 65535), (65000, 70000), (65536, 2 * 65536 - 1), (196600, 196700)]:
+            with self.subTest(first=first, last=last):
+                self.assertEqual(
+                    self.bitmap.count(first, last), len([value for value in self.values if first <= value <= last])
+                )
+
+    def test_gaps(self):
+        """Runs and gaps, including those spanning containers, match the set."""
+        for first, last in [(0, 3 * 65536 + 20), (65530, 65600), (196600, 196700), (4199999990, 4200000010)]:
+            with self.subTest(first=first, last=last):
+                self.assertEqual(list(self.bitmap.gaps(first, last)), expected_gaps(self.values, first, last))
+        self.assertEqual(list(self.bitmap.runs(196590, 196700)), [(3 * 65536 - 10, 3 * 65536 + 9)])
+        self.assertEqual(list(self.bitmap.runs(196600, 196610)), [(196600, 196610)])
+
+    def test_add_and_discard(self):
+        """Containers switch between arrays and bitmaps as values are added and removed."""
+        bitmap = ASNBitmap()
+        for value in range(ARRAY_CONTAINER_MAX + 1):
+            self.assertTrue(bitmap.add(value * 2))
+        self.assertFalse(bitmap.add(0))
+        self.assertEqual(bitmap.count(0, 65535), ARRAY_CONTAINER_MAX + 1)
+        for value in range(ARRAY_CONTAINER_MAX):
+            self.assertTrue(bitmap.discard(value * 2))
+        self.assertFalse(bitmap.discard(1))
+        self.assertEqual(list(bitmap), [ARRAY_CONTAINER_MAX * 2])
+        bitmap.discard(ARRAY_CONTAINER_MAX * 2)
+        self.assertEqual(len(bitmap), 0)
+        self.assertEqual(list(bitmap.gaps(10, 20)), [(10, 20)])
+
+
+class AllocatedASNIndexTestCase(TestCase):
+    """Test the AllocatedASNIndex and the AutonomousSystemRange methods relying on it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """One-time class data setup."""
+        cls.status_active = Status.objects.get(name__iexact="active")
+        cls.status_active.content_types.add(ContentType.objects.get_for_model(models.AutonomousSystem))
+        for asn in (100, 101, 105, 106, 107, 120):
+            models.AutonomousSystem.objects.create(asn=asn, status=cls.status_active)
+        cls.asn_range = models.AutonomousSystemRange.objects.create(name="Range", asn_min=100, asn_max=125)
+
+    def setUp(self):
+        """Per-test data setup."""
+        self.index = AllocatedASNIndex(refresh_interval=3600)
+        # Changes rolled back by other tests may linger in the module-level index until its next check
+        patcher = mock.patch.object(allocated_asn_index, "refresh_interval", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        allocated_asn_index.clear()
+        self.addCleanup(allocated_asn_index.clear)
+
+    def test_queries(self):
+        """The index answers from memory once loaded."""
+        self.assertEqual(self.index.count(100, 125), 6)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.count(102, 106), 2)
+            self.assertEqual(self.index.gaps(100, 125), [(102, 104), (108, 119), (121, 125)])
+            self.assertEqual(self.index.largest_gap(100, 125), (108, 119))
+            self.assertEqual(self.index.first_gap(100, 125, size=4), (108, 119))
+            self.assertIsNone(self.index.first_gap(100, 125, size=13))
+
+    def test_signals(self):
+        """Committed changes are applied to the index without loading it again."""
+        allocated_asn_index.count(100, 125)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.AutonomousSystem.objects.create(asn=102, status=self.status_active)
+            models.AutonomousSystem.objects.get(asn=120).delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(allocated_asn_index.gaps(100, 125), [(103, 104), (108, 125)])
+        # The fingerprint was kept up to date as well, so checking it doesn't cause the index to be loaded again
+        with mock.patch.object(allocated_asn_index, "refresh_interval", 0), self.assertNumQueries(1):
+            self.assertEqual(allocated_asn_index.gaps(100, 125), [(103, 104), (108, 125)])
+
+    def test_stale(self):
+        """Changes made behind the index's back are picked up at the next check."""
+        self.index.count(100, 125)
+        models.AutonomousSystem.objects.filter(asn=105).delete()
+        self.assertEqual(self.index.count(100, 125), 6)
+        self.index.refresh_interval = 0
+        self.assertEqual(self.index.count(100, 125), 5)
+
+    def test_range_methods(self):
+        """AutonomousSystemRange analytics use the module-level index."""
+        with self.captureOnCommitCallbacks(execute=True):
+            models.AutonomousSystem.objects.create(asn=121, status=self.status_active)
+        utilization = self.asn_range.get_utilization()
+        self.assertEqual((utilization.numerator, utilization.denominator), (7, 26))
+        self.assertEqual(self.asn_range.get_available_count(), 19)
+        self.assertEqual(self.asn_range.get_largest_available_block(), (108, 119))
+        self.assertEqual(self.asn_range.get_first_available_block(size=3), (102, 104))
+        other = models.AutonomousSystemRange(name="Other", asn_min=120, asn_max=200)
+        self.assertEqual(self.asn_range.get_overlap(other), (120, 125, 2))
+        self.assertIsNone(self.asn_range.get_overlap(models.AutonomousSystemRange(asn_min=1, asn_max=99)))
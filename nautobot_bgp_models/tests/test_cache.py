@@ -0,0 +1,127 @@
+"""Unit test automation for the extra attributes cache in nautobot_bgp_models."""
+
+from unittest import mock
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase
+from nautobot.dcim.models import Device, DeviceType, Manufacturer, Location, LocationType
+from nautobot.extras.models import Status, Role
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.cache import ExtraAttributesCache, extra_attributes_cache
+
+
+class ExtraAttributesCacheTestCase(TestCase):
+    """Test the caching of resolved extra attributes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """One-time class data setup."""
+        status_active = Status.objects.get(name__iexact="active")
+
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        device = Device.objects.create(
+            device_type=devicetype, role=devicerole, name="Device 1", location=location, status=status_active
+        )
+        autonomous_system = models.AutonomousSystem.objects.create(asn=65000, status=status_active)
+
+        cls.routing_instance = models.BGPRoutingInstance.objects.create(
+            autonomous_system=autonomous_system,
+            device=device,
+            status=status_active,
+            extra_attributes={"timers": [6, 20], "ttl": 1},
+        )
+        cls.template = models.PeerGroupTemplate.objects.create(name="Template", extra_attributes={"ttl": 2})
+        cls.peergroup = models.PeerGroup.objects.create(
+            name="Group",
+            routing_instance=cls.routing_instance,
+            peergroup_template=cls.template,
+            extra_attributes={"ttl": 3},
+        )
+
+    def setUp(self):
+        """Per-test data setup."""
+        extra_attributes_cache.clear()
+        self.addCleanup(extra_attributes_cache.clear)
+
+    def test_hit_and_miss(self):
+        """A second resolution of the same object should be served from the cache."""
+        expected = {"timers": [6, 20], "ttl": 3}
+        self.assertEqual(self.peergroup.get_extra_attributes(), expected)
+        self.assertEqual(extra_attributes_cache.stats(), {"hits": 0, "misses": 1, "entries": 1})
+
+        with mock.patch.object(models.PeerGroup, "_merge_extra_attributes") as merge:
+            self.assertEqual(models.PeerGroup.objects.get(pk=self.peergroup.pk).get_extra_attributes(), expected)
+            merge.assert_not_called()
+        self.assertEqual(extra_attributes_cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_returned_value_is_a_copy(self):
+        """Modifying the returned extra attributes shouldn't alter the cached value."""
+        self.peergroup.get_extra_attributes()["timers"].append(60)
+        self.assertEqual(self.peergroup.get_extra_attributes()["timers"], [6, 20])
+
+    def test_ancestor_change(self):
+        """Saving an ancestor should invalidate the entries depending on it."""
+        self.peergroup.get_extra_attributes()
+        self.routing_instance.extra_attributes = {"timers": [3, 9]}
+        self.routing_instance.save()
+        self.assertEqual(extra_attributes_cache.stats()["entries"], 0)
+
+        peergroup = models.PeerGroup.objects.get(pk=self.peergroup.pk)
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [3, 9], "ttl": 3})
+
+    def test_unsaved_object_is_not_cached(self):
+        """Objects which haven't been saved should bypass the cache."""
+        peergroup = models.PeerGroup(name="Unsaved", routing_instance=self.routing_instance, extra_attributes={"a": 1})
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [6, 20], "ttl": 1, "a": 1})
+        self.assertEqual(extra_attributes_cache.stats(), {"hits": 0, "misses": 0, "entries": 0})
+
+    def test_in_memory_change_is_not_cached(self):
+        """Objects whose extra attributes, or those of an ancestor, were changed in memory should bypass the cache."""
+        peergroup = models.PeerGroup.objects.get(pk=self.peergroup.pk)
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [6, 20], "ttl": 3})
+
+        peergroup.extra_attributes["ttl"] = 4
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [6, 20], "ttl": 4})
+        peergroup.extra_attributes["ttl"] = 3
+        peergroup.routing_instance.extra_attributes = {"timers": [3, 9]}
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [3, 9], "ttl": 3})
+        self.assertEqual(extra_attributes_cache.stats(), {"hits": 0, "misses": 1, "entries": 1})
+
+        # Once saved, the changes are cached again
+        peergroup.routing_instance.save()
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [3, 9], "ttl": 3})
+        self.assertEqual(peergroup.get_extra_attributes(), {"timers": [3, 9], "ttl": 3})
+        self.assertEqual(extra_attributes_cache.stats(), {"hits": 1, "misses": 2, "entries": 1})
+
+    def test_max_entries(self):
+        """The least recently used entries should be evicted first."""
+        local_cache = ExtraAttributesCache(max_entries=1)
+        local_cache.get_or_compute(self.template, [], dict)
+        local_cache.get_or_compute(self.peergroup, [self.template], dict)
+        self.assertEqual(local_cache.stats()["entries"], 1)
+        self.assertIsNone(local_cache.make_key(models.PeerGroup(), []))
+
+    def test_shared_cache(self):
+        """With a cache alias, entries should be shared through the Django cache."""
+        cache.clear()
+        compute = mock.Mock(return_value={"ttl": 3})
+        ExtraAttributesCache(cache_alias="default").get_or_compute(self.peergroup, [self.template], compute)
+
+        other_process_cache = ExtraAttributesCache(cache_alias="default")
+        self.assertEqual(other_process_cache.get_or_compute(self.peergroup, [self.template], compute), {"ttl": 3})
+        compute.assert_called_once()
+        self.assertEqual(other_process_cache.stats(), {"hits": 1, "misses": 0, "entries": 1})
+
+    def test_lazy(self):
+        """The lazy extra attributes should match the eager ones, without going through the cache."""
+        lazy = self.peergroup.get_extra_attributes(lazy=True)
+        self.assertEqual(extra_attributes_cache.stats()["misses"], 0)
+        self.assertEqual(lazy, self.peergroup.get_extra_attributes())
@@ -0,0 +1,66 @@
+"""Unit tests for the management commands of nautobot_bgp_models."""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase
+from nautobot.dcim.models import Device, DeviceType, Location, LocationType, Manufacturer
+from nautobot.extras.models import Role, Status
+
+from nautobot_bgp_models import models
+
+
+class ExportBGPEffectiveConfigTestCase(TestCase):
+    """Test the export_bgp_effective_config command."""
+
+    @classmethod
+    def setUpTestData(cls):
+        status_active = Status.objects.get(name__iexact="active")
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        cls.devices = [
+            Device.objects.create(
+                device_type=devicetype, role=devicerole, name=f"Device {index}", location=location, status=status_active
+            )
+            for index in range(3)
+        ]
+        models.BGPRoutingInstance.objects.create(
+            autonomous_system=models.AutonomousSystem.objects.create(asn=65000, status=status_active),
+            device=cls.devices[0],
+            status=status_active,
+            extra_attributes={"key": "value"},
+        )
+
+    def test_export_to_stdout(self):
+        """One line is written per device, in chunks of any size."""
+        for chunk_size in (1, 2, 200):
+            with self.subTest(chunk_size=chunk_size):
+                stdout = StringIO()
+                call_command("export_bgp_effective_config", chunk_size=chunk_size, stdout=stdout, stderr=StringIO())
+                configs = [json.loads(line) for line in stdout.getvalue().splitlines()]
+                self.assertEqual(
+                    sorted(config["device"]["name"] for config in configs), ["Device 0", "Device 1", "Device 2"]
+                )
+                (config,) = [config for config in configs if config["routing_instances"]]
+                self.assertEqual(config["routing_instances"][0]["autonomous_system"], 65000)
+                self.assertEqual(config["routing_instances"][0]["extra_attributes"], {"key": "value"})
+
+    def test_export_to_file(self):
+        """The selected devices are written to the output file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "export.ndjson")
+            stderr = StringIO()
+            call_command("export_bgp_effective_config", device=["Device 0", "Device 2"], output=path, stderr=stderr)
+            with open(path, encoding="utf-8") as output:
+                configs = [json.loads(line) for line in output]
+        self.assertEqual(sorted(config["device"]["name"] for config in configs), ["Device 0", "Device 2"])
+        self.assertIn("Exported the BGP configuration of 2 devices", stderr.getvalue())
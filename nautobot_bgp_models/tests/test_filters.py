@@ -3,7 +3,7 @@
 from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
 
-# from nautobot.circuits.models import Provider
+from nautobot.circuits.models import Provider
 from nautobot.dcim.choices import InterfaceTypeChoices
 from nautobot.dcim.models import Device, DeviceType, Interface, Manufacturer, Location, LocationType
 from nautobot.extras.models import Status, Role
@@ -232,10 +232,10 @@ class PeerEndpointTestCase(TestCase):
         status_active = Status.objects.get(name__iexact="active")
         status_active.content_types.add(ContentType.objects.get_for_model(models.AutonomousSystem))
 
-        # provider = Provider.objects.create(name="Provider", slug="provider")
+        provider = Provider.objects.create(name="Provider")
 
         asn = models.AutonomousSystem.objects.create(asn=4294967295, status=status_active)
-        # asn_15521 = models.AutonomousSystem.objects.create(asn=15521, status=status_active, provider=provider)
+        asn_15521 = models.AutonomousSystem.objects.create(asn=15521, status=status_active, provider=provider)
 
         peeringrole = Role.objects.create(name="Internal", color="ffffff")
         peeringrole.content_types.add(ContentType.objects.get_for_model(models.PeerGroup))
@@ -281,13 +281,15 @@ class PeerEndpointTestCase(TestCase):
             name="Group B",
             role=peeringrole,
             routing_instance=cls.bgp_routing_instance,
+            autonomous_system=asn_15521,
+            enabled=False,
         )
 
         peering1 = models.Peering.objects.create(status=status_active)
         peering2 = models.Peering.objects.create(status=status_active)
         peering3 = models.Peering.objects.create(status=status_active)
 
-        models.PeerEndpoint.objects.create(
+        endpoint1 = models.PeerEndpoint.objects.create(
             routing_instance=cls.bgp_routing_instance,
             source_ip=addresses[0],
             autonomous_system=asn,
@@ -300,12 +302,13 @@ class PeerEndpointTestCase(TestCase):
             peer_group=cls.peergroup,
             peering=peering2,
         )
-        models.PeerEndpoint.objects.create(
+        endpoint3 = models.PeerEndpoint.objects.create(
             source_ip=addresses[2],
             peer_group=cls.peergroup,
             enabled=False,
             peering=peering3,
         )
+        models.PeerEndpoint.objects.filter(pk=endpoint1.pk).update(peer=endpoint3)
 
     def test_search(self):
         """Test text search."""
@@ -342,6 +345,54 @@ class PeerEndpointTestCase(TestCase):
         params = {"device_id": [self.device.pk]}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
 
+    def test_effective_asn(self):
+        """Test filtering by inherited autonomous system."""
+        params = {"effective_asn": [4294967295]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+        params = {"effective_asn": [15521]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+        params = {"effective_asn": [15521, 4294967295]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 3)
+
+    def test_effective_enabled(self):
+        """Test filtering by inherited enabled status."""
+        params = {"effective_enabled": True}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+        params = {"effective_enabled": False}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+    def test_effective_role(self):
+        """Test filtering by inherited role."""
+        params = {"effective_role": ["Internal"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+    def test_local_ip(self):
+        """Test filtering by local IP address."""
+        params = {"local_ip": ["1.1.1.1", "1.1.1.3"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+        params = {"local_ip": ["1.1.1.1/24"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 0)
+
+        params = {"local_ip": ["invalid"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 0)
+
+    def test_provider(self):
+        """Test filtering by provider of the inherited autonomous system."""
+        params = {"provider": ["Provider"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+    def test_remote_asn(self):
+        """Test filtering by inherited autonomous system of the peer."""
+        params = {"remote_asn": [15521]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+        params = {"remote_asn": [4294967295]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 0)
+
 
 class PeeringTestCase(TestCase):
     """Test filtering of Peering records."""
@@ -362,7 +413,9 @@ class PeeringTestCase(TestCase):
 
         asn1 = models.AutonomousSystem.objects.create(asn=65000, status=status_active)
         asn2 = models.AutonomousSystem.objects.create(asn=66000, status=status_active)
-        asn3 = models.AutonomousSystem.objects.create(asn=12345, status=status_active)
+        asn3 = models.AutonomousSystem.objects.create(
+            asn=12345, status=status_active, provider=Provider.objects.create(name="Provider")
+        )
 
         manufacturer = Manufacturer.objects.create(name="Cisco")
         devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
@@ -628,34 +681,39 @@ class PeeringTestCase(TestCase):
         params = {"peer_endpoint_role": ["router", "switch"]}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 5)
 
-    # def test_asn(self):
-    #     """Test filtering by asn name."""
-    #     params = {"asn": [65000]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
-    #
-    #     params = {"asn": [66000]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 3)
-    #
-    #     params = {"asn": [66000, 12345]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 3)
-
-    # def test_address(self):
-    #     """Test filtering by device name."""
-    #     params = {"address": ["10.1.1.1"]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
-    #
-    #     params = {"address": ["10.1.1.1/32"]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 0)
-    #
-    #     params = {"address": ["10.1.1.1/24"]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
-    #
-    #     # Both IP addresses are part of the same Peering so only 1 Peering is expected
-    #     params = {"address": ["10.1.1.1", "10.1.1.2"]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
-    #
-    #     params = {"address": ["10.1.1.3", "10.1.1.5"]}
-    #     self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+    def test_asn(self):
+        """Test filtering by autonomous system of an endpoint."""
+        params = {"asn": [65000]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 5)
+
+        params = {"asn": [66000]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+        params = {"asn": [66000, 12345]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 4)
+
+    def test_address(self):
+        """Test filtering by local IP address of an endpoint."""
+        params = {"address": ["10.1.1.1"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+        params = {"address": ["10.1.1.1/32"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 0)
+
+        params = {"address": ["10.1.1.1/24"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+        # Both IP addresses are part of the same Peering so only 1 Peering is expected
+        params = {"address": ["10.1.1.1", "10.1.1.2"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+        params = {"address": ["10.1.1.3", "10.1.1.5"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+    def test_provider(self):
+        """Test filtering by provider of the autonomous system of an endpoint."""
+        params = {"provider": ["Provider"]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 3)
 
 
 class AddressFamilyTestCase(TestCase):
@@ -0,0 +1,275 @@
+"""Unit tests for the GraphQL types of nautobot_bgp_models."""
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from nautobot.core.graphql import execute_query
+from nautobot.dcim.choices import InterfaceTypeChoices
+from nautobot.dcim.models import Device, DeviceType, Interface, Location, LocationType, Manufacturer
+from nautobot.extras.models import Role, Status
+from nautobot.ipam.models import IPAddress, Namespace, Prefix
+from nautobot.users.models import ObjectPermission
+
+from nautobot_bgp_models import choices, models
+
+User = get_user_model()
+
+QUERY = """
+{
+  bgp_routing_instances(device: ["Device 0", "Device 1"]) {
+    device { name }
+    address_families { afi_safi extra_attributes }
+    peer_groups {
+      name
+      effective_autonomous_system { asn }
+      effective_extra_attributes
+      fields_inherited
+      address_families { afi_safi effective_extra_attributes fields_inherited }
+    }
+    endpoints {
+      id
+      effective_autonomous_system { asn }
+      effective_local_ip { address }
+      effective_extra_attributes
+      fields_inherited
+      address_families { afi_safi effective_extra_attributes fields_inherited }
+    }
+  }
+}
+"""
+
+PLAIN_QUERY = """
+{
+  bgp_routing_instances(device: ["Device 0", "Device 1"]) {
+    device { name }
+    address_families { afi_safi extra_attributes }
+    peer_groups {
+      name
+      address_families { afi_safi }
+    }
+    endpoints {
+      id
+      address_families { afi_safi }
+    }
+  }
+}
+"""
+
+
+class InheritedFieldsGraphQLTestCase(TestCase):
+    """Test the effective fields of the GraphQL types of models with inherited fields."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        cls.user = User.objects.create(username="Superuser", is_superuser=True)
+        status_active = Status.objects.get(name__iexact="active")
+        status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        interface_status = Status.objects.get_for_model(Interface).first()
+        cls.namespace = Namespace.objects.first()
+        Prefix.objects.create(
+            prefix="10.0.0.0/8", namespace=cls.namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+
+        cls.status_active = status_active
+        cls.template = models.PeerGroupTemplate.objects.create(
+            name="PGT1",
+            autonomous_system=models.AutonomousSystem.objects.create(asn=65000, status=status_active),
+            extra_attributes={"pgt_key": "pgt_value", "shared": "pgt"},
+        )
+        cls.interfaces = []
+        cls.peer_groups = []
+        for device_index in range(2):
+            device = Device.objects.create(
+                device_type=devicetype,
+                role=devicerole,
+                name=f"Device {device_index}",
+                location=location,
+                status=status_active,
+            )
+            cls.interfaces.append(
+                Interface.objects.create(
+                    device=device, name="Loopback1", type=InterfaceTypeChoices.TYPE_VIRTUAL, status=interface_status
+                )
+            )
+            routing_instance = models.BGPRoutingInstance.objects.create(
+                autonomous_system=models.AutonomousSystem.objects.create(
+                    asn=64512 + device_index, status=status_active
+                ),
+                device=device,
+                status=status_active,
+                extra_attributes={"ri_key": device_index, "shared": "ri"},
+            )
+            models.AddressFamily.objects.create(
+                routing_instance=routing_instance,
+                afi_safi=choices.AFISAFIChoices.AFI_IPV4_UNICAST,
+                extra_attributes={"af_key": device_index},
+            )
+            peer_group = models.PeerGroup.objects.create(
+                name="Group 1",
+                routing_instance=routing_instance,
+                peergroup_template=cls.template,
+                extra_attributes={"shared": "pg"},
+            )
+            models.PeerGroupAddressFamily.objects.create(
+                peer_group=peer_group,
+                afi_safi=choices.AFISAFIChoices.AFI_IPV4_UNICAST,
+                import_policy="PG-IMPORT",
+                extra_attributes={"pgaf_key": device_index},
+            )
+            cls.peer_groups.append(peer_group)
+        cls.create_peerings(1)
+
+    @classmethod
+    def create_peerings(cls, count):
+        """Create `count` peerings between the two devices, the first endpoint of each through its interface IP."""
+        start = models.Peering.objects.count()
+        for index in range(start, start + count):
+            peering = models.Peering.objects.create(status=cls.status_active)
+            for device_index, interface in enumerate(cls.interfaces):
+                address = IPAddress.objects.create(
+                    address=f"10.{device_index}.0.{index + 1}/32", status=cls.status_active, namespace=cls.namespace
+                )
+                interface.add_ip_addresses(address)
+                endpoint = models.PeerEndpoint.objects.create(
+                    routing_instance=models.BGPRoutingInstance.objects.get(device=interface.device),
+                    source_ip=address if device_index else None,
+                    source_interface=None if device_index else interface,
+                    peer_group=cls.peer_groups[device_index],
+                    peering=peering,
+                    extra_attributes={"pe_key": index},
+                )
+                models.PeerEndpointAddressFamily.objects.create(
+                    peer_endpoint=endpoint, afi_safi=choices.AFISAFIChoices.AFI_IPV4_UNICAST, export_policy="PE-EXPORT"
+                )
+
+    def execute(self, query=QUERY, user=None):
+        """Execute `query` and return its routing instances, keyed by device name, checking that it didn't fail."""
+        result = execute_query(query, user=user or self.user)
+        self.assertIsNone(result.errors)
+        return {
+            routing_instance["device"]["name"]: routing_instance
+            for routing_instance in result.data["bgp_routing_instances"]
+        }
+
+    def test_peer_group_fields(self):
+        """The inherited ASN, extra attributes and fields of peer groups and their address families are resolved."""
+        routing_instances = self.execute()
+        (peer_group,) = routing_instances["Device 0"]["peer_groups"]
+        self.assertEqual(peer_group["effective_autonomous_system"], {"asn": 65000})
+        self.assertEqual(
+            peer_group["effective_extra_attributes"], {"pgt_key": "pgt_value", "shared": "pg", "ri_key": 0}
+        )
+        self.assertEqual(
+            peer_group["fields_inherited"]["autonomous_system"],
+            {
+                "value": 65000,
+                "inherited": True,
+                "source": {"object_type": "nautobot_bgp_models.peergrouptemplate", "id": str(self.template.pk)},
+            },
+        )
+        self.assertEqual(peer_group["fields_inherited"]["enabled"], {"value": True, "inherited": False, "source": None})
+        (address_family,) = peer_group["address_families"]
+        self.assertEqual(address_family["effective_extra_attributes"], {"af_key": 0, "pgaf_key": 0})
+        self.assertEqual(address_family["fields_inherited"], {})
+
+    def test_peer_endpoint_fields(self):
+        """The inherited ASN, local IP, extra attributes and fields of endpoints and their address families are resolved."""
+        routing_instances = self.execute()
+        for device_index in range(2):
+            (endpoint,) = routing_instances[f"Device {device_index}"]["endpoints"]
+            self.assertEqual(endpoint["effective_autonomous_system"], {"asn": 65000})
+            self.assertEqual(endpoint["effective_local_ip"], {"address": f"10.{device_index}.0.1/32"})
+            self.assertEqual(
+                endpoint["effective_extra_attributes"],
+                {"pgt_key": "pgt_value", "shared": "ri", "ri_key": device_index, "pe_key": 0},
+            )
+            self.assertEqual(endpoint["fields_inherited"]["autonomous_system"]["value"], 65000)
+            self.assertTrue(endpoint["fields_inherited"]["autonomous_system"]["inherited"])
+            (address_family,) = endpoint["address_families"]
+            self.assertEqual(
+                address_family["effective_extra_attributes"], {"af_key": device_index, "pgaf_key": device_index}
+            )
+            self.assertEqual(
+                address_family["fields_inherited"]["import_policy"],
+                {
+                    "value": "PG-IMPORT",
+                    "inherited": True,
+                    "source": {
+                        "object_type": "nautobot_bgp_models.peergroupaddressfamily",
+                        "id": str(self.peer_groups[device_index].address_families.get().pk),
+                    },
+                },
+            )
+            self.assertEqual(
+                address_family["fields_inherited"]["export_policy"],
+                {"value": "PE-EXPORT", "inherited": False, "source": None},
+            )
+
+    def count_queries(self, query):
+        """Return the number of SQL queries run by `query`."""
+        with CaptureQueriesContext(connection) as queries:
+            self.execute(query)
+        return len(queries)
+
+    def test_query_count(self):
+        """The effective fields add the same number of queries whatever the number of peerings."""
+        self.execute()
+        extra_queries = self.count_queries(QUERY) - self.count_queries(PLAIN_QUERY)
+        self.create_peerings(5)
+        self.assertEqual(len(self.execute()["Device 0"]["endpoints"]), 6)
+        self.assertEqual(self.count_queries(QUERY) - self.count_queries(PLAIN_QUERY), extra_queries)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
+    def test_restricted_records(self):
+        """The effective fields of the records the user isn't allowed to view are not resolved."""
+        user = User.objects.create(username="User")
+        for model, constraints in (
+            (models.BGPRoutingInstance, None),
+            (Device, None),
+            (models.PeerGroup, {"name": "Group 2"}),
+            (models.PeerEndpoint, None),
+        ):
+            permission = ObjectPermission.objects.create(
+                name=f"View {model._meta.model_name}", actions=["view"], constraints=constraints
+            )
+            permission.users.add(user)
+            permission.object_types.add(ContentType.objects.get_for_model(model))
+
+        routing_instances = self.execute(
+            """
+            {
+              bgp_routing_instances(device: ["Device 0"]) {
+                device { name }
+                peer_groups { name effective_extra_attributes }
+                endpoints { effective_extra_attributes }
+              }
+            }
+            """,
+            user=user,
+        )
+        self.assertEqual(
+            routing_instances["Device 0"]["peer_groups"], [{"name": "Group 1", "effective_extra_attributes": None}]
+        )
+        self.assertEqual(
+            routing_instances["Device 0"]["endpoints"],
+            [{"effective_extra_attributes": {"pgt_key": "pgt_value", "shared": "ri", "ri_key": 0, "pe_key": 0}}],
+        )
+
+    def test_filtered_relation(self):
+        """Lists of related records given filter arguments are still filtered."""
+        self.create_peerings(1)
+        endpoint = models.PeerEndpoint.objects.filter(routing_instance__device__name="Device 0").first()
+        routing_instances = self.execute(
+            '{ bgp_routing_instances(device: ["Device 0"]) { device { name } endpoints(id: "%s") { id } } }'
+            % endpoint.pk
+        )
+        self.assertEqual(routing_instances["Device 0"]["endpoints"], [{"id": str(endpoint.pk)}])
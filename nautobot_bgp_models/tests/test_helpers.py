@@ -1,12 +1,13 @@
 """Unit test automation for Helper methods in nautobot_bgp_models."""
 
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
+from nautobot.core.utils.data import deepmerge
 from nautobot.extras.models import Status
 
 from nautobot_bgp_models import models
-from nautobot_bgp_models.helpers import add_available_asns
+from nautobot_bgp_models.helpers import LayeredMapping, add_available_asns
 
 
 class AddAvailableAsns(TestCase):
@@ -67,3 +68,62 @@ class AddAvailableAsns(TestCase):
         ]
 
         self.assertEqual(expected_availability, add_available_asns(instance=instance, asns=asns))
+
+
+class LayeredMappingTestCase(SimpleTestCase):
+    """Test the LayeredMapping helper."""
+
+    layers = [
+        {"timers": {"keepalive": 10, "hold": 30}, "ttl": 1, "communities": ["65000:1"], "policy": "ANY"},
+        None,
+        {"timers": {"hold": 60}, "communities": ["65000:2"], "policy": {"in": "IN"}, "bfd": True},
+        {"timers": 5, "policy": {"out": "OUT"}},
+        {"timers": {"keepalive": 1}},
+    ]
+
+    def test_matches_deepmerge(self):
+        """The merged view should be equal to merging all layers with deepmerge."""
+        expected = {}
+        for layer in self.layers:
+            if layer:
+                expected = deepmerge(expected, layer)
+
+        mapping = LayeredMapping(self.layers)
+        self.assertEqual(mapping, expected)
+        self.assertEqual(mapping.materialize(), expected)
+        self.assertEqual(list(mapping), list(expected))
+        self.assertEqual(len(mapping), len(expected))
+
+    def test_lookup(self):
+        """Nested dictionaries should be merged lazily, other values taken from the highest layer."""
+        mapping = LayeredMapping(self.layers)
+        self.assertEqual(mapping["timers"], {"keepalive": 1})
+        self.assertIsInstance(mapping["policy"], LayeredMapping)
+        self.assertEqual(mapping["policy"], {"in": "IN", "out": "OUT"})
+        self.assertEqual(mapping["communities"], ["65000:2"])
+        self.assertIn("bfd", mapping)
+        self.assertNotIn("missing", mapping)
+        self.assertIsNone(mapping.get("missing"))
+        with self.assertRaises(KeyError):
+            mapping["missing"]  # pylint: disable=pointless-statement
+
+    def test_empty_dictionary_clears(self):
+        """An empty dictionary clears the value beneath it rather than being merged into it."""
+        layers = [{"bfd": {"interval": 300}, "timers": {"hold": 30}}, {"bfd": {}, "timers": {"keepalive": 10}}]
+        expected = {"bfd": {}, "timers": {"hold": 30, "keepalive": 10}}
+        mapping = LayeredMapping(layers)
+        self.assertEqual(mapping, expected)
+        self.assertEqual(mapping["bfd"], {})
+        self.assertEqual(mapping.materialize(), expected)
+        # Values above the empty dictionary are still merged
+        layers.append({"bfd": {"multiplier": 3}})
+        self.assertEqual(LayeredMapping(layers)["bfd"], {"multiplier": 3})
+        self.assertEqual(LayeredMapping(layers).materialize()["bfd"], {"multiplier": 3})
+
+    def test_layers_are_not_modified(self):
+        """The view should be read-only."""
+        mapping = LayeredMapping(self.layers)
+        with self.assertRaises(TypeError):
+            mapping["ttl"] = 2  # pylint: disable=unsupported-assignment-operation
+        mapping.materialize()["timers"]["hold"] = 0
+        self.assertEqual(self.layers[2]["timers"], {"hold": 60})
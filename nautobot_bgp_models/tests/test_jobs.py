@@ -0,0 +1,179 @@
+"""Unit tests for the jobs of nautobot_bgp_models."""
+
+from concurrent.futures import Future
+import csv
+import io
+import os
+import tempfile
+from unittest import mock
+import zipfile
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+from jinja2 import TemplateSyntaxError
+from nautobot.dcim.models import Device, DeviceType, Location, LocationType, Manufacturer
+from nautobot.extras.models import JobResult, Role, Status
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.jobs import RenderBGPConfig, get_shard, render_in_pool
+
+TEMPLATE = """router bgp {{ routing_instances[0].autonomous_system }}
+{%- for endpoint in routing_instances[0].endpoints %}
+ neighbor {{ endpoint.peer.device }} remote-as {{ endpoint.peer.autonomous_system }}
+{%- endfor %}
+"""
+
+
+class RenderBGPConfigTestCase(TestCase):
+    """Test the RenderBGPConfig job."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        status_active = Status.objects.get(name__iexact="active")
+        status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        cls.devices = []
+        routing_instances = []
+        for index in range(6):
+            device = Device.objects.create(
+                device_type=devicetype, role=devicerole, name=f"Device {index}", location=location, status=status_active
+            )
+            cls.devices.append(device)
+            routing_instances.append(
+                models.BGPRoutingInstance.objects.create(
+                    autonomous_system=models.AutonomousSystem.objects.create(asn=65000 + index, status=status_active),
+                    device=device,
+                    status=status_active,
+                )
+            )
+        # A device without BGP, which isn't rendered
+        Device.objects.create(
+            device_type=devicetype, role=devicerole, name="Device 6", location=location, status=status_active
+        )
+
+        peering = models.Peering.objects.create(status=status_active)
+        endpoints = [
+            models.PeerEndpoint.objects.create(routing_instance=routing_instance, peering=peering)
+            for routing_instance in routing_instances[:2]
+        ]
+        models.PeerEndpoint.objects.filter(pk=endpoints[0].pk).update(peer=endpoints[1])
+        models.PeerEndpoint.objects.filter(pk=endpoints[1].pk).update(peer=endpoints[0])
+
+    def run_job(self, **kwargs):
+        """Run the job and return its files, keyed by name, along with its result."""
+        job = RenderBGPConfig()
+        job.job_result = JobResult.objects.create(name=job.class_path)
+        try:
+            result = job.run(**kwargs)
+        finally:
+            self.files = {file_proxy.name: file_proxy.file.read() for file_proxy in job.job_result.files.all()}
+        return result, self.files
+
+    def read_configs(self, name="bgp-configs.zip"):
+        """Return the configurations of the archive file of the last run, keyed by file name."""
+        with zipfile.ZipFile(io.BytesIO(self.files[name])) as archive:
+            return {filename: archive.read(filename).decode() for filename in archive.namelist()}
+
+    def read_timings(self, name="bgp-render-timings.csv"):
+        """Return the rows of the timings file of the last run, keyed by device name."""
+        return {row["device"]: row for row in csv.DictReader(io.StringIO(self.files[name].decode()))}
+
+    def test_render(self):
+        """Each device with a routing instance is rendered, with the same results in-process and in worker processes."""
+        rendered = {}
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                result, _ = self.run_job(template=TEMPLATE, workers=workers)
+                self.assertEqual(result["devices"], 6)
+                self.assertEqual(result["failed"], 0)
+                self.assertIsNotNone(result["devices_per_second"])
+
+                rendered[workers] = self.read_configs()
+                self.assertEqual(sorted(rendered[workers]), [f"Device {index}.cfg" for index in range(6)])
+                self.assertEqual(
+                    rendered[workers]["Device 0.cfg"], "router bgp 65000\n neighbor Device 1 remote-as 65001"
+                )
+                self.assertEqual(rendered[workers]["Device 5.cfg"], "router bgp 65005")
+
+                timings = self.read_timings()
+                self.assertEqual(sorted(timings), [f"Device {index}" for index in range(6)])
+                self.assertEqual({row["status"] for row in timings.values()}, {"rendered"})
+        self.assertEqual(rendered[1], rendered[2])
+
+    def test_render_in_pool(self):
+        """At most the given number of batches are submitted at once, and their results are returned in order."""
+        unread = set()
+        in_flight = []
+
+        class ReadFuture(Future):
+            def result(self, timeout=None):
+                unread.discard(self)
+                return super().result(timeout)
+
+        class Executor:
+            def submit(self, function, batch):  # pylint: disable=unused-argument
+                future = ReadFuture()
+                future.set_result([item * 2 for item in batch])
+                unread.add(future)
+                in_flight.append(len(unread))
+                return future
+
+        self.assertEqual(render_in_pool(Executor(), ([index] for index in range(10)), 3), list(range(0, 20, 2)))
+        self.assertEqual(max(in_flight), 3)
+
+    def test_render_device_filter(self):
+        """Only the devices matching the filter are rendered."""
+        result, _ = self.run_job(template=TEMPLATE, device_filter={"name": ["Device 1", "Device 6"]}, workers=1)
+        self.assertEqual(result["devices"], 1)
+        self.assertEqual(list(self.read_configs()), ["Device 1.cfg"])
+
+        with self.assertRaises(ValueError):
+            self.run_job(template=TEMPLATE, device_filter={"status": ["unknown"]}, workers=1)
+
+    def test_render_shards(self):
+        """The shards split the devices deterministically and without overlap."""
+        devices = Device.objects.filter(bgp_routing_instances__isnull=False)
+        shards = [set(get_shard(devices, index, 3)) for index in range(3)]
+        self.assertEqual(shards, [set(get_shard(devices.order_by("-name"), index, 3)) for index in range(3)])
+        self.assertEqual(sum(len(shard) for shard in shards), 6)
+        self.assertEqual(set.union(*shards), set(self.devices))
+
+        result, _ = self.run_job(template=TEMPLATE, workers=1, shard_index=1, shard_count=3)
+        self.assertEqual(result["devices"], len(shards[1]))
+        self.assertEqual(
+            set(self.read_timings("bgp-render-timings-shard-1-of-3.csv")), {device.name for device in shards[1]}
+        )
+
+        with self.assertRaises(ValueError):
+            self.run_job(template=TEMPLATE, workers=1, shard_index=3, shard_count=3)
+
+    def test_render_without_job_files(self):
+        """Without job files, before Nautobot 2.1, the files are saved in the default storage instead."""
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), mock.patch(
+            "nautobot_bgp_models.jobs.JOB_FILES_SUPPORTED", False
+        ):
+            result, files = self.run_job(template=TEMPLATE, workers=1)
+            self.assertEqual(result["devices"], 6)
+            self.assertEqual(files, {})
+            directory = os.path.join(media_root, "nautobot_bgp_models", str(JobResult.objects.get().pk))
+            self.assertEqual(sorted(os.listdir(directory)), ["bgp-configs.zip", "bgp-render-timings.csv"])
+
+    def test_render_errors(self):
+        """Devices failing to render are reported in the timings, and fail the job."""
+        template = "{{ 1 / (routing_instances[0].autonomous_system - 65003) }}"
+        with self.assertRaises(RuntimeError):
+            self.run_job(template=template, workers=2)
+        timings = self.read_timings()
+        self.assertEqual(timings["Device 3"]["status"], "failed")
+        self.assertIn("ZeroDivisionError", timings["Device 3"]["error"])
+        self.assertEqual(timings["Device 4"]["status"], "rendered")
+        self.assertEqual(len(self.read_configs()), 5)
+
+        with self.assertRaises(TemplateSyntaxError):
+            self.run_job(template="{% if %}", workers=1)
@@ -1,5 +1,7 @@
 """Unit test automation for Model classes in nautobot_bgp_models."""
 
+from unittest import mock
+
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.test import TestCase
@@ -11,6 +13,8 @@ from nautobot.ipam.models import IPAddress, VRF, Namespace, Prefix
 
 from nautobot_bgp_models import models
 from nautobot_bgp_models.choices import AFISAFIChoices
+from nautobot_bgp_models.helpers import add_available_asns
+from nautobot_bgp_models.validation import ValidationContext
 
 
 class AutonomousSystemTestCase(TestCase):
@@ -78,6 +82,123 @@ class AutonomousSystemRangeTestCase(TestCase):
             context.exception.messages[0],
         )
 
+    def test_overlap_validation(self):
+        """A range may not overlap with another one."""
+        for asn_min, asn_max in [(90, 100), (125, 130), (110, 115), (50, 200)]:
+            with self.subTest(asn_min=asn_min, asn_max=asn_max):
+                with self.assertRaises(ValidationError) as context:
+                    models.AutonomousSystemRange(name="Overlapping", asn_min=asn_min, asn_max=asn_max).validated_save()
+                self.assertIn("overlaps with existing range(s): Test Range", context.exception.messages[0])
+
+        models.AutonomousSystemRange(name="Adjacent", asn_min=126, asn_max=130).validated_save()
+        self.asn_range.description = "Still valid"
+        self.asn_range.validated_save()
+
+    def test_containing_and_overlapping(self):
+        """Lookups of the ranges containing an ASN or overlapping an interval."""
+        other_range = models.AutonomousSystemRange.objects.create(name="Other", asn_min=200, asn_max=300)
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.containing(100), [self.asn_range])
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.containing(125), [self.asn_range])
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.containing(150), [])
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.containing(99), [])
+        self.assertQuerysetEqual(
+            models.AutonomousSystemRange.objects.overlapping(110, 250), [self.asn_range, other_range], ordered=False
+        )
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.overlapping(126, 199), [])
+
+        annotated = models.AutonomousSystem.objects.with_containing_range()
+        self.assertEqual(annotated.get(asn=120).containing_range_id, self.asn_range.pk)
+        self.assertEqual(annotated.get(asn=120).containing_range_name, "Test Range")
+        self.assertIsNone(annotated.get(asn=150).containing_range_id)
+
+    def test_containing_and_overlapping_existing_overlaps(self):
+        """Lookups still find every range when existing ranges overlap."""
+        wide_range = models.AutonomousSystemRange.objects.create(name="Wide", asn_min=1, asn_max=1000)
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.containing(500), [wide_range])
+        self.assertQuerysetEqual(
+            models.AutonomousSystemRange.objects.containing(110), [wide_range, self.asn_range], ordered=False
+        )
+        self.assertQuerysetEqual(models.AutonomousSystemRange.objects.overlapping(400, 600), [wide_range])
+        with self.assertRaises(ValidationError):
+            models.AutonomousSystemRange(name="Overlapping", asn_min=400, asn_max=600).validated_save()
+
+        annotated = models.AutonomousSystem.objects.with_containing_range()
+        self.assertEqual(annotated.get(asn=120).containing_range_id, self.asn_range.pk)
+        self.assertEqual(annotated.get(asn=150).containing_range_id, wide_range.pk)
+
+    def test_check_overlaps(self):
+        """Ranges to create in bulk are checked against each other and against the existing ones in a single pass."""
+        models.AutonomousSystemRange.check_overlaps(
+            [
+                models.AutonomousSystemRange(name="A", asn_min=300, asn_max=400),
+                models.AutonomousSystemRange(name="B", asn_min=126, asn_max=299),
+            ]
+        )
+        with self.assertNumQueries(1), self.assertRaises(ValidationError) as context:
+            models.AutonomousSystemRange.check_overlaps(
+                [
+                    models.AutonomousSystemRange(name="A", asn_min=300, asn_max=400),
+                    models.AutonomousSystemRange(name="B", asn_min=400, asn_max=500),
+                    models.AutonomousSystemRange(name="C", asn_min=120, asn_max=130),
+                ]
+            )
+        self.assertEqual(
+            context.exception.messages,
+            ["Test Range (100-125) overlaps with C (120-130)", "A (300-400) overlaps with B (400-500)"],
+        )
+
+    def test_get_available_asns(self):
+        """Test the lookup of available ASNs in a range."""
+        self.assertEqual(self.asn_range.get_available_asn_ranges(), [(102, 119), (121, 125)])
+        self.assertEqual(self.asn_range.get_available_asn_ranges(limit=1), [(102, 119)])
+        self.assertEqual(self.asn_range.get_next_available_asn(), 102)
+        self.assertEqual(self.asn_range.get_available_asns(count=2), [102, 103])
+        self.assertEqual(self.asn_range.get_available_asns(count=20), [*range(102, 120), 121, 122])
+        self.assertEqual(len(self.asn_range.get_available_asns(count=100)), 23)
+
+    def test_get_available_asns_edges(self):
+        """Test the lookup of available ASNs at the bounds of a range."""
+        empty_range = models.AutonomousSystemRange.objects.create(name="Empty", asn_min=200, asn_max=210)
+        self.assertEqual(empty_range.get_available_asn_ranges(), [(200, 210)])
+        self.assertEqual(empty_range.get_next_available_asn(), 200)
+
+        leading_gap_range = models.AutonomousSystemRange.objects.create(name="Leading gap", asn_min=90, asn_max=101)
+        self.assertEqual(leading_gap_range.get_available_asn_ranges(), [(90, 99)])
+
+        full_range = models.AutonomousSystemRange.objects.create(name="Full", asn_min=100, asn_max=101)
+        self.assertEqual(full_range.get_available_asn_ranges(), [])
+        self.assertIsNone(full_range.get_next_available_asn())
+        self.assertEqual(full_range.get_available_asns(count=5), [])
+
+    def test_get_asns_with_gaps(self):
+        """The rows of each page, put together, match helpers.add_available_asns() for the whole range."""
+        ranges = [
+            self.asn_range,
+            models.AutonomousSystemRange.objects.create(name="Empty", asn_min=200, asn_max=210),
+            models.AutonomousSystemRange.objects.create(name="Leading gap", asn_min=90, asn_max=101),
+            models.AutonomousSystemRange.objects.create(name="Trailing allocated", asn_min=110, asn_max=150),
+        ]
+        for asn_range in ranges:
+            asns = models.AutonomousSystem.objects.filter(asn__gte=asn_range.asn_min, asn__lte=asn_range.asn_max)
+            expected = add_available_asns(asn_range, asns)
+            self.assertEqual(asn_range.get_asns_with_gaps(), expected)
+            for limit in (1, 2, 3):
+                rows, after = [], None
+                while True:
+                    page = asn_range.get_asns_with_gaps(after=after, limit=limit)
+                    if not page:
+                        break
+                    self.assertLessEqual(len(page), limit)
+                    rows.extend(page)
+                    after = page[-1]["asn"] if isinstance(page[-1], dict) else page[-1].asn
+                with self.subTest(asn_range=asn_range, limit=limit):
+                    self.assertEqual(rows, expected)
+
+        self.assertEqual(
+            self.asn_range.get_asns_with_gaps(after=101, limit=2),
+            [{"asn": 102, "available": 18}, self.autonomous_system_120],
+        )
+
 
 class BGPRoutingInstanceTestCase(TestCase):
     """Test the BGPRoutingInstance model."""
@@ -166,6 +287,34 @@ class PeerGroupTestCase(TestCase):
         """Test string representation of a PeerGroup."""
         self.assertEqual(str(self.peergroup), f"{self.peergroup.name} - {self.device_1.name}")
 
+    def test_clean_source_ip(self):
+        """The source IP of a peer group must belong to its device."""
+        namespace = Namespace.objects.first()
+        Prefix.objects.create(
+            prefix="1.0.0.0/8", namespace=namespace, status=Status.objects.get_for_model(Prefix).first()
+        )
+        self.peergroup.source_ip = IPAddress.objects.create(
+            address="1.1.1.1/32", status=Status.objects.get_for_model(IPAddress).first(), namespace=namespace
+        )
+        with self.assertRaisesMessage(ValidationError, "Group IP not associated with Routing Instance"):
+            self.peergroup.clean()
+
+        interface = Interface.objects.create(
+            device=self.device_1, name="Loopback1", status=Status.objects.get_for_model(Interface).first()
+        )
+        interface.add_ip_addresses(self.peergroup.source_ip)
+        self.peergroup.clean()
+
+    def test_clean_vrf_change(self):
+        """Cleaning a peer group only queries its endpoints if its VRF was changed since it was loaded."""
+        peergroup = models.PeerGroup.objects.get(pk=self.peergroup.pk)
+        with self.assertNumQueries(0):
+            peergroup.clean()
+
+        peergroup.vrf = VRF.objects.create(name="VRF A", namespace=Namespace.objects.first())
+        with self.assertNumQueries(1):
+            peergroup.clean()
+
     # def test_vrf_fixup_from_router_id(self):
     #     """If VRF is None, but the router-id references a VRF, use that."""
     #     vrf = VRF.objects.create(name="red")
@@ -270,16 +419,17 @@ class PeerEndpointTestCase(TestCase):
 
         self.interface_1.add_ip_addresses(self.ipaddress_1)
 
-        self.peerendpoint_1 = models.PeerEndpoint.objects.create(
-            source_ip=self.ipaddress_1,
-            peer_group=self.peergroup_1,
-            peering=self.peering,
-            routing_instance=self.bgp_routing_instance_1,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.peerendpoint_1 = models.PeerEndpoint.objects.create(
+                source_ip=self.ipaddress_1,
+                peer_group=self.peergroup_1,
+                peering=self.peering,
+                routing_instance=self.bgp_routing_instance_1,
+            )
+            self.peerendpoint_2 = models.PeerEndpoint.objects.create(
+                source_ip=self.ipaddress_2, autonomous_system=self.autonomous_system_23456, peering=self.peering
+            )
         self.peerendpoint_1.clean()
-        self.peerendpoint_2 = models.PeerEndpoint.objects.create(
-            source_ip=self.ipaddress_2, autonomous_system=self.autonomous_system_23456, peering=self.peering
-        )
         self.peerendpoint_2.clean()
 
     def test_str(self):
@@ -332,6 +482,111 @@ class PeerEndpointTestCase(TestCase):
         with self.assertRaises(ValidationError):
             self.peerendpoint_2.clean()
 
+    def test_clean_ip_address(self):
+        """The local IP of an endpoint must belong to its device, and in the VRF of its peer group."""
+        endpoint = models.PeerEndpoint(
+            source_ip=self.ipaddress_2, routing_instance=self.bgp_routing_instance_1, peering=self.peering
+        )
+        with self.assertRaisesMessage(ValidationError, "Peer IP not associated with Routing Instance"):
+            endpoint.clean()
+
+        endpoint = models.PeerEndpoint(
+            source_ip=self.ipaddress_1, autonomous_system=self.autonomous_system_23456, peering=self.peering
+        )
+        with self.assertRaisesMessage(ValidationError, "Must specify Routing Instance for this IP Address"):
+            endpoint.clean()
+
+        self.peergroup_1.vrf = VRF.objects.create(name="VRF A", namespace=self.namespace)
+        with self.assertRaisesMessage(ValidationError, "VRF mismatch"):
+            self.peerendpoint_1.clean()
+
+    def test_clean_validation_context(self):
+        """Within a ValidationContext, the IP addresses of the devices are only loaded once."""
+        endpoints = [
+            models.PeerEndpoint(
+                source_ip=self.ipaddress_1,
+                autonomous_system=self.autonomous_system_23456,
+                peer_group=self.peergroup_1,
+                routing_instance=self.bgp_routing_instance_1,
+                peering=self.peering,
+            )
+            for _ in range(5)
+        ]
+        with ValidationContext() as context:
+            endpoints[0].clean()
+            for endpoint in endpoints[1:]:
+                with self.assertNumQueries(0):
+                    endpoint.clean()
+
+        with ValidationContext() as context:
+            context.prime(device_ids=[self.bgp_routing_instance_1.device_id], ip_address_ids=[self.ipaddress_1.pk])
+            with self.assertNumQueries(0):
+                endpoints[0].clean()
+            self.assertEqual(
+                context.device_ip_address_ids(self.bgp_routing_instance_1.device_id), {self.ipaddress_1.pk}
+            )
+            self.assertTrue(context.is_ip_address_assigned(self.ipaddress_1.pk))
+            self.assertFalse(context.is_ip_address_assigned(self.ipaddress_2.pk))
+
+    def test_field_snapshot(self):
+        """The fields changed since a record was loaded or saved are tracked."""
+        endpoint = models.PeerEndpoint.objects.get(pk=self.peerendpoint_1.pk)
+        self.assertFalse(endpoint.has_changed())
+
+        endpoint.description = "Updated"
+        endpoint.extra_attributes = {"key": ["value"]}
+        self.assertEqual(endpoint.get_changed_fields(), {"description", "extra_attributes"})
+        self.assertFalse(endpoint.has_changed("peer_group", "source_ip"))
+        endpoint.save()
+        self.assertFalse(endpoint.has_changed())
+
+        endpoint.extra_attributes["key"].append("other value")
+        self.assertTrue(endpoint.has_changed("extra_attributes"))
+        self.assertTrue(models.PeerEndpoint(peering=self.peering).has_changed("description"))
+
+    def test_field_snapshot_json_copied_when_read(self):
+        """The JSON values loaded are only copied into the snapshot when they are read."""
+        models.PeerEndpoint.objects.filter(pk=self.peerendpoint_1.pk).update(extra_attributes={"key": ["value"]})
+        with mock.patch("nautobot_bgp_models.models._copy_field_value", side_effect=lambda value: value) as copy:
+            endpoints = list(models.PeerEndpoint.objects.all())
+            copy.assert_not_called()
+
+        endpoint = next(endpoint for endpoint in endpoints if endpoint.pk == self.peerendpoint_1.pk)
+        endpoint.extra_attributes["key"].append("other value")
+        self.assertTrue(endpoint.has_changed("extra_attributes"))
+
+        # A new value assigned before the loaded one is read is compared to the loaded one
+        endpoint = models.PeerEndpoint.objects.get(pk=self.peerendpoint_1.pk)
+        endpoint.extra_attributes = {"key": ["value"]}
+        self.assertFalse(endpoint.has_changed("extra_attributes"))
+        endpoint.extra_attributes = {"key": []}
+        self.assertTrue(endpoint.has_changed("extra_attributes"))
+
+    def test_effective_configuration_unchanged(self):
+        """Saving a PeerEndpoint without changing its configuration doesn't rebuild its effective configuration."""
+        endpoint = models.PeerEndpoint.objects.get(pk=self.peerendpoint_1.pk)
+        endpoint.effective.delete()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            endpoint.description = "Updated"
+            endpoint.save()
+        self.assertEqual(callbacks, [])
+        self.assertFalse(models.PeerEndpointEffective.objects.filter(peer_endpoint=endpoint).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            endpoint.autonomous_system = self.autonomous_system_23456
+            endpoint.save()
+        effective = models.PeerEndpointEffective.objects.get(peer_endpoint=endpoint)
+        self.assertEqual(effective.autonomous_system, self.autonomous_system_23456)
+
+    def test_effective_configuration_on_commit(self):
+        """The effective configuration is only rebuilt once the transaction is committed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bgp_routing_instance_1.extra_attributes = {"timers": [6, 20]}
+            self.bgp_routing_instance_1.save()
+            self.assertEqual(self.peerendpoint_1.effective.extra_attributes, {})
+        self.peerendpoint_1.effective.refresh_from_db()
+        self.assertEqual(self.peerendpoint_1.effective.extra_attributes, {"timers": [6, 20]})
+
     def test_deleting_peering_deletes_endpoints(self):
         """Deleting a Peering should delete its associated PeerEndpoints."""
         self.peering.delete()
@@ -343,6 +598,80 @@ class PeerEndpointTestCase(TestCase):
             self.peerendpoint_1.refresh_from_db()
             self.peerendpoint_2.refresh_from_db()
 
+    def test_effective_configuration(self):
+        """Saving a PeerEndpoint should store its resolved configuration."""
+        effective = self.peerendpoint_1.effective
+        self.assertEqual(effective.autonomous_system, self.bgp_routing_instance_1.autonomous_system)
+        self.assertEqual(effective.role, self.peeringrole_internal)
+        self.assertEqual(effective.source_ip, self.ipaddress_1)
+        self.assertEqual(effective.local_ip, self.ipaddress_1)
+        self.assertEqual(self.peerendpoint_2.effective.autonomous_system, self.autonomous_system_23456)
+
+    def test_effective_configuration_follows_inherited_changes(self):
+        """Changes to an inherited object should be propagated to the effective configuration."""
+        template = models.PeerGroupTemplate.objects.create(name="Template A", extra_attributes={"ttl": 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.peergroup_1.peergroup_template = template
+            self.peergroup_1.save()
+        self.assertEqual(
+            models.PeerEndpointEffective.objects.get(peer_endpoint=self.peerendpoint_1).extra_attributes, {"ttl": 1}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            template.autonomous_system = self.autonomous_system_23456
+            template.save()
+        effective = models.PeerEndpointEffective.objects.get(peer_endpoint=self.peerendpoint_1)
+        self.assertEqual(effective.autonomous_system, self.autonomous_system_23456)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bgp_routing_instance_1.extra_attributes = {"timers": [6, 20]}
+            self.bgp_routing_instance_1.save()
+        effective.refresh_from_db()
+        self.assertEqual(effective.extra_attributes, {"ttl": 1, "timers": [6, 20]})
+
+    def test_effective_configuration_rebuild(self):
+        """PeerEndpointEffective.rebuild() should recreate missing records."""
+        models.PeerEndpointEffective.objects.all().delete()
+        self.assertEqual(models.PeerEndpointEffective.rebuild(), 2)
+        self.assertEqual(self.peerendpoint_2.effective.autonomous_system, self.autonomous_system_23456)
+
+    def test_effective_configuration_follows_ipam_changes(self):
+        """Changes to the IP addresses of the source interface and to the VRFs of the prefixes are propagated."""
+        endpoint = models.PeerEndpoint.objects.get(pk=self.peerendpoint_1.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            endpoint.source_ip = None
+            endpoint.source_interface = self.interface_1
+            endpoint.save()
+        effective = models.PeerEndpointEffective.objects.get(peer_endpoint=endpoint)
+        self.assertEqual((effective.local_ip, effective.vrf), (self.ipaddress_1, None))
+
+        vrf = VRF.objects.create(name="VRF A", namespace=self.namespace)
+        with self.captureOnCommitCallbacks(execute=True):
+            vrf.add_prefix(Prefix.objects.get(prefix="1.0.0.0/8"))
+        effective.refresh_from_db()
+        self.assertEqual(effective.vrf, vrf)
+        annotated = models.PeerEndpoint.objects.with_endpoint_key().get(pk=endpoint.pk)
+        self.assertEqual(
+            annotated.endpoint_key, (self.bgp_routing_instance_1.device_id, effective.local_ip_id, effective.vrf_id)
+        )
+
+        # The IP address is reparented to the new prefix by Nautobot, outside of the VRF
+        with self.captureOnCommitCallbacks(execute=True):
+            Prefix.objects.create(
+                prefix="1.1.0.0/16", namespace=self.namespace, status=Status.objects.get_for_model(Prefix).first()
+            )
+        effective.refresh_from_db()
+        self.assertIsNone(effective.vrf)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.interface_1.add_ip_addresses(self.ipaddress_2)
+        effective.refresh_from_db()
+        self.assertIsNone(effective.local_ip)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.interface_1.remove_ip_addresses(self.ipaddress_2)
+        effective.refresh_from_db()
+        self.assertEqual(effective.local_ip, self.ipaddress_1)
+
 
 class PeeringTestCase(TestCase):
     """Test the Peering model."""
@@ -378,16 +707,17 @@ class PeeringTestCase(TestCase):
 
         address_1 = IPAddress.objects.create(address="1.1.1.1/32", status=status_active, namespace=namespace)
         address_2 = IPAddress.objects.create(address="2.2.2.2/32", status=status_active, namespace=namespace)
-        models.PeerEndpoint.objects.create(
-            source_ip=address_1,
-            peering=cls.peering,
-            autonomous_system=cls.autonomous_system_12345,
-        )
-        models.PeerEndpoint.objects.create(
-            source_ip=address_2,
-            peering=cls.peering,
-            autonomous_system=cls.autonomous_system_23456,
-        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            models.PeerEndpoint.objects.create(
+                source_ip=address_1,
+                peering=cls.peering,
+                autonomous_system=cls.autonomous_system_12345,
+            )
+            models.PeerEndpoint.objects.create(
+                source_ip=address_2,
+                peering=cls.peering,
+                autonomous_system=cls.autonomous_system_23456,
+            )
 
     def test_str(self):
         """Test the string representation of a Peering."""
@@ -409,7 +739,8 @@ class PeeringTestCase(TestCase):
         endpoint_z.refresh_from_db()
         self.assertEqual(endpoint_a.peer, endpoint_z)
         self.assertEqual(endpoint_z.peer, endpoint_a)
-        self.assertFalse(self.peering.update_peers())
+        with self.assertNumQueries(1):
+            self.assertFalse(self.peering.update_peers())
 
         endpoint_a.delete()
         endpoint_z.refresh_from_db()
@@ -420,6 +751,28 @@ class PeeringTestCase(TestCase):
         self.peering.refresh_from_db()
         self.assertIsNone(self.peering.update_peers())
 
+    def test_match_keys(self):
+        """Test the composite keys of a Peering and of its endpoints, and matching peerings by key."""
+        endpoints = list(self.peering.endpoints.all())
+        key = models.Peering.get_key(endpoints)
+        self.assertEqual(key, {(None, endpoint.source_ip_id, None) for endpoint in endpoints})
+        annotated = models.PeerEndpoint.objects.with_endpoint_key().filter(peering=self.peering)
+        self.assertEqual({endpoint.endpoint_key for endpoint in annotated}, key)
+        # The key of unsaved endpoints, in any order
+        unsaved = [models.PeerEndpoint(source_ip=endpoint.source_ip) for endpoint in reversed(endpoints)]
+        self.assertEqual(models.Peering.get_key(unsaved), key)
+
+        other_key = frozenset([(None, endpoints[0].source_ip_id, None)])
+        with self.assertNumQueries(1):
+            self.assertEqual(models.Peering.objects.match_keys([key, other_key]), {key: [self.peering.pk]})
+
+        # Endpoints without a PeerEndpointEffective record are matched on their live keys
+        models.PeerEndpointEffective.objects.filter(peer_endpoint=endpoints[0]).delete()
+        annotated = models.PeerEndpoint.objects.with_endpoint_key().filter(peering=self.peering)
+        self.assertEqual({endpoint.endpoint_key for endpoint in annotated}, key)
+        with self.assertNumQueries(1):
+            self.assertEqual(models.Peering.objects.match_keys([key]), {key: [self.peering.pk]})
+
 
 class AddressFamilyTestCase(TestCase):
     """Test the AddressFamily model."""
@@ -0,0 +1,253 @@
+"""Unit test automation for QuerySet classes in nautobot_bgp_models."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Model
+from django.test import TestCase
+from nautobot.circuits.models import Provider
+from nautobot.dcim.models import Device, DeviceType, Interface, Manufacturer, Location, LocationType
+from nautobot.extras.models import Status, Role
+from nautobot.ipam.models import IPAddress, Namespace, Prefix
+
+from nautobot_bgp_models import models
+from nautobot_bgp_models.choices import AFISAFIChoices
+
+
+class InheritanceQuerySetTestCase(TestCase):
+    """Test the InheritanceQuerySet.with_inherited() annotations."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        """One-time class data setup."""
+        status_active = Status.objects.get(name__iexact="active")
+        status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        device = Device.objects.create(
+            device_type=devicetype, role=devicerole, name="Device 1", location=location, status=status_active
+        )
+        interface_status = Status.objects.get_for_model(Interface).first()
+        cls.interface = Interface.objects.create(device=device, name="Loopback1", status=interface_status)
+
+        cls.role_internal = Role.objects.create(name="Internal", color="333333")
+        cls.role_internal.content_types.add(ContentType.objects.get_for_model(models.PeerGroupTemplate))
+        cls.role_external = Role.objects.create(name="External", color="333334")
+        cls.role_external.content_types.add(ContentType.objects.get_for_model(models.PeerEndpoint))
+
+        cls.asn_ri = models.AutonomousSystem.objects.create(asn=65000, status=status_active)
+        cls.asn_pgt = models.AutonomousSystem.objects.create(
+            asn=65001, status=status_active, provider=Provider.objects.create(name="Provider 1")
+        )
+        cls.asn_pe = models.AutonomousSystem.objects.create(asn=65002, status=status_active)
+
+        cls.routing_instance = models.BGPRoutingInstance.objects.create(
+            autonomous_system=cls.asn_ri, device=device, status=status_active
+        )
+        cls.template = models.PeerGroupTemplate.objects.create(
+            name="PGT1",
+            autonomous_system=cls.asn_pgt,
+            role=cls.role_internal,
+            description="Template description",
+            enabled=True,
+        )
+        cls.peergroup_templated = models.PeerGroup.objects.create(
+            name="Group 1",
+            routing_instance=cls.routing_instance,
+            peergroup_template=cls.template,
+            enabled=False,
+        )
+        cls.peergroup_plain = models.PeerGroup.objects.create(
+            name="Group 2",
+            routing_instance=cls.routing_instance,
+            description="Group description",
+        )
+
+        namespace = Namespace.objects.first()
+        prefix_status = Status.objects.get_for_model(Prefix).first()
+        Prefix.objects.create(prefix="10.0.0.0/8", namespace=namespace, status=prefix_status)
+        address_1 = IPAddress.objects.create(address="10.1.1.1/32", status=status_active, namespace=namespace)
+        address_2 = IPAddress.objects.create(address="10.1.1.2/32", status=status_active, namespace=namespace)
+        cls.interface.add_ip_addresses([address_1, address_2])
+
+        cls.peergroup_plain.source_ip = address_1
+        cls.peergroup_plain.save()
+
+        peering = models.Peering.objects.create(status=status_active)
+        cls.pe_templated = models.PeerEndpoint.objects.create(
+            routing_instance=cls.routing_instance,
+            source_ip=address_2,
+            peer_group=cls.peergroup_templated,
+            peering=peering,
+        )
+        cls.pe_plain = models.PeerEndpoint.objects.create(
+            routing_instance=cls.routing_instance,
+            peer_group=cls.peergroup_plain,
+            peering=peering,
+            role=cls.role_external,
+            autonomous_system=cls.asn_pe,
+            description="Endpoint description",
+        )
+        cls.pe_orphan = models.PeerEndpoint.objects.create(
+            routing_instance=cls.routing_instance,
+            source_interface=cls.interface,
+            peering=models.Peering.objects.create(status=status_active),
+        )
+        interface_2 = Interface.objects.create(device=device, name="Loopback2", status=interface_status)
+        cls.address_3 = IPAddress.objects.create(address="10.1.1.3/32", status=status_active, namespace=namespace)
+        interface_2.add_ip_addresses(cls.address_3)
+        cls.pe_interface = models.PeerEndpoint.objects.create(
+            routing_instance=cls.routing_instance,
+            source_interface=interface_2,
+            peering=cls.pe_orphan.peering,
+        )
+
+        pgaf = models.PeerGroupAddressFamily.objects.create(
+            peer_group=cls.peergroup_templated,
+            afi_safi=AFISAFIChoices.AFI_IPV4_UNICAST,
+            import_policy="PG-IMPORT",
+            multipath=True,
+        )
+        cls.peaf_inherited = models.PeerEndpointAddressFamily.objects.create(
+            peer_endpoint=cls.pe_templated,
+            afi_safi=pgaf.afi_safi,
+            export_policy="PE-EXPORT",
+        )
+        cls.peaf_local = models.PeerEndpointAddressFamily.objects.create(
+            peer_endpoint=cls.pe_plain,
+            afi_safi=pgaf.afi_safi,
+            import_policy="PE-IMPORT",
+        )
+
+    def assertMatchesInheritedFields(self, queryset):  # pylint: disable=invalid-name
+        """Check that every `effective_<field>` annotation agrees with `get_inherited_field()`."""
+        for instance in queryset.with_inherited():
+            for field_name in instance.property_inheritance:
+                value, _, _ = instance.get_inherited_field(field_name)
+                if isinstance(value, Model):
+                    value = value.pk
+                with self.subTest(instance=instance, field_name=field_name):
+                    self.assertEqual(getattr(instance, f"effective_{field_name}"), value)
+
+    def test_peer_endpoint_with_inherited(self):
+        """PeerEndpoint annotations follow the PeerGroup -> PeerGroupTemplate -> RoutingInstance chain."""
+        self.assertMatchesInheritedFields(models.PeerEndpoint.objects.all())
+
+        endpoint = models.PeerEndpoint.objects.with_inherited().get(pk=self.pe_templated.pk)
+        self.assertEqual(endpoint.effective_autonomous_system, self.asn_pgt.pk)
+        self.assertEqual(endpoint.effective_role, self.role_internal.pk)
+        self.assertEqual(endpoint.effective_description, "Template description")
+        self.assertTrue(endpoint.effective_enabled)
+
+        endpoint = models.PeerEndpoint.objects.with_inherited().get(pk=self.pe_orphan.pk)
+        self.assertEqual(endpoint.effective_source_interface, self.interface.pk)
+        self.assertEqual(endpoint.effective_autonomous_system, self.asn_ri.pk)
+        self.assertIsNone(endpoint.effective_source_ip)
+
+    def test_peer_group_with_inherited(self):
+        """PeerGroup annotations follow the PeerGroupTemplate -> RoutingInstance chain."""
+        self.assertMatchesInheritedFields(models.PeerGroup.objects.all())
+
+        peergroup = models.PeerGroup.objects.with_inherited().get(pk=self.peergroup_plain.pk)
+        self.assertEqual(peergroup.effective_autonomous_system, self.asn_ri.pk)
+        self.assertEqual(peergroup.effective_description, "Group description")
+
+    def test_peer_endpoint_address_family_with_inherited(self):
+        """PeerEndpointAddressFamily annotations resolve the parent PeerGroupAddressFamily with a subquery."""
+        self.assertMatchesInheritedFields(models.PeerEndpointAddressFamily.objects.all())
+
+        peaf = models.PeerEndpointAddressFamily.objects.with_inherited().get(pk=self.peaf_inherited.pk)
+        self.assertEqual(peaf.effective_import_policy, "PG-IMPORT")
+        self.assertEqual(peaf.effective_export_policy, "PE-EXPORT")
+        self.assertTrue(peaf.effective_multipath)
+
+    def test_with_inherited_is_single_query(self):
+        """Resolving every endpoint's inherited values takes exactly one query."""
+        with self.assertNumQueries(1):
+            values = list(models.PeerEndpoint.objects.with_inherited().values("pk", "effective_autonomous_system"))
+        self.assertEqual(len(values), 4)
+
+    def test_filter_on_effective_value(self):
+        """The annotations can be used for filtering."""
+        self.assertQuerysetEqual(
+            models.PeerEndpoint.objects.with_inherited().filter(effective_autonomous_system=self.asn_pgt.pk),
+            [self.pe_templated],
+        )
+
+    def test_prefetch_inherited(self):
+        """With prefetch_inherited(), resolving inherited fields and extra attributes takes no further queries."""
+        for queryset in (
+            models.PeerEndpoint.objects.prefetch_inherited(),
+            models.PeerGroup.objects.prefetch_inherited(),
+            models.PeerEndpointAddressFamily.objects.prefetch_inherited(),
+        ):
+            instances = list(queryset)
+            with self.subTest(model=queryset.model), self.assertNumQueries(0):
+                for instance in instances:
+                    instance.get_fields(include_inherited=True)
+                    instance.get_extra_attributes()
+
+    def test_with_local_ip(self):
+        """The effective_local_ip_id annotation follows the same precedence as PeerEndpoint.local_ip."""
+        for endpoint in models.PeerEndpoint.objects.all():
+            local_ip = endpoint.local_ip
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(
+                    models.PeerEndpoint.objects.with_local_ip().get(pk=endpoint.pk).effective_local_ip_id,
+                    local_ip.pk if local_ip else None,
+                )
+
+        self.assertQuerysetEqual(
+            models.PeerEndpoint.objects.with_local_ip().filter(effective_local_ip_id=self.address_3.pk),
+            [self.pe_interface],
+        )
+        self.assertIsNone(models.PeerEndpoint.objects.with_local_ip().get(pk=self.pe_orphan.pk).effective_local_ip_id)
+
+    def test_local_ip_uses_annotation(self):
+        """PeerEndpoint.local_ip uses the annotation, unless one of the fields it depends on was changed."""
+        endpoints = list(
+            models.PeerEndpoint.objects.with_local_ip().select_related("source_ip", "peer_group__source_ip")
+        )
+        with self.assertNumQueries(0):
+            for endpoint in endpoints:
+                if endpoint.pk != self.pe_interface.pk:
+                    endpoint.local_ip  # pylint: disable=pointless-statement
+
+        endpoint = models.PeerEndpoint.objects.with_local_ip().get(pk=self.pe_interface.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(endpoint.local_ip, self.address_3)
+            self.assertEqual(endpoint.local_ip, self.address_3)
+
+        endpoint.source_interface = self.interface
+        self.assertIsNone(endpoint.local_ip)
+
+    def test_with_endpoint_details(self):
+        """Peering annotations match the details of Peering.endpoint_a and Peering.endpoint_z."""
+        for peering in models.Peering.objects.with_endpoint_details():
+            for side in ("a", "z"):
+                endpoint = getattr(peering, f"endpoint_{side}")
+                asn = endpoint.get_inherited_field("autonomous_system")[0] if endpoint else None
+                expected = {
+                    "device": endpoint.routing_instance.device.name if endpoint else None,
+                    "local_ip": endpoint.local_ip.host if endpoint and endpoint.local_ip else None,
+                    "asn": asn.asn if asn else None,
+                    "provider": asn.provider.name if asn and asn.provider else None,
+                }
+                for name, value in expected.items():
+                    with self.subTest(peering=peering, side=side, name=name):
+                        self.assertEqual(getattr(peering, f"endpoint_{side}_{name}"), value)
+
+        peering = models.Peering.objects.with_endpoint_details().get(pk=self.pe_templated.peering.pk)
+        self.assertEqual({peering.endpoint_a_provider, peering.endpoint_z_provider}, {"Provider 1", None})
+        self.assertEqual(
+            list(
+                models.Peering.objects.with_endpoint_details()
+                .order_by("endpoint_a_asn")
+                .values_list("endpoint_a_asn", flat=True)
+            ),
+            sorted(models.Peering.objects.with_endpoint_details().values_list("endpoint_a_asn", flat=True)),
+        )
@@ -6,12 +6,18 @@ from unittest import skipIf
 from importlib import metadata
 from packaging import version
 
+import copy
+
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
 from nautobot.circuits.models import Provider
 from nautobot.dcim.models import Device, DeviceType, Interface, Manufacturer, Location, LocationType
 from nautobot.extras.models import Status, Role
 from nautobot.ipam.models import IPAddress, Namespace, Prefix
-from nautobot.core.testing import ViewTestCases
+from nautobot.core.testing import TestCase, ViewTestCases
 
 from nautobot_bgp_models import models
 from nautobot_bgp_models.choices import AFISAFIChoices
@@ -40,6 +46,21 @@ class AutonomousSystemTestCase(ViewTestCases.PrimaryObjectViewTestCase):
             self.model._meta.app_label, self.model._meta.model_name
         )
 
+    def test_list_objects_containing_range(self):
+        """The list of ASNs links each ASN to the range containing it."""
+        asn_range = models.AutonomousSystemRange.objects.create(
+            name="Private range", asn_min=4200000001, asn_max=4200000010
+        )
+        self.add_permissions("nautobot_bgp_models.view_autonomoussystem")
+
+        response = self.client.get(self._get_url("list"))
+        self.assertHttpStatus(response, 200)
+        self.assertContains(response, asn_range.get_absolute_url(), count=2)
+        self.assertEqual(
+            {row.record.asn: row.record.containing_range_name for row in response.context["table"].rows},
+            {4200000000: None, 4200000001: "Private range", 4200000002: "Private range"},
+        )
+
     @classmethod
     def setUpTestData(cls):
         """One-time class data setup."""
@@ -108,7 +129,7 @@ class AutonomousSystemRangeTestCase(ViewTestCases.PrimaryObjectViewTestCase):
         cls.csv_data = (
             "asn_min,asn_max,name,description",
             "1000,2000,range1,range1 descr",
-            "2000,4000,range2,range2 descr",
+            "2001,4000,range2,range2 descr",
             "5000,9999,range3,range3 descr",
         )
 
@@ -116,6 +137,24 @@ class AutonomousSystemRangeTestCase(ViewTestCases.PrimaryObjectViewTestCase):
             "description": "New description",
         }
 
+    def test_asn_table_keyset_pagination(self):
+        """The ASNs and gaps of a range are paginated on the ASN number of the last row."""
+        status_active = Status.objects.get(name__iexact="active")
+        status_active.content_types.add(ContentType.objects.get_for_model(models.AutonomousSystem))
+        asn_2, asn_3 = (models.AutonomousSystem.objects.create(asn=asn, status=status_active) for asn in (2, 3))
+        asn_range = models.AutonomousSystemRange.objects.get(name="Private")
+        self.add_permissions("nautobot_bgp_models.view_autonomoussystemrange")
+
+        response = self.client.get(f"{asn_range.get_absolute_url()}?per_page=2")
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response.context["asn_range_table"].data.data, [{"asn": 1, "available": 1}, asn_2])
+        self.assertEqual(response.context["asn_range_next"], 2)
+
+        response = self.client.get(f"{asn_range.get_absolute_url()}?per_page=2&asn_after=2")
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response.context["asn_range_table"].data.data, [asn_3, {"asn": 4, "available": 7}])
+        self.assertNotIn("asn_range_next", response.context)
+
 
 class PeerGroupTestCase(
     ViewTestCases.GetObjectViewTestCase,
@@ -611,3 +650,131 @@ class PeerEndpointAddressFamilyTestCase(ViewTestCases.PrimaryObjectViewTestCase)
         ]
 
         cls.bulk_edit_data = {"import_policy": "foo", "export_policy": "bar"}
+
+
+class DeviceBGPPanelViewTestCase(TestCase):
+    """Test the BGP panel of the Device detail view."""
+
+    @classmethod
+    def setUpTestData(cls):  # pylint: disable=too-many-locals
+        """One-time class data setup."""
+        cls.status_active = Status.objects.get(name__iexact="active")
+        cls.status_active.content_types.add(ContentType.objects.get_for_model(models.Peering))
+
+        manufacturer = Manufacturer.objects.create(name="Cisco")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="CSR 1000V")
+        location_type = LocationType.objects.create(name="site")
+        location_status = Status.objects.get_for_model(Location).first()
+        location = Location.objects.create(name="Site 1", location_type=location_type, status=location_status)
+        devicerole = Role.objects.create(name="Router", color="ff0000")
+        devicerole.content_types.add(ContentType.objects.get_for_model(Device))
+        cls.device = Device.objects.create(
+            device_type=devicetype, role=devicerole, name="Device 1", location=location, status=cls.status_active
+        )
+        interface_status = Status.objects.get_for_model(Interface).first()
+        cls.interface = Interface.objects.create(device=cls.device, name="Loopback1", status=interface_status)
+
+        cls.namespace = Namespace.objects.first()
+        prefix_status = Status.objects.get_for_model(Prefix).first()
+        Prefix.objects.create(prefix="10.0.0.0/8", namespace=cls.namespace, status=prefix_status)
+
+        asn = models.AutonomousSystem.objects.create(asn=65000, status=cls.status_active)
+        cls.remote_asn = models.AutonomousSystem.objects.create(asn=65001, status=cls.status_active)
+        cls.routing_instance = models.BGPRoutingInstance.objects.create(
+            autonomous_system=asn, device=cls.device, status=cls.status_active
+        )
+        models.AddressFamily.objects.create(
+            routing_instance=cls.routing_instance, afi_safi=AFISAFIChoices.AFI_IPV4_UNICAST
+        )
+        cls.peer_group = models.PeerGroup.objects.create(name="Group 1", routing_instance=cls.routing_instance)
+        cls.create_peerings(2)
+
+    @classmethod
+    def create_peerings(cls, count):
+        """Create `count` peerings between the device and remote endpoints, half of them through the peer group."""
+        start = models.Peering.objects.count()
+        for index in range(start, start + count):
+            local_ip = IPAddress.objects.create(
+                address=f"10.1.0.{index + 1}/32", status=cls.status_active, namespace=cls.namespace
+            )
+            cls.interface.add_ip_addresses(local_ip)
+            remote_ip = IPAddress.objects.create(
+                address=f"10.2.0.{index + 1}/32", status=cls.status_active, namespace=cls.namespace
+            )
+            peering = models.Peering.objects.create(status=cls.status_active)
+            local = models.PeerEndpoint.objects.create(
+                routing_instance=cls.routing_instance,
+                peer_group=cls.peer_group if index % 2 else None,
+                source_ip=local_ip,
+                peering=peering,
+            )
+            models.PeerEndpoint.objects.create(
+                source_ip=remote_ip, autonomous_system=cls.remote_asn, peering=peering, peer=local
+            )
+            peering.update_peers()
+
+    def get_panel(self):
+        """Return the response of the BGP panel of the device."""
+        return self.client.get(reverse("plugins:nautobot_bgp_models:device_bgp_panel", kwargs={"pk": self.device.pk}))
+
+    def test_device_page_loads_panel(self):
+        """The Device detail view includes the placeholder loading the BGP panel."""
+        self.add_permissions("dcim.view_device")
+        response = self.client.get(self.device.get_absolute_url())
+        self.assertHttpStatus(response, 200)
+        self.assertContains(
+            response, reverse("plugins:nautobot_bgp_models:device_bgp_panel", kwargs={"pk": self.device.pk})
+        )
+
+    def test_panel(self):
+        """The panel lists the routing instances, address families and peer endpoints of the device."""
+        self.add_permissions(
+            "dcim.view_device",
+            "nautobot_bgp_models.view_bgproutinginstance",
+            "nautobot_bgp_models.view_addressfamily",
+            "nautobot_bgp_models.view_peerendpoint",
+        )
+        response = self.get_panel()
+        self.assertHttpStatus(response, 200)
+        self.assertContains(response, self.routing_instance.get_absolute_url())
+        self.assertContains(response, AFISAFIChoices.AFI_IPV4_UNICAST)
+        for endpoint in models.PeerEndpoint.objects.all():
+            self.assertContains(response, endpoint.get_absolute_url())
+            self.assertContains(response, str(endpoint))
+        self.assertNotContains(response, "View all")
+
+    def test_panel_constant_queries(self):
+        """The number of queries doesn't depend on the number of peer endpoints."""
+        self.add_permissions(
+            "dcim.view_device",
+            "nautobot_bgp_models.view_bgproutinginstance",
+            "nautobot_bgp_models.view_addressfamily",
+            "nautobot_bgp_models.view_peerendpoint",
+        )
+        with CaptureQueriesContext(connection) as initial:
+            self.assertHttpStatus(self.get_panel(), 200)
+        self.create_peerings(6)
+        with CaptureQueriesContext(connection) as more_peerings:
+            self.assertHttpStatus(self.get_panel(), 200)
+        self.assertEqual(len(more_peerings), len(initial))
+
+    def test_panel_max_endpoints(self):
+        """Beyond `max_endpoints`, the panel links to the full list of peer endpoints."""
+        self.add_permissions("dcim.view_device", "nautobot_bgp_models.view_peerendpoint")
+        plugins_config = copy.deepcopy(settings.PLUGINS_CONFIG)
+        plugins_config["nautobot_bgp_models"]["device_bgp_panel"] = {"max_endpoints": 1}
+        with override_settings(PLUGINS_CONFIG=plugins_config):
+            response = self.get_panel()
+        self.assertHttpStatus(response, 200)
+        self.assertContains(response, "Showing 1 of 2 peer endpoints.")
+        self.assertContains(response, f"{reverse('plugins:nautobot_bgp_models:peerendpoint_list')}?device=Device%201")
+
+    def test_panel_permissions(self):
+        """The panel requires the permission to view the device, and only shows the objects the user may view."""
+        self.assertHttpStatus(self.get_panel(), 404)
+
+        self.add_permissions("dcim.view_device")
+        response = self.get_panel()
+        self.assertHttpStatus(response, 200)
+        self.assertContains(response, "No routing instances")
+        self.assertContains(response, "No peerings")
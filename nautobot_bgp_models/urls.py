@@ -63,5 +63,6 @@ urlpatterns = [
         kwargs={"model": models.PeerEndpointAddressFamily},
     ),
     path("peerings/add/", views.PeeringAddView.as_view(), name="peering_add"),
+    path("devices/<uuid:pk>/bgp-panel/", views.DeviceBGPPanelView.as_view(), name="device_bgp_panel"),
 ]
 urlpatterns += router.urls
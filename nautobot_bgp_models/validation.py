@@ -0,0 +1,88 @@
+"""Lookups shared by the `clean()` methods of the BGP models when validating records in bulk."""
+
+import contextvars
+
+from nautobot.ipam.models import IPAddress, IPAddressToInterface
+
+_current_context = contextvars.ContextVar("nautobot_bgp_models_validation_context", default=None)
+
+
+class ValidationContext:
+    """IP address assignments and VRFs that `PeerGroup.clean()` and `PeerEndpoint.clean()` validate records against.
+
+    Each lookup is loaded from the database the first time it is needed, then kept for the lifetime of the context:
+    within a `with ValidationContext():` block, validating thousands of endpoints of the same devices loads the IP
+    addresses of each device once, instead of once per endpoint. `prime()` loads the lookups of a whole batch of
+    records upfront, with a fixed number of queries.
+
+    A context assumes that the IP address assignments and prefix VRFs don't change while it is active, which holds
+    for the validation of a batch of BGP records.
+    """
+
+    def __init__(self):
+        """Create an empty context."""
+        self._device_ip_address_ids = {}
+        self._assigned_ip_address_ids = {}
+        self._ip_address_vrf_ids = {}
+        self._token = None
+
+    def __enter__(self):
+        """Make this context the one used by the `clean()` methods of the current thread or task."""
+        self._token = _current_context.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        """Restore the previously active context, if any."""
+        _current_context.reset(self._token)
+        self._token = None
+
+    @classmethod
+    def current(cls):
+        """Return the active context, or a new one only used by the caller if no context is active."""
+        context = _current_context.get()
+        return context if context is not None else cls()
+
+    def prime(self, device_ids=(), ip_address_ids=()):
+        """Load the lookups of all the given devices and IP addresses not loaded yet."""
+        device_ids = {pk for pk in device_ids if pk is not None and pk not in self._device_ip_address_ids}
+        if device_ids:
+            for device_id in device_ids:
+                self._device_ip_address_ids[device_id] = set()
+            # The IP addresses of a device are assigned by definition, and their VRFs are loaded along
+            for device_id, ip_address_id, vrf_id in IPAddressToInterface.objects.filter(
+                interface__device_id__in=device_ids
+            ).values_list("interface__device_id", "ip_address_id", "ip_address__parent__vrfs"):
+                self._device_ip_address_ids[device_id].add(ip_address_id)
+                self._assigned_ip_address_ids[ip_address_id] = True
+                self._ip_address_vrf_ids.setdefault(ip_address_id, set())
+                if vrf_id is not None:
+                    self._ip_address_vrf_ids[ip_address_id].add(vrf_id)
+
+        ip_address_ids = {pk for pk in ip_address_ids if pk is not None and pk not in self._ip_address_vrf_ids}
+        if ip_address_ids:
+            for ip_address_id in ip_address_ids:
+                self._assigned_ip_address_ids[ip_address_id] = False
+                self._ip_address_vrf_ids[ip_address_id] = set()
+            for ip_address_id in IPAddressToInterface.objects.filter(ip_address_id__in=ip_address_ids).values_list(
+                "ip_address_id", flat=True
+            ):
+                self._assigned_ip_address_ids[ip_address_id] = True
+            for ip_address_id, vrf_id in IPAddress.objects.filter(
+                pk__in=ip_address_ids, parent__vrfs__isnull=False
+            ).values_list("pk", "parent__vrfs"):
+                self._ip_address_vrf_ids[ip_address_id].add(vrf_id)
+
+    def device_ip_address_ids(self, device_id):
+        """Return the PKs of the IP addresses assigned to the interfaces of the device."""
+        self.prime(device_ids=[device_id])
+        return self._device_ip_address_ids[device_id]
+
+    def is_ip_address_assigned(self, ip_address_id):
+        """Return whether the IP address is assigned to an interface."""
+        self.prime(ip_address_ids=[ip_address_id])
+        return self._assigned_ip_address_ids[ip_address_id]
+
+    def ip_address_vrf_ids(self, ip_address_id):
+        """Return the PKs of the VRFs of the parent prefix of the IP address."""
+        self.prime(ip_address_ids=[ip_address_id])
+        return self._ip_address_vrf_ids[ip_address_id]
@@ -1,18 +1,20 @@
 """View classes for nautobot_bgp_models."""
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic import View
-from django_tables2 import RequestConfig
 
 from nautobot.apps.views import NautobotUIViewSet
+from nautobot.dcim.models import Device
 from nautobot.core.views import mixins
 from nautobot.core.views import generic
 from nautobot.extras.utils import get_base_template
-from nautobot.core.views.paginator import EnhancedPaginator, get_paginate_count
+from nautobot.core.views.paginator import get_paginate_count
 
-from . import filters, forms, helpers, models, tables
+from . import filters, forms, models, tables
 from .api import serializers
 
 
@@ -24,7 +26,7 @@ class AutonomousSystemUIViewSet(NautobotUIViewSet):
     filterset_form_class = forms.AutonomousSystemFilterForm
     form_class = forms.AutonomousSystemForm
     lookup_field = "pk"
-    queryset = models.AutonomousSystem.objects.all()
+    queryset = models.AutonomousSystem.objects.with_containing_range()
     serializer_class = serializers.AutonomousSystemSerializer
     table_class = tables.AutonomousSystemTable
 
@@ -45,24 +47,28 @@ class AutonomousSystemRangeUIViewSet(NautobotUIViewSet):
         """Return any additional context data for the template."""
         context = super().get_extra_context(request, instance)
         if self.action == "retrieve":
-            asns = models.AutonomousSystem.objects.filter(asn__gte=instance.asn_min, asn__lte=instance.asn_max)
-            asns = helpers.add_available_asns(instance, asns)
-
-            asn_table = tables.AutonomousSystemTable(asns)
+            # Keyset pagination on the ASN number, so that any page costs the same whatever the size of the range
+            per_page = get_paginate_count(request)
+            try:
+                after = int(request.GET["asn_after"])
+            except (KeyError, ValueError):
+                after = None
+            rows = instance.get_asns_with_gaps(after=after, limit=per_page + 1)
+            if len(rows) > per_page:
+                rows = rows[:per_page]
+                context["asn_range_next"] = rows[-1]["asn"] if isinstance(rows[-1], dict) else rows[-1].asn
+            context["asn_range_paginated"] = after is not None
+            context["asn_range_per_page"] = per_page
+
+            asn_table = tables.AutonomousSystemTable(rows, orderable=False)
             asn_table.columns.hide("actions")
+            asn_table.columns.hide("containing_range")
 
             if request.user.has_perm("nautobot_bgp_models.change_autonomoussystem") or request.user.has_perm(
                 "nautobot_bgp_models.delete_autonomoussystem"
             ):
                 asn_table.columns.show("pk")
 
-            paginate = {
-                "paginator_class": EnhancedPaginator,
-                "per_page": get_paginate_count(request),
-            }
-
-            RequestConfig(request, paginate).configure(asn_table)
-
             context["asn_range_table"] = asn_table
 
         return context
@@ -122,7 +128,9 @@ class PeerEndpointUIViewSet(NautobotUIViewSet):
     filterset_form_class = forms.PeerEndpointFilterForm
     form_class = forms.PeerEndpointForm
     lookup_field = "pk"
-    queryset = models.PeerEndpoint.objects.all()
+    queryset = models.PeerEndpoint.objects.with_local_ip().select_related(
+        "routing_instance__device", "source_ip", "peer_group__source_ip"
+    )
     serializer_class = serializers.PeerEndpointSerializer
     table_class = tables.PeerEndpointTable
 
@@ -153,7 +161,7 @@ class PeeringUIViewSet(  # pylint: disable=abstract-method
     filterset_form_class = forms.PeeringFilterForm
     form_class = forms.PeeringForm
     lookup_field = "pk"
-    queryset = models.Peering.objects.all()
+    queryset = models.Peering.objects.prefetch_endpoints().with_endpoint_details()
     serializer_class = serializers.PeeringSerializer
     table_class = tables.PeeringTable
 
@@ -296,3 +304,49 @@ class BgpExtraAttributesView(View):
                 "active_tab": "extraattributes",
             },
         )
+
+
+class DeviceBGPPanelView(View):
+    """BGP panel of the Device detail view, loaded asynchronously by the `DeviceBGPPanel` template extension.
+
+    The routing instances, address families and peer endpoints of the device are fetched with a constant number of
+    queries, and at most `max_endpoints` peer endpoints are displayed, followed by a link to the full list.
+    """
+
+    def get(self, request, pk):  # pylint: disable=missing-function-docstring
+        device = get_object_or_404(Device.objects.restrict(request.user, "view"), pk=pk)
+        max_endpoints = (
+            settings.PLUGINS_CONFIG.get("nautobot_bgp_models", {}).get("device_bgp_panel", {}).get("max_endpoints", 50)
+        )
+
+        routing_instances = (
+            models.BGPRoutingInstance.objects.restrict(request.user, "view")
+            .filter(device=device)
+            .select_related("device", "autonomous_system")
+            .prefetch_related(
+                Prefetch(
+                    "address_families",
+                    queryset=models.AddressFamily.objects.restrict(request.user, "view").select_related("vrf"),
+                )
+            )
+        )
+        endpoints = (
+            models.PeerEndpoint.objects.restrict(request.user, "view")
+            .filter(routing_instance__device=device)
+            .prefetch_display()
+            .prefetch_related(Prefetch("peer", queryset=models.PeerEndpoint.objects.prefetch_display()))
+            .order_by("routing_instance", "pk")
+        )
+        endpoints_count = endpoints.count()
+
+        return render(
+            request,
+            "nautobot_bgp_models/inc/device_bgp_panel.html",
+            {
+                "object": device,
+                "routing_instances": routing_instances,
+                "endpoints": endpoints[:max_endpoints] if endpoints_count else [],
+                "endpoints_count": endpoints_count,
+                "endpoints_truncated": endpoints_count > max_endpoints,
+            },
+        )
@@ -787,6 +787,22 @@ def unittest_coverage(context):
     run_command(context, command)
 
 
+@task(
+    help={
+        "keepdb": "save and re-use test database between test runs for faster re-testing.",
+        "label": "specify a benchmark module to run instead of all benchmarks",
+    }
+)
+def benchmark(context, keepdb=False, label="nautobot_bgp_models.tests.benchmarks"):
+    """Run the app's performance benchmarks (not part of the unit tests)."""
+    command = f"nautobot-server test {label} --pattern 'bench_*.py'"
+
+    if keepdb:
+        command += " --keepdb"
+
+    run_command(context, command)
+
+
 @task(
     help={
         "failfast": "fail as soon as a single test fails don't run the entire test suite. (default: False)",